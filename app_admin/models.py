@@ -6,4 +6,19 @@ class Superadmin(models.Model):
 
     def __str__(self):
         return f"{self.usuario.username}"
-    
\ No newline at end of file
+
+
+class MarcaEventosVistos(models.Model):
+    """
+    Hasta cuándo revisó un superadmin el listado de eventos de un estado.
+    Los eventos que llegaron a ese estado después (eve_fecha_estado) cuentan como nuevos.
+    """
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='marcas_eventos_vistos')
+    estado = models.CharField(max_length=45)  # en minúsculas, como en la URL del listado
+    visto_hasta = models.DateTimeField()
+
+    class Meta:
+        unique_together = (('usuario', 'estado'),)
+
+    def __str__(self):
+        return f"{self.usuario.username} - {self.estado}: {self.visto_hasta}"
@@ -14,15 +14,19 @@ from app_usuarios.models import Usuario
 from app_usuarios.permisos import es_superadmin
 from django.template.loader import render_to_string
 from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
 from app_asistentes.models import Asistente, AsistenteEvento
 from app_participantes.models import Participante, ParticipanteEvento
 from app_evaluadores.models import Evaluador, EvaluadorEvento
 from app_administradores.models import CodigoInvitacionEvento
 from app_eventos.models import ConfiguracionCertificado
 from app_eventos.models import EventoCategoria
+from app_eventos.estadisticas import estadisticas_evento
+from .models import MarcaEventosVistos
 from app_asistentes.models import AsistenteEvento
 from app_participantes.models import ParticipanteEvento
-from app_evaluadores.models import EvaluadorEvento, Criterio, Calificacion
+from app_evaluadores.models import EvaluadorEvento
 
 
 
@@ -144,28 +148,36 @@ def _eliminar_informacion_evento_cerrado(evento):
 @login_required
 @user_passes_test(es_superadmin, login_url='ver_eventos')
 def dashboard(request):
-    estados_objetivo = ['pendiente', 'inscripciones cerradas', 'finalizado', 'cerrado']
-    eventos = Evento.objects.filter(eve_estado__in=estados_objetivo)    
     mapa_estados = {
         'pendiente': 'Pendiente',
         'inscripciones cerradas': 'Inscripciones Cerradas',
         'finalizado': 'Finalizado',
         'cerrado': 'Cerrado',
     }
-    nuevos_por_estado = {v: [] for v in mapa_estados.values()}
-    for evento in eventos:
-        estado_raw = evento.eve_estado.lower()
-        estado_formateado = mapa_estados.get(estado_raw, estado_raw.title())
-        if estado_formateado in nuevos_por_estado:
-            nuevos_por_estado[estado_formateado].append(evento.eve_id)
-    vistos = request.session.get('eventos_vistos', {})
-    notificaciones = {}
-    total_nuevos = 0
-    for estado, eventos_ids in nuevos_por_estado.items():
-        vistos_estado = vistos.get(estado, [])
-        nuevos = [eid for eid in eventos_ids if eid not in vistos_estado]
-        notificaciones[estado] = len(nuevos)
-        total_nuevos += len(nuevos)
+    marcas = dict(
+        MarcaEventosVistos.objects.filter(usuario=request.user).values_list('estado', 'visto_hasta')
+    )
+    # Un evento es nuevo si llegó a su estado después de la última visita al listado de ese estado.
+    # Sin fecha de estado (eventos anteriores al campo, ver sellar_fecha_estado) se cuenta como nuevo
+    es_nuevo = Q()
+    for estado_raw in mapa_estados:
+        condicion = Q(estado_normalizado=estado_raw)
+        if estado_raw in marcas:
+            condicion &= Q(eve_fecha_estado__gt=marcas[estado_raw]) | Q(eve_fecha_estado__isnull=True)
+        es_nuevo |= condicion
+    # Una sola consulta agrupada por estado, sin importar cuántos eventos haya
+    conteos = Evento.objects.annotate(estado_normalizado=Lower('eve_estado')).values('estado_normalizado').annotate(
+        total=Count('eve_id'), nuevos=Count('eve_id', filter=es_nuevo)
+    ).order_by()
+
+    totales = {}
+    notificaciones = {estado: 0 for estado in mapa_estados.values()}
+    for fila in conteos:
+        estado_formateado = mapa_estados.get(fila['estado_normalizado'], fila['estado_normalizado'].title())
+        totales[estado_formateado] = totales.get(estado_formateado, 0) + fila['total']
+        if estado_formateado in notificaciones:
+            notificaciones[estado_formateado] += fila['nuevos']
+    total_nuevos = sum(notificaciones.values())
     if total_nuevos > 0:
         mensajes_estados = []
         for estado, cantidad in notificaciones.items():
@@ -182,6 +194,7 @@ def dashboard(request):
     ]    
     return render(request, 'dashboard.html', {
         'notificaciones': notificaciones,
+        'totales': totales,
         'estados_tarjetas': estados_tarjetas
     })
 
@@ -400,14 +413,18 @@ def crear_codigo_invitacion_admin(request):
 @login_required
 @user_passes_test(es_superadmin, login_url='ver_eventos')
 def listar_eventos_estado(request, estado):
+    # La marca se toma antes de leer: lo que cambie de estado mientras tanto seguirá siendo nuevo
+    visto_hasta = timezone.now()
     eventos = Evento.objects.filter(eve_estado=estado.lower()).select_related('eve_administrador_fk')
     eventos_por_admin = defaultdict(list)
     for evento in eventos:
         admin = evento.eve_administrador_fk
         eventos_por_admin[admin].append(evento)
-    vistos = request.session.get('eventos_vistos', {})
-    vistos[estado] = [e.eve_id for e in eventos]
-    request.session['eventos_vistos'] = vistos
+    MarcaEventosVistos.objects.update_or_create(
+        usuario=request.user, estado=estado.lower(), defaults={'visto_hasta': visto_hasta}
+    )
+    # Las versiones anteriores guardaban aquí la lista de ids vistos
+    request.session.pop('eventos_vistos', None)
     return render(request, 'listado_eventos.html', {
         'eventos_por_admin': eventos_por_admin.items(),
         'estado': estado.title(),
@@ -472,31 +489,9 @@ def detalle_evento_admin(request, eve_id):
     # Calcular estadísticas si el evento está aprobado
     estadisticas = None
     if evento.eve_estado.lower() == 'aprobado':
-        
-        
-        # Estadísticas de asistentes
-        asistentes_total = AsistenteEvento.objects.filter(evento=evento).count()
-        asistentes_aprobados = AsistenteEvento.objects.filter(evento=evento, asi_eve_estado='Aprobado').count()
-        asistentes_pendientes = AsistenteEvento.objects.filter(evento=evento, asi_eve_estado='Pendiente').count()
-        asistentes_confirmados = AsistenteEvento.objects.filter(evento=evento, confirmado=True).count()
-        
-        # Estadísticas de participantes
-        participantes_total = ParticipanteEvento.objects.filter(evento=evento).count()
-        participantes_aprobados = ParticipanteEvento.objects.filter(evento=evento, par_eve_estado='Aprobado').count()
-        participantes_pendientes = ParticipanteEvento.objects.filter(evento=evento, par_eve_estado='Pendiente').count()
-        participantes_confirmados = ParticipanteEvento.objects.filter(evento=evento, confirmado=True).count()
-        participantes_calificados = ParticipanteEvento.objects.filter(evento=evento, par_eve_valor__isnull=False).count()
-        
-        # Estadísticas de evaluadores
-        evaluadores_total = EvaluadorEvento.objects.filter(evento=evento).count()
-        evaluadores_aprobados = EvaluadorEvento.objects.filter(evento=evento, eva_eve_estado='Aprobado').count()
-        evaluadores_pendientes = EvaluadorEvento.objects.filter(evento=evento, eva_eve_estado='Pendiente').count()
-        evaluadores_confirmados = EvaluadorEvento.objects.filter(evento=evento, confirmado=True).count()
-        
-        # Estadísticas de evaluación
-        criterios_total = Criterio.objects.filter(cri_evento_fk=evento).count()
-        calificaciones_total = Calificacion.objects.filter(criterio__cri_evento_fk=evento).count()
-        
+        conteos = estadisticas_evento(evento)
+        asistentes_total = conteos['asistentes']['total']
+
         # Calcular capacidad utilizada (solo asistentes ocupan cupos)
         inscritos_totales = asistentes_total  # Solo asistentes ocupan capacidad
         porcentaje_ocupacion = round((inscritos_totales / evento.eve_capacidad) * 100, 1) if evento.eve_capacidad > 0 else 0
@@ -509,29 +504,7 @@ def detalle_evento_admin(request, eve_id):
         }
         
         estadisticas = {
-            'asistentes': {
-                'total': asistentes_total,
-                'aprobados': asistentes_aprobados,
-                'pendientes': asistentes_pendientes,
-                'confirmados': asistentes_confirmados,
-            },
-            'participantes': {
-                'total': participantes_total,
-                'aprobados': participantes_aprobados,
-                'pendientes': participantes_pendientes,
-                'confirmados': participantes_confirmados,
-                'calificados': participantes_calificados,
-            },
-            'evaluadores': {
-                'total': evaluadores_total,
-                'aprobados': evaluadores_aprobados,
-                'pendientes': evaluadores_pendientes,
-                'confirmados': evaluadores_confirmados,
-            },
-            'evaluacion': {
-                'criterios': criterios_total,
-                'calificaciones': calificaciones_total,
-            },
+            **conteos,
             'capacidad': {
                 'total': evento.eve_capacidad,
                 'inscritos': inscritos_totales,
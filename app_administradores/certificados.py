@@ -0,0 +1,348 @@
+"""
+Envío de certificados en segundo plano.
+
+Las vistas solo encolan un EnvioCertificados con un CertificadoDestinatario por
+persona (los datos del certificado se resuelven al encolar). El comando
+procesar_certificados toma los envíos, genera los PDFs por lotes con
+renderizar_pdfs y marca cada destinatario como enviado o con error en cuanto
+termina, así un procesador que se reinicia retoma solo lo que faltaba y los
+destinatarios fallidos se pueden reintentar sin repetir los demás. Cada toma del
+envío lleva una ficha (procesador); un procesador que la pierde porque otro retomó
+el envío abandonado se detiene antes del siguiente correo.
+"""
+import base64
+import io
+import logging
+import mimetypes
+import os
+import uuid
+from datetime import timedelta
+
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import Count, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import EnvioCertificados, CertificadoDestinatario
+from .pdf_paralelo import crear_pool, renderizar_pdfs
+from app_eventos.models import ConfiguracionCertificado
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 50
+
+# Un envío 'en_proceso' sin latido en este tiempo se considera abandonado
+TIEMPO_ABANDONO = timedelta(minutes=10)
+
+# El recuadro más grande de la plantilla (firma, 110 px CSS ≈ 1,15 pulgadas)
+# necesita unos 345 píxeles a 300 ppp; por encima de esto solo crece el PDF
+LADO_MAXIMO_IMAGEN = 400
+
+# Las claves incluyen la fecha de modificación: una imagen nueva nunca lee la anterior
+TIEMPO_CACHE_IMAGENES = 24 * 3600
+
+
+def _formato_imagen(ruta):
+    """Formato de la imagen para el data URI, según su tipo MIME o su extensión"""
+    mime_type, _ = mimetypes.guess_type(ruta)
+    if mime_type:
+        return mime_type.split('/')[1]
+    # Fallback basado en la extensión
+    ext = os.path.splitext(ruta)[1].lower()
+    if ext in ['.jpg', '.jpeg']:
+        return 'jpeg'
+    elif ext == '.png':
+        return 'png'
+    elif ext == '.gif':
+        return 'gif'
+    return 'jpeg'  # default
+
+
+def _reducir_imagen(contenido, formato):
+    """
+    Reduce la imagen a LADO_MAXIMO_IMAGEN píxeles por lado si es más grande.
+    Retorna (contenido, formato); lo que Pillow no puede abrir (p. ej. SVG) se deja igual.
+    """
+    try:
+        with Image.open(io.BytesIO(contenido)) as imagen:
+            if max(imagen.size) <= LADO_MAXIMO_IMAGEN:
+                return contenido, formato
+            transparente = imagen.mode in ('RGBA', 'LA', 'P') or 'transparency' in imagen.info
+            # Al volver a codificar se pierde el EXIF: aplicar antes la orientación
+            imagen = ImageOps.exif_transpose(imagen)
+            imagen = imagen.convert('RGBA' if transparente else 'RGB')
+            imagen.thumbnail((LADO_MAXIMO_IMAGEN, LADO_MAXIMO_IMAGEN), Image.LANCZOS)
+            salida = io.BytesIO()
+            if formato == 'jpeg' and not transparente:
+                imagen.save(salida, 'JPEG', quality=90, optimize=True)
+            else:
+                formato = 'png'
+                imagen.save(salida, 'PNG', optimize=True)
+            return salida.getvalue(), formato
+    except OSError:
+        return contenido, formato
+
+
+def imagen_to_base64(imagen_field):
+    """
+    Convierte un campo de imagen de Django a base64 para usar en PDFs.
+    El resultado se guarda en la caché por configuración, archivo y fecha de
+    modificación, así cada imagen se lee y se reduce una sola vez.
+    """
+    if imagen_field and hasattr(imagen_field, 'path'):
+        try:
+            ruta = imagen_field.path
+            clave = None
+            if imagen_field.instance.pk is not None:
+                clave = f'certificado_imagen:{imagen_field.instance.pk}:{imagen_field.name}:{os.path.getmtime(ruta)}'
+                guardada = cache.get(clave)
+                if guardada is not None:
+                    return guardada
+
+            with open(ruta, 'rb') as image_file:
+                contenido, format_name = _reducir_imagen(image_file.read(), _formato_imagen(ruta))
+            resultado = (base64.b64encode(contenido).decode('utf-8'), format_name)
+            if clave:
+                cache.set(clave, resultado, TIEMPO_CACHE_IMAGENES)
+            return resultado
+        except Exception:
+            logger.exception('Error al convertir la imagen %s a base64', imagen_field.name)
+            return None, None
+    return None, None
+
+
+def imagenes_certificado(configuracion):
+    """Logo y firma de la configuración en base64, listos para la plantilla del certificado"""
+    logo_base64, logo_format = imagen_to_base64(configuracion.logo)
+    firma_base64, firma_format = imagen_to_base64(configuracion.firma)
+    return {
+        'logo_base64': logo_base64,
+        'logo_format': logo_format,
+        'firma_base64': firma_base64,
+        'firma_format': firma_format,
+    }
+
+
+def html_certificado(configuracion, datos_certificado, imagenes):
+    """HTML del certificado con los datos del destinatario reemplazados en el cuerpo"""
+    cuerpo_con_datos = configuracion.cuerpo
+    for clave, valor in datos_certificado.items():
+        cuerpo_con_datos = cuerpo_con_datos.replace(f'**{clave}**', valor)
+    return render_to_string('app_administradores/certificado_plantilla.html', {
+        'configuracion': configuracion,
+        'cuerpo_renderizado': cuerpo_con_datos,
+        'datos': datos_certificado,
+        'es_preview': False,
+        **imagenes,
+    })
+
+
+def encolar_envio(evento, tipo, lote, usuario=None, base_url=''):
+    """
+    Crea el envío con un destinatario por elemento del lote (dicts con clave,
+    datos, email, asunto, mensaje y archivo). Las claves repetidas se envían una vez.
+    """
+    unicos = {item['clave']: item for item in lote}
+    with transaction.atomic():
+        envio = EnvioCertificados.objects.create(
+            evento=evento, tipo=tipo, creado_por=usuario, base_url=base_url
+        )
+        CertificadoDestinatario.objects.bulk_create([
+            CertificadoDestinatario(
+                envio=envio,
+                inscripcion_id=clave,
+                nombre=item['datos'].get('NOMBRE', ''),
+                email=item['email'],
+                datos=item['datos'],
+                asunto=item['asunto'],
+                mensaje=item['mensaje'],
+                archivo=item['archivo'],
+            )
+            for clave, item in unicos.items()
+        ], batch_size=500)
+    return envio
+
+
+def _conteos():
+    return {
+        'total': Count('destinatarios'),
+        'enviados': Count('destinatarios', filter=Q(destinatarios__estado='enviado')),
+        'fallidos': Count('destinatarios', filter=Q(destinatarios__estado='error')),
+    }
+
+
+def envios_recientes(evento, tipo, limite=5):
+    """Últimos envíos del evento y tipo con sus conteos, en una sola consulta"""
+    return EnvioCertificados.objects.filter(evento=evento, tipo=tipo).annotate(
+        **_conteos()
+    ).order_by('-fecha_creacion')[:limite]
+
+
+def estado_envio(envio):
+    """Resumen serializable del envío, para la barra de progreso"""
+    conteos = envio.destinatarios.aggregate(
+        total=Count('id'),
+        enviados=Count('id', filter=Q(estado='enviado')),
+        fallidos=Count('id', filter=Q(estado='error')),
+    )
+    terminados = conteos['enviados'] + conteos['fallidos']
+    return {
+        'estado': envio.estado,
+        'estado_display': envio.get_estado_display(),
+        **conteos,
+        'pendientes': conteos['total'] - terminados,
+        'porcentaje': int(terminados * 100 / conteos['total']) if conteos['total'] else 100,
+        'error': envio.error,
+    }
+
+
+def tomar_siguiente_envio():
+    """
+    Marca como 'en_proceso' el envío pendiente más antiguo (o uno abandonado
+    por un procesador que se detuvo) y lo retorna.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        envio = EnvioCertificados.objects.select_for_update(skip_locked=True).filter(
+            Q(estado='pendiente') | Q(estado='en_proceso', latido__lt=ahora - TIEMPO_ABANDONO)
+        ).order_by('fecha_creacion').first()
+        if envio is None:
+            return None
+        envio.estado = 'en_proceso'
+        envio.fecha_inicio = envio.fecha_inicio or ahora
+        envio.latido = ahora
+        envio.procesador = uuid.uuid4().hex
+        envio.save(update_fields=['estado', 'fecha_inicio', 'latido', 'procesador'])
+    return envio
+
+
+def _renovar_latido(envio):
+    """Actualiza el latido si el envío sigue en manos de este procesador; False si otro lo retomó"""
+    envio.latido = timezone.now()
+    return EnvioCertificados.objects.filter(
+        pk=envio.pk, estado='en_proceso', procesador=envio.procesador
+    ).update(latido=envio.latido) > 0
+
+
+def _registrar(destinatario, error=''):
+    destinatario.intentos += 1
+    destinatario.estado = 'error' if error else 'enviado'
+    destinatario.error = error
+    if not error:
+        destinatario.fecha_envio = timezone.now()
+    destinatario.save(update_fields=['intentos', 'estado', 'error', 'fecha_envio'])
+
+
+def _enviar_lote(envio, configuracion, imagenes, destinatarios, pool, tamano_bloque):
+    """
+    Genera los PDFs del lote en paralelo y envía cada uno en cuanto está listo.
+    Retorna False si el procesador perdió el envío a mitad del lote.
+    """
+    por_id = {}
+    trabajos = []
+    for destinatario in destinatarios:
+        try:
+            trabajos.append((destinatario.id, html_certificado(configuracion, destinatario.datos, imagenes)))
+            por_id[destinatario.id] = destinatario
+        except Exception as e:
+            _registrar(destinatario, str(e))
+
+    pdfs = renderizar_pdfs(trabajos, base_url=envio.base_url or None, tamano_bloque=tamano_bloque, pool=pool)
+    for clave, pdf_file, error in pdfs:
+        if not _renovar_latido(envio):
+            return False
+        destinatario = por_id[clave]
+        if error:
+            _registrar(destinatario, error)
+            continue
+        try:
+            email = EmailMessage(
+                subject=destinatario.asunto,
+                body=destinatario.mensaje,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[destinatario.email],
+            )
+            email.attach(destinatario.archivo, pdf_file, 'application/pdf')
+            email.send()
+            _registrar(destinatario)
+        except Exception as e:
+            _registrar(destinatario, str(e))
+    return True
+
+
+def _cerrar_si_terminado(envio):
+    """Marca el envío como completado si no le quedan pendientes (bloqueado frente a reintentos)"""
+    with transaction.atomic():
+        actual = EnvioCertificados.objects.select_for_update().filter(pk=envio.pk).first()
+        if actual is None or actual.procesador != envio.procesador:
+            return True
+        if envio.destinatarios.filter(estado='pendiente').exists():
+            return False
+        envio.estado = 'completado'
+        envio.fecha_fin = timezone.now()
+        envio.save(update_fields=['estado', 'fecha_fin'])
+    return True
+
+
+def procesar_envio(envio, tamano_lote=TAMANO_LOTE, procesos=None, tamano_bloque=None):
+    """
+    Envía por lotes los certificados pendientes del envío. Cada destinatario queda
+    enviado o con error al terminar su lote; los ya enviados no se repiten. Un solo
+    pool de procesos sirve a todos los lotes. Si otro procesador retoma el envío,
+    este se detiene sin tocar su estado.
+    """
+    procesos = settings.CERTIFICADOS_PROCESOS if procesos is None else procesos
+    tamano_bloque = tamano_bloque or settings.CERTIFICADOS_POR_BLOQUE
+    pool = None
+    try:
+        configuracion = ConfiguracionCertificado.objects.get(evento_id=envio.evento_id, tipo=envio.tipo)
+        imagenes = imagenes_certificado(configuracion)
+        pool = crear_pool(procesos)
+        while True:
+            if not _renovar_latido(envio):
+                return envio
+            lote = list(envio.destinatarios.filter(estado='pendiente').order_by('id')[:tamano_lote])
+            if not lote:
+                if _cerrar_si_terminado(envio):
+                    break
+                continue
+            if not _enviar_lote(envio, configuracion, imagenes, lote, pool, tamano_bloque):
+                return envio
+        return envio
+    except ConfiguracionCertificado.DoesNotExist:
+        envio.error = 'El certificado ya no está configurado para este evento'
+    except Exception as e:
+        envio.error = str(e)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    envio.estado = 'error'
+    envio.fecha_fin = timezone.now()
+    EnvioCertificados.objects.filter(pk=envio.pk, procesador=envio.procesador).update(
+        estado=envio.estado, error=envio.error, fecha_fin=envio.fecha_fin
+    )
+    return envio
+
+
+def reintentar_envio(envio, destinatarios_ids=None):
+    """
+    Vuelve a pendiente los destinatarios con error (todos o los indicados) y
+    reencola el envío. Retorna cuántos destinatarios se reintentarán.
+    """
+    with transaction.atomic():
+        envio = EnvioCertificados.objects.select_for_update().get(pk=envio.pk)
+        fallidos = envio.destinatarios.filter(estado='error')
+        if destinatarios_ids:
+            fallidos = fallidos.filter(id__in=destinatarios_ids)
+        reintentos = fallidos.update(estado='pendiente', error='')
+        # Si un procesador lo tiene en curso, tomará los nuevos pendientes antes de cerrarlo
+        if envio.estado != 'en_proceso' and (reintentos or envio.estado == 'error'):
+            envio.estado = 'pendiente'
+            envio.error = ''
+            envio.fecha_fin = None
+            envio.save(update_fields=['estado', 'error', 'fecha_fin'])
+    return reintentos
@@ -0,0 +1,97 @@
+"""
+Exportación en CSV de las inscripciones confirmadas de un evento.
+
+Las filas se leen con values_list (uniendo con el usuario en la misma consulta)
+por páginas de TAMANO_BLOQUE sobre la llave primaria (id > último id leído): con
+mysqlclient .iterator() trae igual todo el resultado a memoria, en cambio cada
+página es una consulta corta por el índice. El CSV se genera por bloques dentro
+de un StreamingHttpResponse, así la memoria no depende del tamaño del evento.
+"""
+import csv
+from datetime import datetime
+
+from django.utils import timezone
+
+from app_asistentes.models import AsistenteEvento
+from app_evaluadores.models import EvaluadorEvento
+from app_participantes.models import ParticipanteEvento
+
+TAMANO_BLOQUE = 2000
+
+_USUARIO = ['Documento', 'Nombre', 'Apellido', 'Correo', 'Teléfono']
+
+# rol -> (modelo, prefijo de la relación con el usuario, encabezados, campos propios)
+EXPORTACIONES = {
+    'asistentes': (
+        AsistenteEvento, 'asistente__usuario',
+        _USUARIO + ['Estado', 'Fecha de inscripción', 'Fecha de aprobación'],
+        ['asi_eve_estado', 'asi_eve_fecha_hora', 'asi_eve_fecha_aprobacion'],
+    ),
+    'participantes': (
+        ParticipanteEvento, 'participante__usuario',
+        _USUARIO + ['Estado', 'Fecha de inscripción', 'Fecha de aprobación', 'Proyecto', 'Líder', 'Nota', 'Puesto'],
+        ['par_eve_estado', 'par_eve_fecha_hora', 'par_eve_fecha_aprobacion',
+         'proyecto_grupal__nombre_proyecto', 'es_lider_proyecto', 'par_eve_valor', 'par_eve_puesto'],
+    ),
+    'evaluadores': (
+        EvaluadorEvento, 'evaluador__usuario',
+        _USUARIO + ['Estado', 'Fecha de inscripción', 'Fecha de aprobación', 'Categoría'],
+        ['eva_eve_estado', 'eva_eve_fecha_hora', 'eva_eve_fecha_aprobacion', 'categoria_evaluacion__cat_nombre'],
+    ),
+}
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+def escapar_formula(valor):
+    """Antepone ' a los textos que Excel ejecutaría como fórmula ("=...", "+...", "@...")"""
+    if isinstance(valor, str) and valor.startswith(('=', '+', '-', '@', '\t', '\r')):
+        return "'" + valor
+    return valor
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return 'Sí' if valor else 'No'
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).strftime('%Y-%m-%d %H:%M')
+    # Nombres y correos los escriben los usuarios
+    return escapar_formula(valor)
+
+
+def filas_inscripciones(evento, rol):
+    """Tuplas de las inscripciones confirmadas del evento, leídas por páginas de TAMANO_BLOQUE"""
+    modelo, usuario, _, campos = EXPORTACIONES[rol]
+    columnas = [f'{usuario}__{campo}' for campo in ('documento', 'first_name', 'last_name', 'email', 'telefono')]
+    inscripciones = modelo.objects.filter(evento=evento, confirmado=True)
+    ultimo = 0
+    while True:
+        pagina = list(
+            inscripciones.filter(id__gt=ultimo).order_by('id').values_list('id', *columnas, *campos)[:TAMANO_BLOQUE]
+        )
+        for fila in pagina:
+            yield fila[1:]
+        if len(pagina) < TAMANO_BLOQUE:
+            return
+        ultimo = pagina[-1][0]
+
+
+def csv_inscripciones(evento, rol):
+    """Genera el CSV por bloques de TAMANO_BLOQUE líneas, con BOM para que Excel reconozca UTF-8"""
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow(EXPORTACIONES[rol][2])
+    bloque = []
+    for fila in filas_inscripciones(evento, rol):
+        bloque.append(escritor.writerow([_texto(valor) for valor in fila]))
+        if len(bloque) >= TAMANO_BLOQUE:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
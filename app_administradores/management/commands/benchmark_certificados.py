@@ -0,0 +1,68 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+
+from app_eventos.models import ConfiguracionCertificado
+from app_administradores.pdf_paralelo import renderizar_pdfs
+
+
+class Command(BaseCommand):
+    help = 'Mide cuántos certificados PDF por segundo se generan con distintos números de procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--certificados', type=int, default=100, help='Certificados a generar en cada medición')
+        parser.add_argument('--procesos', type=str, default='',
+                            help='Números de procesos separados por coma (por defecto 1, 2, 4... hasta los núcleos)')
+        parser.add_argument('--bloque', type=int, default=8, help='Certificados por bloque enviado a cada proceso')
+        parser.add_argument('--plantilla', choices=['elegante', 'moderno', 'clasico'], default='elegante')
+
+    def _procesos(self, valor):
+        if valor:
+            try:
+                return [int(p) for p in valor.split(',') if p.strip()]
+            except ValueError:
+                raise CommandError('--procesos debe ser una lista de enteros, por ejemplo 1,2,4')
+        nucleos = os.cpu_count() or 1
+        procesos = [1]
+        while procesos[-1] * 2 <= nucleos:
+            procesos.append(procesos[-1] * 2)
+        if procesos[-1] != nucleos:
+            procesos.append(nucleos)
+        return procesos
+
+    def handle(self, *args, **options):
+        configuracion = ConfiguracionCertificado(
+            tipo='participacion', plantilla=options['plantilla'], titulo='Certificado de Participación',
+            cuerpo='Se certifica que **NOMBRE**, identificado con documento **DOCUMENTO**, participó en el evento **EVENTO**.',
+        )
+        trabajos = []
+        for i in range(options['certificados']):
+            cuerpo = configuracion.cuerpo.replace('**NOMBRE**', f'Participante {i}').replace(
+                '**DOCUMENTO**', str(1000000 + i)).replace('**EVENTO**', 'Congreso de prueba')
+            trabajos.append((i, render_to_string('app_administradores/certificado_plantilla.html', {
+                'configuracion': configuracion,
+                'cuerpo_renderizado': cuerpo,
+                'es_preview': False,
+            })))
+
+        self.stdout.write(f'{len(trabajos)} certificados, bloques de {options["bloque"]}, {os.cpu_count()} núcleo(s)')
+        base = None
+        for procesos in self._procesos(options['procesos']):
+            inicio = time.perf_counter()
+            generados = errores = 0
+            for _, pdf, error in renderizar_pdfs(trabajos, procesos=procesos, tamano_bloque=options['bloque']):
+                if error:
+                    errores += 1
+                else:
+                    generados += 1
+            segundos = time.perf_counter() - inicio
+            por_segundo = generados / segundos if segundos else 0
+            base = base or por_segundo
+            aceleracion = por_segundo / base if base else 0
+            self.stdout.write(
+                f'{procesos:>3} proceso(s): {segundos:7.2f} s  {por_segundo:7.1f} cert/s  x{aceleracion:.2f}'
+                + (f'  ({errores} con error)' if errores else '')
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark de certificados terminado'))
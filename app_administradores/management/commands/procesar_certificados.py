@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from app_administradores.certificados import tomar_siguiente_envio, procesar_envio, estado_envio, TAMANO_LOTE
+
+
+class Command(BaseCommand):
+    help = 'Genera y envía por correo los certificados encolados desde el panel del administrador'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true',
+                            help='Seguir esperando nuevos envíos en lugar de terminar al vaciar la cola')
+        parser.add_argument('--intervalo', type=float, default=5,
+                            help='Segundos de espera entre revisiones de la cola en modo continuo')
+        parser.add_argument('--tamano-lote', type=int, default=TAMANO_LOTE,
+                            help='Destinatarios que se generan y envían entre cada guardado de progreso')
+
+    def handle(self, *args, **options):
+        while True:
+            envio = tomar_siguiente_envio()
+            if envio is None:
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            procesar_envio(envio, options['tamano_lote'])
+            descripcion = f'Envío {envio.id} de "{envio.evento.eve_nombre}" ({envio.tipo})'
+            if envio.estado == 'completado':
+                resumen = estado_envio(envio)
+                self.stdout.write(self.style.SUCCESS(
+                    f'{descripcion}: {resumen["enviados"]} enviado(s), {resumen["fallidos"]} con error'
+                ))
+            elif envio.estado == 'en_proceso':
+                self.stderr.write(f'{descripcion}: lo retomó otro procesador, se detuvo este')
+            else:
+                self.stderr.write(f'{descripcion}: error - {envio.error}')
@@ -65,4 +65,71 @@ class CodigoInvitacionEvento(models.Model):
 
     class Meta:
         verbose_name = "Código de Invitación a Evento"
-        verbose_name_plural = "Códigos de Invitación a Eventos"
\ No newline at end of file
+        verbose_name_plural = "Códigos de Invitación a Eventos"
+
+class EnvioCertificados(models.Model):
+    """
+    Envío de certificados encolado desde las vistas. Cada destinatario es un
+    CertificadoDestinatario; lo procesa el comando procesar_certificados.
+    """
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En proceso'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    ]
+
+    evento = models.ForeignKey('app_eventos.Evento', on_delete=models.CASCADE, related_name='envios_certificados')
+    tipo = models.CharField(max_length=20)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    creado_por = models.ForeignKey(Usuario, null=True, blank=True, on_delete=models.SET_NULL)
+    # URL de la petición que encoló el envío, para resolver rutas relativas del PDF
+    base_url = models.CharField(max_length=500, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    # Lo actualiza el procesador tras cada certificado; si se detiene, otro retoma el envío
+    latido = models.DateTimeField(null=True, blank=True)
+    # Ficha del procesador que tiene el envío: al retomarlo otro, el anterior deja de enviar
+    procesador = models.CharField(max_length=32, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+        ]
+
+    def __str__(self):
+        return f"Envío {self.tipo} {self.evento.eve_nombre} - {self.get_estado_display()}"
+
+
+class CertificadoDestinatario(models.Model):
+    """Un certificado por enviar, con los datos ya resueltos al encolar"""
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('enviado', 'Enviado'),
+        ('error', 'Error'),
+    ]
+
+    envio = models.ForeignKey(EnvioCertificados, on_delete=models.CASCADE, related_name='destinatarios')
+    # id de la inscripción (AsistenteEvento, ParticipanteEvento o EvaluadorEvento según el tipo)
+    inscripcion_id = models.PositiveIntegerField()
+    nombre = models.CharField(max_length=300)
+    email = models.EmailField()
+    datos = models.JSONField(default=dict)
+    asunto = models.CharField(max_length=300)
+    mensaje = models.TextField()
+    archivo = models.CharField(max_length=200)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    intentos = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    fecha_envio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = (('envio', 'inscripcion_id'),)
+        indexes = [
+            models.Index(fields=['envio', 'estado']),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} <{self.email}> - {self.get_estado_display()}"
@@ -0,0 +1,77 @@
+"""
+Generación en paralelo de los PDFs de certificados con un pool de procesos.
+
+WeasyPrint ocupa un solo núcleo por documento, así que los certificados se
+reparten en bloques entre varios procesos y cada bloque se entrega en cuanto
+termina, para que el envío de correos empiece sin esperar a todo el lote.
+Un mismo pool (crear_pool) se reutiliza en todos los lotes de un envío para no
+arrancar los procesos en cada uno. Los procesos solo reciben HTML ya renderizado
+y devuelven los bytes del PDF: este módulo no importa Django y se puede cargar
+en un proceso nuevo.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from weasyprint import HTML
+
+
+def _renderizar_bloque(bloque, base_url):
+    """Retorna [(clave, pdf, error)] de un bloque de (clave, html)"""
+    resultados = []
+    for clave, html in bloque:
+        try:
+            resultados.append((clave, HTML(string=html, base_url=base_url).write_pdf(), None))
+        except Exception as e:
+            resultados.append((clave, None, str(e)))
+    return resultados
+
+
+def numero_procesos(procesos=None):
+    """Procesos a usar: el valor dado o uno por núcleo si es 0 o None"""
+    return procesos or os.cpu_count() or 1
+
+
+def _contexto():
+    # Los procesos nuevos no heredan los hilos ni las conexiones del servidor
+    metodos = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in metodos else 'spawn')
+
+
+def crear_pool(procesos=None):
+    """
+    Pool de procesos para reutilizar en varias llamadas a renderizar_pdfs (por
+    ejemplo, en todos los lotes de un envío). None si basta un solo proceso.
+    Quien lo crea debe cerrarlo con shutdown().
+    """
+    procesos = numero_procesos(procesos)
+    if procesos <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=procesos, mp_context=_contexto())
+
+
+def renderizar_pdfs(trabajos, base_url=None, procesos=None, tamano_bloque=8, pool=None):
+    """
+    Genera (clave, pdf, error) por cada (clave, html) de trabajos, en el orden en que terminan.
+    Con pool se usan sus procesos; sin él se crea uno para esta llamada, salvo con
+    un solo proceso o un solo bloque.
+    """
+    trabajos = list(trabajos)
+    bloques = [trabajos[i:i + tamano_bloque] for i in range(0, len(trabajos), max(tamano_bloque, 1))]
+    if pool is not None:
+        yield from _resultados(pool, bloques, base_url)
+        return
+    procesos = min(numero_procesos(procesos), len(bloques))
+    if procesos <= 1:
+        for bloque in bloques:
+            yield from _renderizar_bloque(bloque, base_url)
+        return
+
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=_contexto()) as pool:
+        yield from _resultados(pool, bloques, base_url)
+
+
+def _resultados(pool, bloques, base_url):
+    futuros = [pool.submit(_renderizar_bloque, bloque, base_url) for bloque in bloques]
+    for futuro in as_completed(futuros):
+        yield from futuro.result()
@@ -1,3 +1,151 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app_administradores.certificados import (
+    encolar_envio, procesar_envio, reintentar_envio, tomar_siguiente_envio,
+)
+from app_administradores.models import AdministradorEvento, EnvioCertificados
+from app_asistentes.models import Asistente, AsistenteEvento
+from app_eventos.models import ConfiguracionCertificado, Evento
+from app_participantes.models import Participante, ParticipanteEvento
+from app_usuarios.models import Usuario, Rol, RolUsuario
+
+
+class EstadisticasGeneralesTests(TestCase):
+    """Las estadísticas generales no deben hacer consultas por evento"""
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            username='admin_evento', email='admin@eventsoft.com', password='clave', documento='100'
+        )
+        rol = Rol.objects.create(nombre='administrador_evento')
+        RolUsuario.objects.create(usuario=self.usuario, rol=rol)
+        self.administrador = AdministradorEvento.objects.create(usuario=self.usuario)
+        self.client.force_login(self.usuario)
+        self.siguiente = 0
+
+    def crear_evento(self, estado='Aprobado'):
+        self.siguiente += 1
+        n = self.siguiente
+        evento = Evento.objects.create(
+            eve_nombre=f'Evento {n}', eve_descripcion='Descripción', eve_ciudad='Manizales',
+            eve_lugar='Auditorio', eve_fecha_inicio=date(2099, 1, 1), eve_fecha_fin=date(2099, 1, 2),
+            eve_estado=estado, eve_capacidad=50, eve_tienecosto='No', eve_administrador_fk=self.administrador,
+        )
+        asistente = Asistente.objects.create(usuario=Usuario.objects.create_user(
+            username=f'asistente{n}', email=f'asistente{n}@eventsoft.com', password='clave', documento=f'a{n}'
+        ))
+        AsistenteEvento.objects.create(
+            asistente=asistente, evento=evento, asi_eve_fecha_hora=timezone.now(), asi_eve_estado='Aprobado'
+        )
+        participante = Participante.objects.create(usuario=Usuario.objects.create_user(
+            username=f'participante{n}', email=f'participante{n}@eventsoft.com', password='clave', documento=f'p{n}'
+        ))
+        ParticipanteEvento.objects.create(
+            participante=participante, evento=evento, par_eve_fecha_hora=timezone.now(), par_eve_estado='Aprobado'
+        )
+        return evento
+
+    def consultas_estadisticas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('estadisticas_generales'))
+        self.assertEqual(respuesta.status_code, 200)
+        return len(consultas), respuesta
+
+    def test_numero_de_consultas_no_depende_de_los_eventos(self):
+        self.crear_evento()
+        consultas_un_evento, _ = self.consultas_estadisticas()
+
+        for estado in ['Aprobado', 'Pendiente', 'Finalizado'] * 5:
+            self.crear_evento(estado)
+        consultas_muchos_eventos, respuesta = self.consultas_estadisticas()
+
+        self.assertEqual(consultas_un_evento, consultas_muchos_eventos)
+        self.assertEqual(respuesta.context['total_eventos'], 16)
+        self.assertEqual(respuesta.context['total_participantes_aprobados'], 16)
+        self.assertEqual(respuesta.context['capacidad_utilizada'], 16)
+        self.assertEqual(respuesta.context['resumen']['Finalizado'], 5)
+
+
+@override_settings(CERTIFICADOS_PROCESOS=1)
+class EnvioCertificadosTests(TestCase):
+    """La cola de certificados reintenta solo los fallidos y no envía dos veces"""
+
+    def setUp(self):
+        administrador = AdministradorEvento.objects.create(usuario=Usuario.objects.create_user(
+            username='admin_evento', email='admin@eventsoft.com', password='clave', documento='100'
+        ))
+        self.evento = Evento.objects.create(
+            eve_nombre='Evento', eve_descripcion='Descripción', eve_ciudad='Manizales',
+            eve_lugar='Auditorio', eve_fecha_inicio=date(2099, 1, 1), eve_fecha_fin=date(2099, 1, 2),
+            eve_estado='Aprobado', eve_capacidad=50, eve_tienecosto='No', eve_administrador_fk=administrador,
+        )
+        ConfiguracionCertificado.objects.create(
+            evento=self.evento, tipo='participacion', titulo='Certificado', cuerpo='Certificamos a **NOMBRE**'
+        )
+
+    def encolar(self, cantidad):
+        return encolar_envio(self.evento, 'participacion', [
+            {
+                'clave': n, 'datos': {'NOMBRE': f'Persona {n}'}, 'email': f'persona{n}@eventsoft.com',
+                'asunto': 'Certificado', 'mensaje': 'Adjunto', 'archivo': f'certificado_{n}.pdf',
+            }
+            for n in range(cantidad)
+        ])
+
+    def destinatarios_enviados(self):
+        return sorted(destinatario for mensaje in mail.outbox for destinatario in mensaje.to)
+
+    def test_reintento_envia_solo_los_fallidos(self):
+        envio = self.encolar(3)
+        envio_original = EmailMessage.send
+
+        def fallar_persona_1(mensaje, *args, **kwargs):
+            if mensaje.to == ['persona1@eventsoft.com']:
+                raise ConnectionError('servidor de correo caído')
+            return envio_original(mensaje, *args, **kwargs)
+
+        with mock.patch.object(EmailMessage, 'send', autospec=True, side_effect=fallar_persona_1):
+            procesar_envio(tomar_siguiente_envio(), tamano_lote=2)
+        envio.refresh_from_db()
+        self.assertEqual(envio.estado, 'completado')
+        self.assertEqual(envio.destinatarios.get(estado='error').email, 'persona1@eventsoft.com')
+        self.assertEqual(len(mail.outbox), 2)
+
+        self.assertEqual(reintentar_envio(envio), 1)
+        procesar_envio(tomar_siguiente_envio())
+        envio.refresh_from_db()
+        self.assertEqual(envio.estado, 'completado')
+        self.assertEqual(self.destinatarios_enviados(), [f'persona{n}@eventsoft.com' for n in range(3)])
+        self.assertEqual(envio.destinatarios.get(email='persona1@eventsoft.com').intentos, 2)
+
+    def test_procesador_que_pierde_el_envio_se_detiene(self):
+        self.encolar(4)
+        anterior = tomar_siguiente_envio()
+        envio_original = EmailMessage.send
+        siguiente = []
+
+        def retomar_tras_el_primero(mensaje, *args, **kwargs):
+            resultado = envio_original(mensaje, *args, **kwargs)
+            if not siguiente:
+                # El procesador parece abandonado y otro retoma el envío
+                EnvioCertificados.objects.filter(pk=anterior.pk).update(latido=timezone.now() - timedelta(hours=1))
+                siguiente.append(tomar_siguiente_envio())
+            return resultado
+
+        with mock.patch.object(EmailMessage, 'send', autospec=True, side_effect=retomar_tras_el_primero):
+            procesar_envio(anterior, tamano_lote=4)
+        self.assertEqual(len(mail.outbox), 1)
+
+        procesar_envio(siguiente[0])
+        siguiente[0].refresh_from_db()
+        self.assertEqual(siguiente[0].estado, 'completado')
+        self.assertEqual(self.destinatarios_enviados(), [f'persona{n}@eventsoft.com' for n in range(4)])
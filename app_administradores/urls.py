@@ -18,6 +18,7 @@ urlpatterns = [
     path('cerrar-inscripciones-participantes/<int:eve_id>/', views.cerrar_inscripcion_participantes, name='cerrar_inscripcion_participantes'),
     path('abrir-inscripciones-participantes/<int:eve_id>/', views.abrir_inscripcion_participantes, name='abrir_inscripcion_participantes'),
     path('ver-inscripciones/<int:eve_id>/', views.ver_inscripciones, name='ver_inscripciones_evento'),
+    path('exportar-inscripciones/<int:eve_id>/<str:rol>/', views.exportar_inscripciones, name='exportar_inscripciones'),
     path('ver-asistentes/<int:eve_id>/', views.gestion_asistentes, name='ver_asistentes_evento'),
     path('detalle-asistente/<int:eve_id>/<int:asistente_id>/', views.detalle_asistente, name='detalle_asistente_evento'),
     path('ver-participantes/<int:eve_id>/', views.gestion_participantes, name='ver_participantes_evento'),
@@ -30,7 +31,12 @@ urlpatterns = [
     path('agregar-item-administrador/<int:eve_id>/', views.agregar_item_administrador, name='agregar_item_administrador_evento'),
     path('editar-item-administrador/<int:criterio_id>/', views.editar_item_administrador, name='editar_item_administrador_evento'),
     path('eliminar-item-administrador/<int:criterio_id>/', views.eliminar_item_administrador, name='eliminar_item_administrador_evento'),
+    path('estado-recalculo-administrador/<int:eve_id>/', views.estado_recalculo_administrador, name='estado_recalculo_administrador'),
     path('tabla-posiciones-administrador/<int:eve_id>/', views.ver_tabla_posiciones, name='tabla_posiciones_administrador'),
+    path('posiciones-en-vivo/<int:eve_id>/', views.posiciones_en_vivo, name='posiciones_en_vivo_administrador'),
+    path('posiciones-en-vivo/<int:eve_id>/stream/', views.posiciones_en_vivo_stream, name='posiciones_en_vivo_stream'),
+    path('simulador-pesos/<int:eve_id>/', views.simulador_pesos, name='simulador_pesos_administrador'),
+    path('analitica-evaluadores/<int:eve_id>/', views.analitica_evaluadores, name='analitica_evaluadores_administrador'),
     path('informacion-detallada-administrador/<int:eve_id>/', views.info_detallada_admin, name='informacion_detallada_administrador_evento'),
     
     # Códigos de invitación para eventos
@@ -54,5 +60,9 @@ urlpatterns = [
     path('certificados/<int:eve_id>/<str:tipo>/previsualizar/', views.previsualizar_certificado, name='previsualizar_certificado'),
     # URL específica para premiación debe ir antes que la URL general
     path('certificados/<int:eve_id>/premiacion/enviar/', views.enviar_certificados_premiacion, name='enviar_certificados_premiacion'),
+    path('certificados/<int:eve_id>/premiacion/clasificacion.csv', views.exportar_clasificacion_final, name='exportar_clasificacion_final'),
     path('certificados/<int:eve_id>/<str:tipo>/enviar/', views.enviar_certificados, name='enviar_certificados'),
+    path('certificados/envios/<int:envio_id>/', views.progreso_envio_certificados, name='progreso_envio_certificados'),
+    path('certificados/envios/<int:envio_id>/estado/', views.estado_envio_certificados, name='estado_envio_certificados'),
+    path('certificados/envios/<int:envio_id>/reintentar/', views.reintentar_envio_certificados, name='reintentar_envio_certificados'),
 ]
\ No newline at end of file
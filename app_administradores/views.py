@@ -1,27 +1,40 @@
 from django.http import HttpResponse
 from weasyprint import HTML
-from django.db.models import Q
+from django.db.models import Q, Sum
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.urls import reverse
 from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse, FileResponse
+from django.http import JsonResponse, FileResponse, StreamingHttpResponse
 from django.core.files.base import ContentFile
 from django.utils.crypto import get_random_string
-from django.conf import settings
 from django.db import transaction
-import base64
 import os
 import mimetypes
+import time
 
-from .models import AdministradorEvento, CodigoInvitacionAdminEvento, CodigoInvitacionEvento
+from .models import AdministradorEvento, CodigoInvitacionAdminEvento, CodigoInvitacionEvento, EnvioCertificados
 from app_eventos.models import Evento
-from app_eventos.models import EventoCategoria
+from app_eventos.models import EventoCategoria, EventoContadores
+# La vista estadisticas_evento usa el mismo nombre que el servicio
+from app_eventos.estadisticas import estadisticas_evento as calcular_estadisticas_evento
+from app_eventos.series import serie_evento
 from app_areas.models import Area, Categoria
 from app_participantes.models import ParticipanteEvento, Participante, ProyectoGrupal
 from app_asistentes.models import AsistenteEvento
-from app_evaluadores.models import Criterio, Calificacion, CalificacionProyecto
+from app_evaluadores.models import Criterio
 from app_evaluadores.models import EvaluadorEvento, Evaluador
+from app_evaluadores.posiciones import obtener_tabla_posiciones, obtener_posiciones_por_categoria
+from app_evaluadores.recalculos import encolar_recalculo, estado_recalculo
+from app_evaluadores.en_vivo import flujo_posiciones
+from app_evaluadores.matriz import construir_matriz_calificaciones
+from app_evaluadores.simulador import obtener_simulador
+from app_evaluadores.analitica import obtener_analitica
+from app_evaluadores.clasificacion import congelar_clasificacion, clasificacion_congelada, escribir_clasificacion_csv
+from .exportaciones import EXPORTACIONES, csv_inscripciones
+from .certificados import (
+    imagenes_certificado, encolar_envio, envios_recientes, estado_envio, reintentar_envio,
+)
 from app_usuarios.models import Usuario
 from app_asistentes.models import Asistente, AsistenteEvento
 from app_participantes.models import Participante, ParticipanteEvento
@@ -45,7 +58,6 @@ from django.template import Context, Template
 from app_eventos.models import ConfiguracionCertificado
 from django.contrib import messages
 from django.core.files.images import get_image_dimensions
-from django.conf import settings
 from django.utils import timezone
 import os
 
@@ -463,6 +475,21 @@ def ver_inscripciones(request, eve_id):
     evento = get_object_or_404(Evento, eve_id=eve_id)
     return render(request, 'ver_inscripciones.html', {'evento': evento})
 
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def exportar_inscripciones(request, eve_id, rol):
+    """Descarga en CSV, en flujo, las inscripciones confirmadas de asistentes, participantes o evaluadores"""
+    evento = get_object_or_404(Evento, eve_id=eve_id)
+    if evento.eve_administrador_fk != request.user.administrador:
+        messages.error(request, "No tienes permisos para acceder a este evento.")
+        return redirect('listar_eventos')
+    if rol not in EXPORTACIONES:
+        messages.error(request, "Tipo de exportación no válido.")
+        return redirect('ver_inscripciones_evento', eve_id=eve_id)
+    response = StreamingHttpResponse(csv_inscripciones(evento, rol), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{rol}_evento_{evento.eve_id}.csv"'
+    return response
+
 @login_required
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def gestion_asistentes(request, eve_id):
@@ -946,10 +973,11 @@ def estadisticas_evento(request, eve_id):
     if evento.eve_estado.lower() != 'aprobado':
         messages.error(request, "Solo puedes ver estadísticas de eventos aprobados.")
         return redirect('listar_eventos')
-    asistentes_aprobados = AsistenteEvento.objects.filter(evento=evento, asi_eve_estado='Aprobado').count()
-    total_asistentes = AsistenteEvento.objects.filter(evento=evento).count()  
-    total_participantes = ParticipanteEvento.objects.filter(evento=evento).count()
-    participantes_aprobados = ParticipanteEvento.objects.filter(evento=evento, par_eve_estado='Aprobado').count()
+    conteos = calcular_estadisticas_evento(evento)
+    asistentes_aprobados = conteos['asistentes']['aprobados']
+    total_asistentes = conteos['asistentes']['total']
+    total_participantes = conteos['participantes']['total']
+    participantes_aprobados = conteos['participantes']['aprobados']
     capacidad_total = evento.eve_capacidad + asistentes_aprobados
     if capacidad_total > 0:
         porcentaje_ocupacion = round((asistentes_aprobados / capacidad_total) * 100, 2)
@@ -966,6 +994,7 @@ def estadisticas_evento(request, eve_id):
         'capacidad_total': capacidad_total,
         'porcentaje_ocupacion': porcentaje_ocupacion,
         'porcentaje_disponible': porcentaje_disponible,
+        'serie_inscripciones': serie_evento(evento),
     }
     return render(request, 'estadisticas_evento.html', context)
 
@@ -974,8 +1003,17 @@ def estadisticas_evento(request, eve_id):
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def estadisticas_generales(request):
     administrador = request.user.administrador  
-    eventos = Evento.objects.filter(eve_administrador_fk=administrador)
-    total_eventos = eventos.count()
+    # Una consulta para los eventos y otra para sus contadores de aprobados,
+    # sin importar cuántos eventos ni cuántos inscritos haya
+    eventos = list(Evento.objects.filter(eve_administrador_fk=administrador))
+    aprobados = {
+        (evento_id, rol): total
+        for evento_id, rol, total in EventoContadores.objects.filter(
+            evento__eve_administrador_fk=administrador, estado='Aprobado',
+            rol__in=['asistente', 'participante'],
+        ).values('evento', 'rol').annotate(total=Sum('cantidad')).values_list('evento', 'rol', 'total')
+    }
+    total_eventos = len(eventos)
 
     resumen = {
         'Aprobado': 0,
@@ -993,13 +1031,8 @@ def estadisticas_generales(request):
         estado = evento.eve_estado
         resumen[estado] = resumen.get(estado, 0) + 1
 
-        asistentes_aprobados = AsistenteEvento.objects.filter(
-            evento=evento, asi_eve_estado='Aprobado'
-        ).count()
-
-        participantes_aprobados = ParticipanteEvento.objects.filter(
-            evento=evento, par_eve_estado='Aprobado'
-        ).count()
+        asistentes_aprobados = aprobados.get((evento.eve_id, 'asistente'), 0)
+        participantes_aprobados = aprobados.get((evento.eve_id, 'participante'), 0)
 
         total_participantes_aprobados += participantes_aprobados
 
@@ -1063,10 +1096,19 @@ def gestion_item_administrador(request, eve_id):
         'evento': evento,
         'criterios': criterios,
         'peso_total_actual': peso_total_actual,
+        'recalculo': estado_recalculo(evento),
     }
     return render(request, 'gestion_items.html', context)
 
 
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def estado_recalculo_administrador(request, eve_id):
+    """Progreso del recálculo de notas del evento (consultado por la barra de progreso)"""
+    evento = get_object_or_404(Evento, pk=eve_id)
+    return JsonResponse(estado_recalculo(evento))
+
+
 @login_required
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def agregar_item_administrador(request, eve_id):
@@ -1093,7 +1135,8 @@ def agregar_item_administrador(request, eve_id):
             cri_evento_fk=evento
         )
         nuevo_criterio.save()
-        messages.success(request, 'Ítem agregado correctamente.')
+        encolar_recalculo(evento)
+        messages.success(request, 'Ítem agregado correctamente. Las notas se recalcularán en segundo plano.')
         return redirect('gestion_item_administrador_evento', eve_id=eve_id)
     criterios = Criterio.objects.filter(cri_evento_fk=evento)
     peso_total_actual = sum(c.cri_peso for c in criterios if c.cri_peso is not None)
@@ -1129,9 +1172,14 @@ def editar_item_administrador(request, criterio_id):
             messages.error(request, 'El peso total no puede exceder el 100%.')
             return redirect('gestion_item_administrador_evento', eve_id=criterio.cri_evento_fk.pk)
         criterio.cri_descripcion = descripcion
+        peso_cambio = criterio.cri_peso != peso
         criterio.cri_peso = peso
         criterio.save()
-        messages.success(request, 'Ítem editado correctamente.')
+        if peso_cambio:
+            encolar_recalculo(evento)
+            messages.success(request, 'Ítem editado correctamente. Las notas se recalcularán en segundo plano.')
+        else:
+            messages.success(request, 'Ítem editado correctamente.')
         return redirect('gestion_item_administrador_evento', eve_id=criterio.cri_evento_fk.pk)
     context = {
         'criterio': criterio,
@@ -1145,10 +1193,11 @@ def editar_item_administrador(request, criterio_id):
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def eliminar_item_administrador(request, criterio_id):
     criterio = get_object_or_404(Criterio, pk=criterio_id)
-    evento_id = criterio.cri_evento_fk.eve_id
+    evento = criterio.cri_evento_fk
     criterio.delete()
-    messages.success(request, 'Ítem eliminado correctamente.')
-    return redirect('gestion_item_administrador_evento', eve_id=evento_id)
+    encolar_recalculo(evento)
+    messages.success(request, 'Ítem eliminado correctamente. Las notas se recalcularán en segundo plano.')
+    return redirect('gestion_item_administrador_evento', eve_id=evento.eve_id)
 
 
 @login_required
@@ -1159,92 +1208,46 @@ def ver_tabla_posiciones(request, eve_id):
         messages.error(request, "Solo puedes acceder a esta función si el evento está aprobado.")
         return redirect('listar_eventos')
     
-    criterios = Criterio.objects.filter(cri_evento_fk=evento)
-    peso_total = sum(c.cri_peso for c in criterios) or 1
-    
-    # Separar entre proyectos grupales e individuales
-    participantes_evento = ParticipanteEvento.objects.filter(
-        evento=evento,
-        par_eve_estado='Aprobado'
-    ).select_related('participante', 'proyecto_grupal')
-    
-    # Proyectos grupales únicos
-    proyectos_dict = {}
-    participantes_individuales = []
-    
-    for pe in participantes_evento:
-        if pe.proyecto_grupal:
-            proyecto = pe.proyecto_grupal
-            if proyecto.id not in proyectos_dict:
-                proyectos_dict[proyecto.id] = proyecto
-        else:
-            participantes_individuales.append(pe)
-    
-    # Calcular posiciones de proyectos grupales
-    posiciones_proyectos = []
-    for proyecto_id, proyecto in proyectos_dict.items():
-        # Obtener calificaciones del proyecto
-        calificaciones_proyecto = CalificacionProyecto.objects.select_related('criterio').filter(
-            proyecto=proyecto,
-            criterio__cri_evento_fk=evento
-        )
-        evaluadores = set(c.evaluador_id for c in calificaciones_proyecto)
-        num_evaluadores = len(evaluadores)
-        
-        if num_evaluadores > 0:
-            puntaje_ponderado = sum(
-                c.cal_valor * c.criterio.cri_peso for c in calificaciones_proyecto
-            ) / (peso_total * num_evaluadores)
-        else:
-            puntaje_ponderado = 0
-        
-        integrantes = proyecto.obtener_integrantes()
-        posiciones_proyectos.append({
-            'proyecto': proyecto,
-            'integrantes': integrantes,
-            'puntaje': round(puntaje_ponderado, 2)
-        })
-    
-    posiciones_proyectos.sort(key=lambda x: x['puntaje'], reverse=True)
-    
-    # Calcular posiciones de participantes individuales
-    posiciones_individuales = []
-    for pe in participantes_individuales:
-        participante = pe.participante
-        calificaciones = Calificacion.objects.select_related('criterio').filter(
-            participante=participante,
-            criterio__cri_evento_fk=evento
-        )
-        evaluadores = set(c.evaluador_id for c in calificaciones)
-        num_evaluadores = len(evaluadores)
-        
-        if num_evaluadores > 0:
-            puntaje_ponderado = sum(
-                c.cal_valor * c.criterio.cri_peso for c in calificaciones
-            ) / (peso_total * num_evaluadores)
-        else:
-            puntaje_ponderado = 0
-        
-        posiciones_individuales.append({
-            'participante': participante,
-            'participante_evento': pe,
-            'puntaje': round(puntaje_ponderado, 2)
-        })
-    
-    posiciones_individuales.sort(key=lambda x: x['puntaje'], reverse=True)
-    
     return render(request, 'tabla_posiciones.html', {
         'evento': evento,
-        'posiciones_proyectos': posiciones_proyectos,
-        'posiciones_individuales': posiciones_individuales,
-        'tiene_proyectos': len(posiciones_proyectos) > 0,
-        'tiene_individuales': len(posiciones_individuales) > 0,
+        **obtener_tabla_posiciones(evento),
+        'posiciones_por_categoria': (
+            obtener_posiciones_por_categoria(evento) if evento.eve_es_multidisciplinario == 'Si' else []
+        ),
     })
 
 
 @login_required
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
-def info_detallada_admin(request, eve_id):
+def posiciones_en_vivo(request, eve_id):
+    """Pantalla de posiciones para proyector, actualizada por SSE sin recargar"""
+    evento = get_object_or_404(Evento, pk=eve_id)
+    if evento.eve_administrador_fk != request.user.administrador:
+        messages.error(request, "No tienes permisos para acceder a este evento.")
+        return redirect('listar_eventos')
+    return render(request, 'posiciones_en_vivo.html', {'evento': evento})
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+async def posiciones_en_vivo_stream(request, eve_id):
+    """
+    Flujo SSE de la tabla de posiciones: primero la tabla completa y luego solo
+    los cambios de puesto y puntaje. Vista asíncrona: servida por ASGI, cada
+    conexión abierta es una corrutina en espera y no ocupa un worker.
+    """
+    usuario = await request.auser()
+    if not await Evento.objects.filter(pk=eve_id, eve_administrador_fk__usuario=usuario).aexists():
+        return HttpResponse(status=403)
+    response = StreamingHttpResponse(flujo_posiciones(eve_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def simulador_pesos(request, eve_id):
     administrador = request.user.administrador
     evento = get_object_or_404(Evento, pk=eve_id)
     if evento.eve_administrador_fk != administrador:
@@ -1253,39 +1256,96 @@ def info_detallada_admin(request, eve_id):
     if evento.eve_estado.lower() != 'aprobado':
         messages.error(request, "Solo puedes acceder a esta función si el evento está aprobado.")
         return redirect('listar_eventos')
-    criterios = Criterio.objects.filter(cri_evento_fk=evento)
-    participantes_evento = ParticipanteEvento.objects.filter(
-        evento=evento,
-        par_eve_estado='Aprobado'
-    ).select_related('participante')
-    participantes_info = []
-    for pe in participantes_evento:
-        participante = pe.participante
-        calificaciones = Calificacion.objects.select_related('criterio').filter(
-            participante=participante,
-            criterio__cri_evento_fk=evento
-        )
-        evaluadores = {c.evaluador_id for c in calificaciones}
-        num_evaluadores = len(evaluadores)
-        criterios_evaluados = {c.criterio_id for c in calificaciones}
-        total_criterios = criterios.count()
-        if num_evaluadores > 0:
-            total = sum([
-                (c.cal_valor * c.criterio.cri_peso) / 100 for c in calificaciones
-            ])
-            promedio_ponderado = round(total / num_evaluadores, 2)
+    simulador = obtener_simulador(evento)
+    if not simulador.criterios:
+        messages.warning(request, "Este evento aún no tiene criterios definidos.")
+        return redirect('gestion_item_administrador_evento', eve_id=eve_id)
+
+    datos = request.POST if request.method == 'POST' else {}
+    pesos = []
+    for criterio in simulador.criterios:
+        try:
+            peso = float(datos.get(f"peso_{criterio['id']}", criterio['peso']))
+        except (TypeError, ValueError):
+            messages.error(request, f"El peso de '{criterio['descripcion']}' debe ser un número válido.")
+            return redirect('simulador_pesos_administrador', eve_id=eve_id)
+        if peso < 0:
+            messages.error(request, f"El peso de '{criterio['descripcion']}' no puede ser negativo.")
+            return redirect('simulador_pesos_administrador', eve_id=eve_id)
+        pesos.append(peso)
+    peso_total = sum(pesos)
+
+    if request.POST.get('accion') == 'aplicar':
+        if peso_total > 100:
+            messages.error(request, 'El peso total no puede exceder el 100%.')
+            return redirect('simulador_pesos_administrador', eve_id=eve_id)
+        nuevos = {criterio['id']: peso for criterio, peso in zip(simulador.criterios, pesos) if criterio['peso'] != peso}
+        if nuevos:
+            with transaction.atomic():
+                for criterio in Criterio.objects.filter(cri_evento_fk=evento, cri_id__in=nuevos):
+                    criterio.cri_peso = nuevos[criterio.cri_id]
+                    criterio.save(update_fields=['cri_peso'])
+                encolar_recalculo(evento)
+            messages.success(request, 'Pesos aplicados correctamente. Las notas se recalcularán en segundo plano.')
         else:
-            promedio_ponderado = None
-        participantes_info.append({
-            'participante': participante,
-            'evaluados': len(criterios_evaluados),
-            'total_criterios': total_criterios,
-            'calificaciones': calificaciones,
-            'promedio_ponderado': promedio_ponderado,
-        })
+            messages.info(request, 'Los pesos no cambiaron.')
+        return redirect('gestion_item_administrador_evento', eve_id=eve_id)
+
+    inicio = time.perf_counter()
+    resultado = simulador.simular(pesos) if peso_total > 0 else {'proyectos': [], 'individuales': []}
     context = {
         'evento': evento,
-        'criterios': criterios,
+        'criterios': [{**criterio, 'propuesto': peso} for criterio, peso in zip(simulador.criterios, pesos)],
+        'peso_total': peso_total,
+        'posiciones_proyectos': resultado['proyectos'],
+        'posiciones_individuales': resultado['individuales'],
+        'tiempo_ms': round((time.perf_counter() - inicio) * 1000, 1),
+    }
+    return render(request, 'simulador_pesos.html', context)
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def analitica_evaluadores(request, eve_id):
+    administrador = request.user.administrador
+    evento = get_object_or_404(Evento, pk=eve_id)
+    if evento.eve_administrador_fk != administrador:
+        messages.error(request, "No tienes permisos para acceder a este evento.")
+        return redirect('listar_eventos')
+    if evento.eve_estado.lower() != 'aprobado':
+        messages.error(request, "Solo puedes acceder a esta función si el evento está aprobado.")
+        return redirect('listar_eventos')
+    return render(request, 'analitica_evaluadores.html', {
+        'evento': evento,
+        **obtener_analitica(evento),
+    })
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def info_detallada_admin(request, eve_id):
+    administrador = request.user.administrador
+    evento = get_object_or_404(Evento, pk=eve_id)
+    if evento.eve_administrador_fk != administrador:
+        messages.error(request, "No tienes permisos para acceder a este evento.")
+        return redirect('listar_eventos')
+    if evento.eve_estado.lower() != 'aprobado':
+        messages.error(request, "Solo puedes acceder a esta función si el evento está aprobado.")
+        return redirect('listar_eventos')
+    matriz = construir_matriz_calificaciones(evento)
+    if request.GET.get('formato') == 'csv':
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="calificaciones_evento_{evento.eve_id}.csv"'
+        response.write('\ufeff')
+        matriz.escribir_csv(response)
+        return response
+    participantes_info = [
+        {'participante': participante, 'total_criterios': len(matriz.criterios), **matriz.resumen(participante['id'])}
+        for participante in matriz.participantes
+    ]
+    context = {
+        'evento': evento,
+        'criterios': matriz.criterios,
         'participantes_info': participantes_info
     }
     return render(request, 'info_detallada_admin.html', context)
@@ -1490,39 +1550,6 @@ def eliminar_archivo_evento(request, eve_id):
     return redirect('gestionar_archivos_evento', eve_id=eve_id)
 
 
-# ===============================
-# FUNCIONES HELPER
-# ===============================
-
-def imagen_to_base64(imagen_field):
-    """Convierte un campo de imagen de Django a base64 para usar en PDFs"""
-    if imagen_field and hasattr(imagen_field, 'path'):
-        try:
-            with open(imagen_field.path, 'rb') as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-                # Detectar el formato de la imagen
-                mime_type, _ = mimetypes.guess_type(imagen_field.path)
-                if mime_type:
-                    format_name = mime_type.split('/')[1]
-                else:
-                    # Fallback basado en la extensión
-                    ext = os.path.splitext(imagen_field.path)[1].lower()
-                    if ext in ['.jpg', '.jpeg']:
-                        format_name = 'jpeg'
-                    elif ext == '.png':
-                        format_name = 'png'
-                    elif ext == '.gif':
-                        format_name = 'gif'
-                    else:
-                        format_name = 'jpeg'  # default
-                
-                return encoded_string, format_name
-        except Exception as e:
-            print(f"Error al convertir imagen a base64: {e}")
-            return None, None
-    return None, None
-
-
 # ===============================
 # GESTIÓN DE CERTIFICADOS
 # ===============================
@@ -1658,20 +1685,13 @@ def previsualizar_certificado(request, eve_id, tipo):
         cuerpo_con_datos = cuerpo_con_datos.replace(f'**{clave}**', valor)
     
     if request.GET.get('formato') == 'pdf':
-        # Convertir imágenes a base64 para el PDF
-        logo_base64, logo_format = imagen_to_base64(configuracion.logo)
-        firma_base64, firma_format = imagen_to_base64(configuracion.firma)
-        
         # Generar PDF de previsualización
         html_content = render_to_string('app_administradores/certificado_plantilla.html', {
             'configuracion': configuracion,
             'cuerpo_renderizado': cuerpo_con_datos,
             'datos': datos_ejemplo,
             'es_preview': True,
-            'logo_base64': logo_base64,
-            'logo_format': logo_format,
-            'firma_base64': firma_base64,
-            'firma_format': firma_format,
+            **imagenes_certificado(configuracion),
         })
         
         pdf_file = HTML(string=html_content, base_url=request.build_absolute_uri()).write_pdf()
@@ -1733,80 +1753,44 @@ def enviar_certificados(request, eve_id, tipo):
         if not destinatarios_seleccionados:
             messages.error(request, "Debe seleccionar al menos un destinatario.")
         else:
-            # Procesar envío de certificados
-            enviados = 0
-            errores = []
-            
-            for dest_id in destinatarios_seleccionados:
-                try:
-                    # Buscar destinatario según el tipo
-                    if tipo == 'asistencia':
-                        dest_obj = AsistenteEvento.objects.get(id=dest_id)
-                        usuario = dest_obj.asistente.usuario
-                    elif tipo == 'participacion':
-                        dest_obj = ParticipanteEvento.objects.get(id=dest_id)
-                        usuario = dest_obj.participante.usuario
-                    elif tipo == 'evaluador':
-                        dest_obj = EvaluadorEvento.objects.get(id=dest_id)
-                        usuario = dest_obj.evaluador.usuario
-                    
-                    # Preparar datos del certificado
-                    datos_certificado = {
-                        'NOMBRE': f'{usuario.first_name} {usuario.last_name}',
-                        'DOCUMENTO': usuario.documento,
-                        'EVENTO': evento.eve_nombre,
-                        'FECHA': evento.eve_fecha_inicio.strftime('%d de %B de %Y'),
-                        'CIUDAD': evento.eve_ciudad,
-                        'LUGAR': evento.eve_lugar,
-                    }
-                    
-                    # Renderizar el cuerpo del certificado
-                    cuerpo_con_datos = configuracion.cuerpo
-                    for clave, valor in datos_certificado.items():
-                        cuerpo_con_datos = cuerpo_con_datos.replace(f'**{clave}**', valor)
-                    
-                    # Convertir imágenes a base64 para el PDF
-                    logo_base64, logo_format = imagen_to_base64(configuracion.logo)
-                    firma_base64, firma_format = imagen_to_base64(configuracion.firma)
-                    
-                    # Generar PDF del certificado
-                    html_content = render_to_string('app_administradores/certificado_plantilla.html', {
-                        'configuracion': configuracion,
-                        'cuerpo_renderizado': cuerpo_con_datos,
-                        'datos': datos_certificado,
-                        'es_preview': False,
-                        'logo_base64': logo_base64,
-                        'logo_format': logo_format,
-                        'firma_base64': firma_base64,
-                        'firma_format': firma_format,
-                    })
-                    
-                    pdf_file = HTML(string=html_content, base_url=request.build_absolute_uri()).write_pdf()
-                    
-                    # Enviar por correo electrónico
-                    email = EmailMessage(
-                        subject=f'Certificado de {tipo.title()} - {evento.eve_nombre}',
-                        body=f'Estimado/a {datos_certificado["NOMBRE"]},\n\nAdjuntamos su certificado de {tipo} del evento "{evento.eve_nombre}".\n\nSaludos cordiales.',
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        to=[usuario.email],
-                    )
-                    
-                    filename = f'certificado_{tipo}_{usuario.documento}.pdf'
-                    email.attach(filename, pdf_file, 'application/pdf')
-                    email.send()
-                    
-                    enviados += 1
-                    
-                except Exception as e:
-                    errores.append(f'{usuario.email}: {str(e)}')
-            
-            if enviados > 0:
-                messages.success(request, f"Se enviaron {enviados} certificados correctamente.")
-            
-            if errores:
-                messages.warning(request, f"Errores en el envío: {', '.join(errores)}")
-            
-            return redirect('enviar_certificados', eve_id=eve_id, tipo=tipo)
+            # Una sola consulta para todos los seleccionados, limitada a los destinatarios válidos del evento
+            por_id = destinatarios.in_bulk(destinatarios_seleccionados)
+            lote = []
+            for dest_obj in por_id.values():
+                if tipo == 'asistencia':
+                    usuario = dest_obj.asistente.usuario
+                elif tipo == 'participacion':
+                    usuario = dest_obj.participante.usuario
+                else:
+                    usuario = dest_obj.evaluador.usuario
+
+                # Preparar datos del certificado
+                datos_certificado = {
+                    'NOMBRE': f'{usuario.first_name} {usuario.last_name}',
+                    'DOCUMENTO': usuario.documento,
+                    'EVENTO': evento.eve_nombre,
+                    'FECHA': evento.eve_fecha_inicio.strftime('%d de %B de %Y'),
+                    'CIUDAD': evento.eve_ciudad,
+                    'LUGAR': evento.eve_lugar,
+                }
+                lote.append({
+                    'clave': dest_obj.id,
+                    'datos': datos_certificado,
+                    'email': usuario.email,
+                    'asunto': f'Certificado de {tipo.title()} - {evento.eve_nombre}',
+                    'mensaje': f'Estimado/a {datos_certificado["NOMBRE"]},\n\nAdjuntamos su certificado de {tipo} del evento "{evento.eve_nombre}".\n\nSaludos cordiales.',
+                    'archivo': f'certificado_{tipo}_{usuario.documento}.pdf',
+                })
+
+            faltantes = len(set(destinatarios_seleccionados)) - len(por_id)
+            if faltantes:
+                messages.warning(request, f"{faltantes} destinatario(s) no válidos para este certificado no se incluyeron.")
+            if not lote:
+                return redirect('enviar_certificados', eve_id=eve_id, tipo=tipo)
+
+            envio = encolar_envio(evento, tipo, lote, request.user, request.build_absolute_uri())
+            messages.success(request, f"Se encolaron {len(lote)} certificados para envío. Puedes seguir el progreso aquí o salir de esta página.")
+            return redirect('progreso_envio_certificados', envio_id=envio.id)
     
     # Verificar advertencias para mostrar en el template
     advertencias = []
@@ -1820,7 +1804,8 @@ def enviar_certificados(request, eve_id, tipo):
         'tipo': tipo,
         'configuracion': configuracion,
         'destinatarios': destinatarios,
-        'advertencias': advertencias
+        'advertencias': advertencias,
+        'envios': envios_recientes(evento, tipo),
     })
 
 
@@ -1842,120 +1827,89 @@ def enviar_certificados_premiacion(request, eve_id):
         messages.error(request, "Debe configurar el certificado de premiación primero.")
         return redirect('configurar_certificado', eve_id=eve_id, tipo='premiacion')
     
-    # Obtener participantes con calificación final usando par_eve_valor
-    participantes_con_puntuacion = []
-    
-    # Obtener todos los participantes confirmados del evento que tienen calificación
-    participantes_evento = ParticipanteEvento.objects.filter(
-        evento=evento, 
-        confirmado=True,
-        par_eve_estado='Aprobado',
-        par_eve_valor__isnull=False
-    ).select_related('participante__usuario').order_by('-par_eve_valor')
-    
-    for participante_evento in participantes_evento:
-        participantes_con_puntuacion.append({
-            'id': participante_evento.id,
-            'participante_evento': participante_evento,
-            'participante': participante_evento.participante,
-            'nombre_completo': f'{participante_evento.participante.usuario.first_name} {participante_evento.participante.usuario.last_name}',
-            'documento': participante_evento.participante.usuario.documento,
-            'email': participante_evento.participante.usuario.email,
-            'estado': participante_evento.par_eve_estado,
-            'puntuacion_total': participante_evento.par_eve_valor
-        })
-    
-    # Asignar puestos considerando empates basados en par_eve_valor
-    participantes_ranking = []
-    puesto_actual = 1
-    
-    for i, participante in enumerate(participantes_con_puntuacion):
-        # Si no es el primero y tiene la misma puntuación que el anterior, mantiene el puesto
-        if i > 0 and participante['puntuacion_total'] == participantes_con_puntuacion[i-1]['puntuacion_total']:
-            participante['puesto'] = participantes_ranking[i-1]['puesto']
-        else:
-            participante['puesto'] = puesto_actual
-        
-        participantes_ranking.append(participante)
-        puesto_actual = i + 2  # Siguiente puesto disponible
+    # Con el evento finalizado se lee la clasificación congelada; antes, los puestos vigentes
+    if evento.eve_estado == 'Finalizado':
+        congelar_clasificacion(evento)
+        participantes_ranking = [
+            {
+                'id': fila.participante_evento_id,
+                'participante_evento': fila.participante_evento,
+                'participante': fila.participante_evento.participante,
+                'nombre_completo': fila.nombre,
+                'documento': fila.documento,
+                'email': fila.participante_evento.participante.usuario.email,
+                'estado': fila.participante_evento.par_eve_estado,
+                'puntuacion_total': fila.puntaje,
+                'puesto': fila.puesto,
+            }
+            for fila in clasificacion_congelada(evento).filter(participante_evento__confirmado=True)
+        ]
+    else:
+        participantes_evento = ParticipanteEvento.objects.filter(
+            evento=evento,
+            confirmado=True,
+            par_eve_estado='Aprobado',
+            par_eve_valor__isnull=False
+        ).select_related('participante__usuario').order_by('par_eve_puesto', 'id')
+        participantes_ranking = [
+            {
+                'id': participante_evento.id,
+                'participante_evento': participante_evento,
+                'participante': participante_evento.participante,
+                'nombre_completo': f'{participante_evento.participante.usuario.first_name} {participante_evento.participante.usuario.last_name}',
+                'documento': participante_evento.participante.usuario.documento,
+                'email': participante_evento.participante.usuario.email,
+                'estado': participante_evento.par_eve_estado,
+                'puntuacion_total': participante_evento.par_eve_valor,
+                # Puesto persistido por el motor de puntajes (empates comparten puesto)
+                'puesto': participante_evento.par_eve_puesto,
+            }
+            for participante_evento in participantes_evento
+        ]
     
     if request.method == 'POST':
         participantes_seleccionados = request.POST.getlist('participantes')  
         if not participantes_seleccionados:
             messages.error(request, "Debe seleccionar al menos un participante.")
         else:
-            # Procesar envío de certificados
-            enviados = 0
-            errores = []
-            
             # Crear diccionario para acceso rápido por ID
             participantes_dict = {str(p['id']): p for p in participantes_ranking}
-            
+            lote = []
+            errores = []
             for part_id in participantes_seleccionados:
-                try:
-                    participante_data = participantes_dict[part_id]
-                    participante_evento = participante_data['participante_evento']
-                    usuario = participante_data['participante'].usuario
-                    
-                    # Preparar datos del certificado incluyendo PUESTO
-                    datos_certificado = {
-                        'NOMBRE': f'{usuario.first_name} {usuario.last_name}',
-                        'DOCUMENTO': usuario.documento,
-                        'EVENTO': evento.eve_nombre,
-                        'FECHA': evento.eve_fecha_inicio.strftime('%d de %B de %Y'),
-                        'CIUDAD': evento.eve_ciudad,
-                        'LUGAR': evento.eve_lugar,
-                        'PUESTO': f"{participante_data['puesto']}°",
-                        'PUNTUACION': str(participante_data['puntuacion_total'])
-                    }
-                    
-                    # Renderizar el cuerpo del certificado
-                    cuerpo_con_datos = configuracion.cuerpo
-                    for clave, valor in datos_certificado.items():
-                        cuerpo_con_datos = cuerpo_con_datos.replace(f'**{clave}**', valor)
-                    
-                    # Convertir imágenes a base64 para el PDF
-                    logo_base64, logo_format = imagen_to_base64(configuracion.logo)
-                    firma_base64, firma_format = imagen_to_base64(configuracion.firma)
-                    
-                    # Generar PDF del certificado
-                    html_content = render_to_string('app_administradores/certificado_plantilla.html', {
-                        'configuracion': configuracion,
-                        'cuerpo_renderizado': cuerpo_con_datos,
-                        'datos': datos_certificado,
-                        'es_preview': False,
-                        'logo_base64': logo_base64,
-                        'logo_format': logo_format,
-                        'firma_base64': firma_base64,
-                        'firma_format': firma_format,
-                    })
-                    
-                    pdf_file = HTML(string=html_content, base_url=request.build_absolute_uri()).write_pdf()
-                    
-                    # Enviar por correo electrónico
-                    email = EmailMessage(
-                        subject=f'Certificado de Premiación - {evento.eve_nombre}',
-                        body=f'Estimado/a {datos_certificado["NOMBRE"]},\n\n¡Felicitaciones! Adjuntamos su certificado de premiación del evento "{evento.eve_nombre}" donde obtuvo el {datos_certificado["PUESTO"]} lugar con una puntuación de {datos_certificado["PUNTUACION"]} puntos.\n\nSaludos cordiales.',
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        to=[usuario.email],
-                    )
-                    
-                    filename = f'certificado_premiacion_{usuario.documento}.pdf'
-                    email.attach(filename, pdf_file, 'application/pdf')
-                    email.send()
-                    
-                    enviados += 1
-                    
-                except Exception as e:
-                    errores.append(f'{participante_data["email"]}: {str(e)}')
-            
-            if enviados > 0:
-                messages.success(request, f"Se enviaron {enviados} certificados de premiación correctamente.")
-            
+                participante_data = participantes_dict.get(part_id)
+                if participante_data is None:
+                    errores.append(f'Participante {part_id}: no está en la clasificación del evento')
+                    continue
+
+                # Preparar datos del certificado incluyendo PUESTO
+                datos_certificado = {
+                    'NOMBRE': participante_data['nombre_completo'],
+                    'DOCUMENTO': participante_data['documento'],
+                    'EVENTO': evento.eve_nombre,
+                    'FECHA': evento.eve_fecha_inicio.strftime('%d de %B de %Y'),
+                    'CIUDAD': evento.eve_ciudad,
+                    'LUGAR': evento.eve_lugar,
+                    'PUESTO': f"{participante_data['puesto']}°",
+                    'PUNTUACION': str(participante_data['puntuacion_total'])
+                }
+                lote.append({
+                    'clave': participante_data['id'],
+                    'datos': datos_certificado,
+                    'email': participante_data['email'],
+                    'asunto': f'Certificado de Premiación - {evento.eve_nombre}',
+                    'mensaje': f'Estimado/a {datos_certificado["NOMBRE"]},\n\n¡Felicitaciones! Adjuntamos su certificado de premiación del evento "{evento.eve_nombre}" donde obtuvo el {datos_certificado["PUESTO"]} lugar con una puntuación de {datos_certificado["PUNTUACION"]} puntos.\n\nSaludos cordiales.',
+                    'archivo': f'certificado_premiacion_{participante_data["documento"]}.pdf',
+                })
+
             if errores:
-                messages.warning(request, f"Errores en el envío: {', '.join(errores)}")
-            
-            return redirect('enviar_certificados_premiacion', eve_id=eve_id)
+                messages.warning(request, f"No se incluyeron: {', '.join(errores)}")
+            if not lote:
+                return redirect('enviar_certificados_premiacion', eve_id=eve_id)
+
+            envio = encolar_envio(evento, 'premiacion', lote, request.user, request.build_absolute_uri())
+            messages.success(request, f"Se encolaron {len(lote)} certificados de premiación para envío. Puedes seguir el progreso aquí o salir de esta página.")
+            return redirect('progreso_envio_certificados', envio_id=envio.id)
     
     # Verificar advertencias para mostrar en el template
     advertencias = []
@@ -1968,10 +1922,84 @@ def enviar_certificados_premiacion(request, eve_id):
         'evento': evento,
         'configuracion': configuracion,
         'participantes_ranking': participantes_ranking,
-        'advertencias': advertencias
+        'advertencias': advertencias,
+        'envios': envios_recientes(evento, 'premiacion'),
     })
 
 
+def _envio_del_administrador(request, envio_id):
+    """Envío de certificados si pertenece a un evento del administrador; None si no"""
+    envio = get_object_or_404(EnvioCertificados.objects.select_related('evento'), id=envio_id)
+    if envio.evento.eve_administrador_fk != request.user.administrador:
+        return None
+    return envio
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def progreso_envio_certificados(request, envio_id):
+    """Progreso de un envío de certificados y estado de cada destinatario"""
+    envio = _envio_del_administrador(request, envio_id)
+    if envio is None:
+        messages.error(request, "No tienes permisos para gestionar certificados de este evento.")
+        return redirect('gestionar_certificados')
+    return render(request, 'app_administradores/progreso_envio_certificados.html', {
+        'envio': envio,
+        'evento': envio.evento,
+        'resumen': estado_envio(envio),
+        'destinatarios': envio.destinatarios.order_by('estado', 'nombre'),
+    })
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def estado_envio_certificados(request, envio_id):
+    """Estado del envío en JSON, para actualizar la barra de progreso"""
+    envio = _envio_del_administrador(request, envio_id)
+    if envio is None:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    return JsonResponse(estado_envio(envio))
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+@require_http_methods(["POST"])
+def reintentar_envio_certificados(request, envio_id):
+    """Reencola los destinatarios con error del envío (todos o los seleccionados)"""
+    envio = _envio_del_administrador(request, envio_id)
+    if envio is None:
+        messages.error(request, "No tienes permisos para gestionar certificados de este evento.")
+        return redirect('gestionar_certificados')
+    estado_anterior = envio.estado
+    reintentos = reintentar_envio(envio, request.POST.getlist('destinatarios'))
+    if reintentos:
+        messages.success(request, f"Se reintentará el envío a {reintentos} destinatario(s).")
+    elif estado_anterior == 'error':
+        messages.success(request, "El envío se encoló de nuevo.")
+    else:
+        messages.info(request, "No hay destinatarios con error para reintentar.")
+    return redirect('progreso_envio_certificados', envio_id=envio_id)
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def exportar_clasificacion_final(request, eve_id):
+    """Descarga en CSV la clasificación congelada de un evento finalizado"""
+    evento = get_object_or_404(Evento, eve_id=eve_id)
+    if evento.eve_administrador_fk != request.user.administrador:
+        messages.error(request, "No tienes permisos para acceder a este evento.")
+        return redirect('gestionar_certificados')
+    if evento.eve_estado != 'Finalizado':
+        messages.error(request, "La clasificación final solo está disponible cuando el evento ha finalizado.")
+        return redirect('enviar_certificados_premiacion', eve_id=eve_id)
+    congelar_clasificacion(evento)
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="clasificacion_final_evento_{evento.eve_id}.csv"'
+    response.write('\ufeff')
+    escribir_clasificacion_csv(evento, response)
+    return response
+
+
 # ===============================
 # GESTIÓN DE CÓDIGOS DE INVITACIÓN
 # ===============================
@@ -11,11 +11,20 @@ class Asistente(models.Model):
 class AsistenteEvento(models.Model):
     asistente = models.ForeignKey(Asistente, on_delete=models.CASCADE)
     evento = models.ForeignKey(Evento, on_delete=models.CASCADE)
-    asi_eve_fecha_hora = models.DateTimeField()
+    asi_eve_fecha_hora = models.DateTimeField(db_index=True)
     asi_eve_estado = models.CharField(max_length=45)
+    # Primera vez que la inscripción pasó a 'Aprobado'; la sellan las señales de app_eventos
+    asi_eve_fecha_aprobacion = models.DateTimeField(null=True, blank=True, db_index=True)
     asi_eve_soporte = models.FileField(upload_to='asistentes/soportes/', null=True, blank=True)
     asi_eve_qr = models.ImageField(upload_to='asistentes/qr/', null=True, blank=True)
     confirmado = models.BooleanField(default=False)
 
     class Meta:
         unique_together = (('asistente', 'evento'),)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado almacenado, usado para mover la inscripción entre los contadores del evento
+        instance._contador_original = (instance.__dict__.get('asi_eve_estado'), instance.__dict__.get('confirmado'))
+        return instance
@@ -5,6 +5,7 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.urls import reverse
 from django.template.loader import render_to_string
 from app_usuarios.permisos import es_asistente
+from app_usuarios.inscripciones import inscripciones_usuario
 from app_asistentes.models import AsistenteEvento
 from app_eventos.models import EventoCategoria, Evento
 import mimetypes
@@ -13,31 +14,13 @@ import os
 @login_required
 @user_passes_test(es_asistente, login_url='ver_eventos')
 def dashboard_asistente(request):
-    asistente = request.user.asistente
-    relaciones = AsistenteEvento.objects.filter(asistente=asistente).select_related('evento')
-
-    # Calcular estadísticas
-    estadisticas = {
-        'total': relaciones.count(),
-        'pendientes': relaciones.filter(asi_eve_estado='Pendiente').count(),
-        'aprobados': relaciones.filter(asi_eve_estado='Aprobado').count(),
-        'con_qr': relaciones.filter(asi_eve_qr__isnull=False).count(),
-    }
-
-    # Agregar información sobre memorias disponibles para cada relación
-    relaciones_con_memorias = []
-    for relacion in relaciones:
-        relacion_data = {
-            'relacion': relacion,
-            'evento': relacion.evento,
-            'estado': relacion.asi_eve_estado,
-            'tiene_memorias': bool(relacion.evento.eve_memorias),
-        }
-        relaciones_con_memorias.append(relacion_data)
+    asistencias = inscripciones_usuario(request.user)['asistente']
+    relaciones = asistencias['inscripciones']
+    estadisticas = asistencias['estadisticas']
 
     return render(request, 'app_asistentes/dashboard_asistente.html', {
         'relaciones': relaciones,
-        'relaciones_con_memorias': relaciones_con_memorias,
+        'relaciones_con_memorias': relaciones,
         'estadisticas': estadisticas
     })
 
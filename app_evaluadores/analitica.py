@@ -0,0 +1,206 @@
+"""
+Analítica entre evaluadores de un evento: severidad y dispersión de cada
+evaluador, dispersión por criterio y concordancia entre pares de evaluadores.
+
+Las calificaciones (individuales y de proyectos) se leen una sola vez en
+arreglos de NumPy y todo se calcula con operaciones vectorizadas. Una "celda"
+es un par (objetivo, criterio): la concordancia compara a los evaluadores que
+calificaron la misma celda. El resultado se guarda en la caché bajo la versión
+de posiciones del evento, que cambia con cada calificación nueva.
+"""
+import itertools
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Criterio, Calificacion, CalificacionProyecto, Evaluador
+from .posiciones import version_posiciones
+
+
+def _media_y_varianza(grupos, valores, n):
+    """Conteo, media y varianza poblacional de los valores agrupados por índice"""
+    conteo = np.bincount(grupos, minlength=n)
+    suma = np.bincount(grupos, weights=valores, minlength=n)
+    suma_cuadrados = np.bincount(grupos, weights=valores * valores, minlength=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = suma / conteo
+        varianza = np.maximum(suma_cuadrados / conteo - media * media, 0)
+    return conteo, media, varianza
+
+
+def _pares_por_celda(celdas, evaluadores, valores):
+    """
+    Todos los pares de calificaciones de una misma celda, con el evaluador de
+    menor índice primero. Recorre los desplazamientos dentro de cada grupo
+    (tantos como evaluadores tenga la celda más concurrida), no las filas.
+    """
+    orden = np.lexsort((evaluadores, celdas))
+    celdas, evaluadores, valores = celdas[orden], evaluadores[orden], valores[orden]
+    inicio_grupo = np.r_[True, celdas[1:] != celdas[:-1]]
+    inicios = np.flatnonzero(inicio_grupo)
+    tamanos = np.diff(np.r_[inicios, len(celdas)])
+    fin = np.repeat(inicios + tamanos, tamanos)
+
+    a, b = [], []
+    posiciones = np.arange(len(celdas))
+    for desplazamiento in range(1, int(tamanos.max(initial=1))):
+        validos = posiciones + desplazamiento < fin
+        a.append(posiciones[validos])
+        b.append(posiciones[validos] + desplazamiento)
+    if not a:
+        vacio = np.array([], dtype=np.intp)
+        return vacio, vacio, np.array([]), np.array([])
+    a, b = np.concatenate(a), np.concatenate(b)
+    return evaluadores[a], evaluadores[b], valores[a], valores[b]
+
+
+def calcular_analitica(evaluador_idx, criterio_idx, celda_idx, valores, n_evaluadores, n_criterios):
+    """
+    Métricas a partir de arreglos alineados (una posición por calificación).
+    Retorna un diccionario de arreglos de NumPy indexados por evaluador, criterio o par.
+    """
+    valores = valores.astype(float)
+    conteo_ev, media_ev, varianza_ev = _media_y_varianza(evaluador_idx, valores, n_evaluadores)
+    conteo_cri, media_cri, varianza_cri = _media_y_varianza(criterio_idx, valores, n_criterios)
+
+    # Consenso de cada celda y desviación de cada calificación respecto a él
+    _, celdas = np.unique(celda_idx, return_inverse=True)
+    conteo_celda, media_celda, varianza_celda = _media_y_varianza(celdas, valores, celdas.max(initial=-1) + 1)
+    compartidas = conteo_celda[celdas] > 1
+    desviacion = (valores - media_celda[celdas])[compartidas]
+    conteo_sev = np.bincount(evaluador_idx[compartidas], minlength=n_evaluadores)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        severidad = np.bincount(evaluador_idx[compartidas], weights=desviacion, minlength=n_evaluadores) / conteo_sev
+
+    # Desacuerdo dentro de cada criterio: desviación media de las celdas con más de un evaluador
+    celda_criterio = np.zeros(len(conteo_celda), dtype=np.intp)
+    celda_criterio[celdas] = criterio_idx
+    multiples = conteo_celda > 1
+    _, desacuerdo_cri, _ = _media_y_varianza(
+        celda_criterio[multiples], np.sqrt(varianza_celda[multiples]), n_criterios
+    )
+
+    # Concordancia por par de evaluadores
+    ev_a, ev_b, val_a, val_b = _pares_por_celda(celdas, evaluador_idx, valores)
+    clave = ev_a.astype(np.int64) * n_evaluadores + ev_b
+    claves, par = np.unique(clave, return_inverse=True)
+    n = np.bincount(par).astype(float)
+
+    def suma(pesos):
+        return np.bincount(par, weights=pesos, minlength=len(claves))
+
+    sx, sy = suma(val_a), suma(val_b)
+    sxx, syy, sxy = suma(val_a * val_a), suma(val_b * val_b), suma(val_a * val_b)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diferencia_media = suma(np.abs(val_a - val_b)) / n
+        acuerdo_exacto = suma((val_a == val_b).astype(float)) / n
+        covarianza = sxy / n - (sx / n) * (sy / n)
+        desviaciones = np.sqrt(np.maximum(sxx / n - (sx / n) ** 2, 0) * np.maximum(syy / n - (sy / n) ** 2, 0))
+        correlacion = np.where(desviaciones > 0, covarianza / desviaciones, np.nan)
+
+    return {
+        'conteo_evaluador': conteo_ev,
+        'media_evaluador': media_ev,
+        'varianza_evaluador': varianza_ev,
+        'severidad_evaluador': severidad,
+        'conteo_criterio': conteo_cri,
+        'media_criterio': media_cri,
+        'varianza_criterio': varianza_cri,
+        'desacuerdo_criterio': desacuerdo_cri,
+        'par_a': (claves // n_evaluadores).astype(np.intp),
+        'par_b': (claves % n_evaluadores).astype(np.intp),
+        'par_compartidas': n.astype(int),
+        'par_diferencia_media': diferencia_media,
+        'par_acuerdo_exacto': acuerdo_exacto,
+        'par_correlacion': correlacion,
+    }
+
+
+def _leer(queryset, campo_objetivo):
+    """Lee (evaluador, criterio, objetivo, valor) en flujo directo a un arreglo int64 de 4 columnas"""
+    filas = queryset.values_list('evaluador_id', 'criterio_id', campo_objetivo, 'cal_valor').iterator(chunk_size=5000)
+    return np.fromiter(itertools.chain.from_iterable(filas), dtype=np.int64).reshape(-1, 4)
+
+
+def _numero(valor, decimales=2):
+    return None if np.isnan(valor) else round(float(valor), decimales)
+
+
+def analitica_evento(evento):
+    """Analítica de evaluadores del evento lista para la plantilla"""
+    criterios = list(
+        Criterio.objects.filter(cri_evento_fk=evento).values_list('cri_id', 'cri_descripcion').order_by('cri_id')
+    )
+    individuales = _leer(Calificacion.objects.filter(criterio__cri_evento_fk=evento), 'participante_id')
+    proyectos = _leer(CalificacionProyecto.objects.filter(criterio__cri_evento_fk=evento), 'proyecto_id')
+    filas = np.concatenate([individuales, proyectos])
+
+    ids_evaluadores, evaluador_idx = np.unique(filas[:, 0], return_inverse=True)
+    ids_criterios = np.array([cri_id for cri_id, _ in criterios], dtype=np.int64)
+    criterio_idx = np.searchsorted(ids_criterios, filas[:, 1])
+    # Los objetivos de proyectos se separan de los individuales con el signo
+    objetivos = np.concatenate([individuales[:, 2], -proyectos[:, 2]])
+    celda_idx = objetivos * max(len(ids_criterios), 1) + criterio_idx
+    metricas = calcular_analitica(
+        evaluador_idx, criterio_idx, celda_idx, filas[:, 3], len(ids_evaluadores), len(ids_criterios)
+    )
+
+    nombres = {
+        evaluador_id: f'{nombre} {apellido}'.strip() or usuario
+        for evaluador_id, nombre, apellido, usuario in Evaluador.objects.filter(id__in=ids_evaluadores.tolist())
+        .values_list('id', 'usuario__first_name', 'usuario__last_name', 'usuario__username')
+    }
+    evaluadores = [
+        {
+            'nombre': nombres.get(int(evaluador_id), ''),
+            'calificaciones': int(metricas['conteo_evaluador'][i]),
+            'media': _numero(metricas['media_evaluador'][i]),
+            'desviacion': _numero(np.sqrt(metricas['varianza_evaluador'][i])),
+            'severidad': _numero(metricas['severidad_evaluador'][i]),
+        }
+        for i, evaluador_id in enumerate(ids_evaluadores)
+    ]
+    criterios = [
+        {
+            'descripcion': descripcion,
+            'calificaciones': int(metricas['conteo_criterio'][i]),
+            'media': _numero(metricas['media_criterio'][i]),
+            'desviacion': _numero(np.sqrt(metricas['varianza_criterio'][i])),
+            'desacuerdo': _numero(metricas['desacuerdo_criterio'][i]),
+        }
+        for i, (_, descripcion) in enumerate(criterios)
+    ]
+    pares = sorted(
+        (
+            {
+                'evaluador_a': evaluadores[a]['nombre'],
+                'evaluador_b': evaluadores[b]['nombre'],
+                'compartidas': int(compartidas),
+                'diferencia_media': _numero(diferencia),
+                'acuerdo_exacto': _numero(acuerdo * 100, 1),
+                'correlacion': _numero(correlacion),
+            }
+            for a, b, compartidas, diferencia, acuerdo, correlacion in zip(
+                metricas['par_a'], metricas['par_b'], metricas['par_compartidas'],
+                metricas['par_diferencia_media'], metricas['par_acuerdo_exacto'], metricas['par_correlacion'],
+            )
+        ),
+        key=lambda p: (-p['diferencia_media'], -p['compartidas'])
+    )
+    return {
+        'total_calificaciones': len(filas),
+        'evaluadores': evaluadores,
+        'criterios': criterios,
+        'pares': pares,
+    }
+
+
+def obtener_analitica(evento):
+    """analitica_evento servida desde la caché hasta que cambien las calificaciones"""
+    clave = f'analitica:{evento.pk}:{version_posiciones(evento.pk)}'
+    analitica = cache.get(clave)
+    if analitica is None:
+        analitica = analitica_evento(evento)
+        cache.set(clave, analitica, settings.POSICIONES_CACHE_TIMEOUT)
+    return analitica
@@ -0,0 +1,270 @@
+"""
+Escritura de hojas de calificación: validación previa de todos los valores y
+guardado masivo (upsert) sobre las llaves unique_together de Calificacion y
+CalificacionProyecto. bulk_create no dispara las señales de signals.py, así que
+los mismos deltas de AcumuladoCalificacion se calculan aquí para las filas
+escritas y los puestos del evento se recalculan una sola vez al final.
+
+También lee las cargas masivas (grilla, CSV o JSON) de la calificación masiva.
+"""
+import csv
+import io
+import json
+
+from django.db import connection, transaction
+
+from .models import AcumuladoCalificacion, Calificacion, CalificacionProyecto, Criterio
+from .posiciones import invalidar_posiciones
+from .puntajes import aplicar_delta_acumulado, actualizar_nota_desde_acumulado, recalcular_puestos_evento
+from app_participantes.models import ParticipanteEvento, ProyectoGrupal
+
+VALOR_MINIMO = 1
+VALOR_MAXIMO = 5
+
+
+def validar_valor(valor, criterio):
+    """
+    Convierte el valor recibido de un criterio.
+    Retorna (valor_int, error); ambos None si el campo vino vacío.
+    """
+    if valor is None or str(valor).strip() == '':
+        return None, None
+    try:
+        valor_int = int(str(valor).strip())
+    except ValueError:
+        return None, f"Valor inválido para '{criterio.cri_descripcion}'."
+    if not VALOR_MINIMO <= valor_int <= VALOR_MAXIMO:
+        return None, f"El valor de '{criterio.cri_descripcion}' debe estar entre {VALOR_MINIMO} y {VALOR_MAXIMO}."
+    return valor_int, None
+
+
+def leer_hoja(datos, criterios, prefijo='criterio_'):
+    """
+    Valida de una vez todos los criterios de una hoja enviada por formulario.
+    Retorna ({criterio_id: valor}, [errores]); si hay errores no se debe guardar nada.
+    """
+    valores, errores = {}, []
+    for criterio in criterios:
+        valor, error = validar_valor(datos.get(f'{prefijo}{criterio.cri_id}'), criterio)
+        if error:
+            errores.append(error)
+        elif valor is not None:
+            valores[criterio.cri_id] = valor
+    return valores, errores
+
+
+def _upsert(modelo, campo_objetivo, filas):
+    if not filas:
+        return
+    opciones = {'update_conflicts': True, 'update_fields': ['cal_valor']}
+    # MySQL resuelve el conflicto con ON DUPLICATE KEY y no admite indicar las columnas
+    if connection.features.supports_update_conflicts_with_target:
+        opciones['unique_fields'] = ['evaluador', 'criterio', campo_objetivo]
+    modelo.objects.bulk_create(filas, batch_size=500, **opciones)
+
+
+def _bloquear_acumulados(evento, campo_id, objetivos_ids):
+    """
+    Crea en cero las filas acumuladas que falten y las bloquea. Dos guardados
+    simultáneos sobre un mismo objetivo quedan en fila: el segundo cuenta los
+    criterios ya calificados con las calificaciones del primero confirmadas.
+    """
+    AcumuladoCalificacion.objects.bulk_create(
+        [AcumuladoCalificacion(evento=evento, **{campo_id: objetivo_id}) for objetivo_id in objetivos_ids],
+        ignore_conflicts=True,
+    )
+    list(AcumuladoCalificacion.objects.select_for_update().filter(
+        evento=evento, **{f'{campo_id}__in': objetivos_ids}
+    ).order_by('id').values_list('id', flat=True))
+
+
+def _aplicar_deltas(modelo, campo_objetivo, evento, evaluador, hojas, pesos):
+    """
+    Upsert de las hojas {objetivo_id: {criterio_id: valor}} de un modelo y suma de
+    sus deltas a los acumulados: la diferencia ponderada de los valores, un evaluador
+    más si no había calificado al objetivo y un criterio más por cada criterio nuevo.
+    """
+    if not hojas:
+        return
+    campo_id = f'{campo_objetivo}_id'
+    _bloquear_acumulados(evento, campo_id, list(hojas.keys()))
+    del_evento = modelo.objects.filter(
+        criterio__cri_evento_fk=evento, **{f'{campo_id}__in': list(hojas.keys())}
+    )
+    # Bloquear las filas del evaluador evita que dos guardados simultáneos resten el mismo valor viejo
+    anteriores = {
+        (objetivo_id, criterio_id): valor
+        for objetivo_id, criterio_id, valor in del_evento.filter(evaluador=evaluador).select_for_update()
+        .values_list(campo_id, 'criterio_id', 'cal_valor')
+    }
+    calificados = {objetivo_id for objetivo_id, _ in anteriores}
+    criterios_con_nota = set(del_evento.values_list(campo_id, 'criterio_id').distinct().order_by())
+
+    _upsert(modelo, campo_objetivo, [
+        modelo(evaluador=evaluador, criterio_id=criterio_id, cal_valor=valor, **{campo_id: objetivo_id})
+        for objetivo_id, valores in hojas.items()
+        for criterio_id, valor in valores.items()
+    ])
+    for objetivo_id, valores in hojas.items():
+        suma = sum(
+            (valor - anteriores.get((objetivo_id, criterio_id), 0)) * pesos[criterio_id]
+            for criterio_id, valor in valores.items()
+        )
+        aplicar_delta_acumulado(
+            evento.pk, suma=suma,
+            evaluadores=0 if objetivo_id in calificados else 1,
+            criterios=sum((objetivo_id, criterio_id) not in criterios_con_nota for criterio_id in valores),
+            **{campo_id: objetivo_id},
+        )
+        actualizar_nota_desde_acumulado(evento.pk, **{campo_id: objetivo_id})
+
+
+def guardar_calificaciones(evento, evaluador, individuales=None, proyectos=None):
+    """
+    Guarda en bloque las calificaciones de un evaluador, actualiza con deltas los
+    acumulados y notas de los objetivos afectados y recalcula los puestos una vez,
+    todo dentro de una transacción.
+
+    individuales: {participante_id: {criterio_id: valor}}
+    proyectos: {proyecto_id: {criterio_id: valor}}
+    Retorna el número de calificaciones escritas.
+    """
+    individuales = {pid: valores for pid, valores in (individuales or {}).items() if valores}
+    proyectos = {pid: valores for pid, valores in (proyectos or {}).items() if valores}
+    if not individuales and not proyectos:
+        return 0
+
+    pesos = dict(Criterio.objects.filter(cri_evento_fk=evento).values_list('cri_id', 'cri_peso'))
+    with transaction.atomic():
+        _aplicar_deltas(Calificacion, 'participante', evento, evaluador, individuales, pesos)
+        _aplicar_deltas(CalificacionProyecto, 'proyecto', evento, evaluador, proyectos, pesos)
+        recalcular_puestos_evento(evento)
+        invalidar_posiciones(evento.pk)
+    return sum(len(valores) for valores in individuales.values()) + sum(len(valores) for valores in proyectos.values())
+
+
+# ===============================
+# CALIFICACIÓN MASIVA
+# ===============================
+
+TIPO_PARTICIPANTE = 'participante'
+TIPO_PROYECTO = 'proyecto'
+
+
+def objetivos_asignados(evento, inscripcion):
+    """
+    Participantes individuales y proyectos aprobados que le corresponden al
+    evaluador (en eventos multidisciplinarios, solo los de su categoría).
+    Retorna (participantes, proyectos) como listas de diccionarios {id, nombre}.
+    """
+    participaciones = ParticipanteEvento.objects.filter(
+        evento=evento, par_eve_estado='Aprobado', es_grupal=False
+    )
+    proyectos = ProyectoGrupal.objects.filter(
+        evento=evento, estado='Aprobado',
+        participanteevento__par_eve_estado='Aprobado', participanteevento__es_grupal=True,
+    )
+    categoria = inscripcion.categoria_evaluacion
+    if evento.eve_es_multidisciplinario == 'Si' and categoria:
+        participaciones = participaciones.filter(categorias=categoria)
+        proyectos = proyectos.filter(categorias=categoria)
+
+    participantes = [
+        {'id': participante_id, 'nombre': f'{nombre} {apellido}'.strip()}
+        for participante_id, nombre, apellido in participaciones.values_list(
+            'participante_id', 'participante__usuario__first_name', 'participante__usuario__last_name'
+        ).distinct().order_by('participante__usuario__first_name', 'participante_id')
+    ]
+    proyectos = [
+        {'id': proyecto_id, 'nombre': nombre}
+        for proyecto_id, nombre in proyectos.values_list('id', 'nombre_proyecto').distinct().order_by('nombre_proyecto', 'id')
+    ]
+    return participantes, proyectos
+
+
+class LectorCalificaciones:
+    """
+    Acumula en memoria las calificaciones de una carga masiva, validando cada
+    valor contra los objetivos asignados y los criterios del evento.
+    """
+
+    def __init__(self, criterios, participantes_ids, proyectos_ids):
+        self.criterios = {c.cri_id: c for c in criterios}
+        self.permitidos = {
+            TIPO_PARTICIPANTE: set(participantes_ids),
+            TIPO_PROYECTO: set(proyectos_ids),
+        }
+        self.individuales = {}
+        self.proyectos = {}
+        self.errores = []
+
+    def agregar(self, referencia, tipo, objetivo_id, criterio_id, valor):
+        tipo = str(tipo or '').strip().lower()
+        if tipo not in self.permitidos:
+            self.errores.append(f"{referencia}: tipo '{tipo}' inválido (use '{TIPO_PARTICIPANTE}' o '{TIPO_PROYECTO}').")
+            return
+        try:
+            objetivo_id = int(objetivo_id)
+            criterio_id = int(str(criterio_id).replace('criterio_', ''))
+        except (TypeError, ValueError):
+            self.errores.append(f'{referencia}: identificador inválido.')
+            return
+        if objetivo_id not in self.permitidos[tipo]:
+            self.errores.append(f'{referencia}: el {tipo} {objetivo_id} no está asignado a este evaluador.')
+            return
+        criterio = self.criterios.get(criterio_id)
+        if criterio is None:
+            self.errores.append(f'{referencia}: el criterio {criterio_id} no pertenece al evento.')
+            return
+        valor, error = validar_valor(valor, criterio)
+        if error:
+            self.errores.append(f'{referencia}: {error}')
+        elif valor is not None:
+            destino = self.individuales if tipo == TIPO_PARTICIPANTE else self.proyectos
+            destino.setdefault(objetivo_id, {})[criterio_id] = valor
+
+    def leer_grilla(self, datos):
+        """Campos del formulario con nombre '<tipo>_<objetivo_id>_<criterio_id>'"""
+        for campo, valor in datos.items():
+            partes = campo.split('_')
+            if len(partes) == 3 and partes[0] in self.permitidos:
+                self.agregar(campo, partes[0], partes[1], partes[2], valor)
+
+    def leer_csv(self, archivo):
+        """Columnas: tipo, id, [nombre], criterio_<cri_id>... (una fila por objetivo)"""
+        try:
+            texto = archivo.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            self.errores.append('El archivo CSV debe estar codificado en UTF-8.')
+            return
+        lector = csv.DictReader(io.StringIO(texto))
+        if not lector.fieldnames or not {'tipo', 'id'} <= set(lector.fieldnames):
+            self.errores.append("El archivo CSV debe tener las columnas 'tipo' e 'id'.")
+            return
+        columnas = [c for c in lector.fieldnames if c.startswith('criterio_')]
+        for numero, fila in enumerate(lector, start=2):
+            for columna in columnas:
+                self.agregar(f'Fila {numero}', fila.get('tipo'), fila.get('id'), columna, fila.get(columna))
+
+    def leer_json(self, archivo):
+        """Lista de objetos {"tipo", "id", "calificaciones": {"<cri_id>": valor}}"""
+        try:
+            registros = json.loads(archivo.read().decode('utf-8-sig'))
+        except (UnicodeDecodeError, ValueError):
+            self.errores.append('El archivo JSON no es válido.')
+            return
+        if not isinstance(registros, list):
+            self.errores.append('El archivo JSON debe contener una lista de calificaciones.')
+            return
+        for numero, registro in enumerate(registros, start=1):
+            if not isinstance(registro, dict) or not isinstance(registro.get('calificaciones'), dict):
+                self.errores.append(f"Registro {numero}: falta el objeto 'calificaciones'.")
+                continue
+            for criterio_id, valor in registro['calificaciones'].items():
+                self.agregar(f'Registro {numero}', registro.get('tipo'), registro.get('id'), criterio_id, valor)
+
+    def leer_archivo(self, archivo):
+        if archivo.name.lower().endswith('.json'):
+            self.leer_json(archivo)
+        else:
+            self.leer_csv(archivo)
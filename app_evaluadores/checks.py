@@ -0,0 +1,26 @@
+"""
+Comprobaciones de configuración de app_evaluadores (python manage.py check y
+arranque del servidor).
+"""
+from django.core.checks import Tags, Warning, register
+
+from .posiciones import cache_compartida
+
+
+@register(Tags.caches, deploy=True)
+def comprobar_cache_compartida(app_configs, **kwargs):
+    """
+    Avisa al desplegar (manage.py check --deploy) si la caché es local al proceso:
+    con varios procesos cada uno guarda sus propias tablas y no ve las notas que
+    escriben los demás hasta que vence POSICIONES_CACHE_TIMEOUT.
+    """
+    if cache_compartida():
+        return []
+    return [Warning(
+        'La caché por defecto es local a cada proceso: con varios workers o procesar_recalculos '
+        'las tablas de posiciones tardan hasta POSICIONES_CACHE_TIMEOUT segundos en mostrar '
+        'las notas escritas por otro proceso, y la tabla de posiciones en vivo consulta la base '
+        'de datos en cada sondeo.',
+        hint='Configura CACHE_BACKEND y CACHE_LOCATION con una caché compartida (redis, memcached o base de datos).',
+        id='app_evaluadores.W001',
+    )]
@@ -0,0 +1,74 @@
+"""
+Clasificación final congelada de los eventos finalizados.
+
+Al pasar un evento a 'Finalizado' se recalculan por última vez sus puestos y se
+copian a ClasificacionFinal. Desde entonces premiación, paneles y exportaciones
+leen esas filas y ya no dependen de par_eve_valor ni de par_eve_puesto.
+"""
+import csv
+
+from django.db import transaction
+
+from .puntajes import recalcular_puestos_evento
+from app_administradores.exportaciones import escapar_formula
+from app_eventos.models import Evento
+from app_participantes.models import ClasificacionFinal, ParticipanteEvento
+
+
+def congelar_clasificacion(evento):
+    """
+    Escribe la clasificación final del evento si aún no existe. Mientras ninguna
+    participación tenga puesto no se congela nada, para no fijar un ranking vacío.
+    Retorna el número de filas creadas (0 si ya estaba congelada o no hay puestos).
+    """
+    with transaction.atomic():
+        # El bloqueo del evento serializa dos peticiones que finalizan el mismo evento
+        Evento.objects.select_for_update().only('eve_id').get(pk=evento.pk)
+        if ClasificacionFinal.objects.filter(evento=evento).exists():
+            return 0
+        recalcular_puestos_evento(evento)
+        filas = ParticipanteEvento.objects.filter(
+            evento=evento, par_eve_puesto__isnull=False
+        ).values_list(
+            'id', 'proyecto_grupal_id', 'par_eve_puesto', 'par_eve_valor',
+            'participante__usuario__first_name', 'participante__usuario__last_name',
+            'participante__usuario__documento',
+        ).order_by('par_eve_puesto', 'id')
+
+        clasificacion = []
+        grupo_empate = 0
+        puesto_anterior = None
+        for pe_id, proyecto_id, puesto, puntaje, nombre, apellido, documento in filas:
+            if puesto != puesto_anterior:
+                grupo_empate += 1
+                puesto_anterior = puesto
+            clasificacion.append(ClasificacionFinal(
+                evento=evento,
+                participante_evento_id=pe_id,
+                proyecto_grupal_id=proyecto_id,
+                puesto=puesto,
+                grupo_empate=grupo_empate,
+                puntaje=puntaje,
+                nombre=f'{nombre} {apellido}'.strip(),
+                documento=documento or '',
+            ))
+        ClasificacionFinal.objects.bulk_create(clasificacion, batch_size=500)
+    return len(clasificacion)
+
+
+def clasificacion_congelada(evento):
+    """Filas de la clasificación final del evento en orden de puesto (vacío si no está congelada)"""
+    return ClasificacionFinal.objects.filter(evento=evento).select_related(
+        'participante_evento__participante__usuario', 'proyecto_grupal'
+    ).order_by('puesto', 'id')
+
+
+def escribir_clasificacion_csv(evento, salida):
+    escritor = csv.writer(salida)
+    escritor.writerow(['Puesto', 'Grupo de empate', 'Nombre', 'Documento', 'Proyecto', 'Puntaje'])
+    for fila in ClasificacionFinal.objects.filter(evento=evento).values_list(
+        'puesto', 'grupo_empate', 'nombre', 'documento', 'proyecto_grupal__nombre_proyecto', 'puntaje'
+    ).order_by('puesto', 'id'):
+        puesto, grupo, nombre, documento, proyecto, puntaje = fila
+        escritor.writerow([puesto, grupo, escapar_formula(nombre), escapar_formula(documento),
+                           escapar_formula(proyecto or ''), puntaje])
@@ -0,0 +1,160 @@
+"""
+Tabla de posiciones en vivo por Server-Sent Events.
+
+Cada proceso ASGI mantiene un canal por evento con un único sondeo liviano de
+la versión de posiciones en caché (la incrementan las escrituras de notas, ver
+signals.py). Cuando la versión cambia, el canal reconstruye la tabla una sola
+vez, calcula los cambios de puesto y puntaje y los reparte a las colas asyncio
+de todos los navegadores conectados. Las conexiones inactivas no ocupan hilos.
+
+La versión la escriben otros procesos (workers WSGI, procesar_recalculos). Con
+una caché local al proceso (locmem, un solo proceso en desarrollo) esa versión no
+ve sus escrituras, así que el canal relee la tabla de la base de datos cada
+INTERVALO_SONDEO_BD segundos y reparte solo lo que cambió; manage.py check
+--deploy avisa de ello (app_evaluadores.W001).
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+
+from .posiciones import cache_compartida, construir_tabla_posiciones, obtener_tabla_posiciones, version_posiciones
+
+INTERVALO_SONDEO = 1.0
+INTERVALO_SONDEO_BD = 5.0
+INTERVALO_LATIDO = 15
+TAMANO_COLA = 50
+
+_canales = {}
+
+
+def filas_tabla(tabla):
+    """Aplana la tabla de posiciones en {clave: fila} para comparar versiones"""
+    filas = {}
+    for item in tabla['posiciones_proyectos']:
+        proyecto = item['proyecto']
+        filas[f"proyecto-{proyecto['id']}"] = {
+            'tipo': 'proyecto',
+            'nombre': proyecto['nombre_proyecto'],
+            'integrantes': len(item['integrantes']),
+            'puesto': item['puesto'],
+            'puntaje': item['puntaje'],
+        }
+    for item in tabla['posiciones_individuales']:
+        usuario = item['participante']['usuario']
+        filas[f"participante-{item['participante']['id']}"] = {
+            'tipo': 'participante',
+            'nombre': f"{usuario['first_name']} {usuario['last_name']}".strip(),
+            'puesto': item['puesto'],
+            'puntaje': item['puntaje'],
+        }
+    return filas
+
+
+def calcular_cambios(anteriores, actuales):
+    """Filas nuevas o con puesto/puntaje distinto, y claves que ya no están"""
+    cambios = []
+    for clave, fila in actuales.items():
+        anterior = anteriores.get(clave)
+        if anterior is None or anterior['puesto'] != fila['puesto'] or anterior['puntaje'] != fila['puntaje']:
+            cambios.append({
+                'clave': clave,
+                **fila,
+                'puesto_anterior': anterior['puesto'] if anterior else None,
+                'puntaje_anterior': anterior['puntaje'] if anterior else None,
+            })
+    eliminados = [clave for clave in anteriores if clave not in actuales]
+    return cambios, eliminados
+
+
+class CanalPosiciones:
+    """Suscriptores de un evento en este proceso y la tarea que sondea su versión"""
+
+    def __init__(self, evento_id):
+        self.evento_id = evento_id
+        self.suscriptores = set()
+        self.filas = {}
+        self.version = None
+        self.tarea = None
+
+    def _instantanea(self):
+        return {'tipo': 'tabla', 'filas': [{'clave': clave, **fila} for clave, fila in self.filas.items()]}
+
+    async def _actualizar(self):
+        """Relee la tabla si la versión cambió; retorna (cambios, eliminados)"""
+        if cache_compartida():
+            version = await sync_to_async(version_posiciones)(self.evento_id)
+            if version == self.version:
+                return [], []
+            tabla = await sync_to_async(obtener_tabla_posiciones)(self.evento_id)
+        else:
+            # La versión local no ve las notas de otros procesos: la tabla sale de la base de datos
+            version = 'bd'
+            tabla = await sync_to_async(construir_tabla_posiciones)(self.evento_id)
+        filas = filas_tabla(tabla)
+        cambios, eliminados = calcular_cambios(self.filas, filas)
+        self.version, self.filas = version, filas
+        return cambios, eliminados
+
+    def _publicar(self, mensaje):
+        for cola in self.suscriptores:
+            try:
+                cola.put_nowait(mensaje)
+            except asyncio.QueueFull:
+                # Cliente lento: se descartan sus mensajes pendientes y recibe la tabla completa
+                while not cola.empty():
+                    cola.get_nowait()
+                cola.put_nowait(self._instantanea())
+
+    async def _sondear(self):
+        try:
+            intervalo = INTERVALO_SONDEO if cache_compartida() else INTERVALO_SONDEO_BD
+            while self.suscriptores:
+                await asyncio.sleep(intervalo)
+                cambios, eliminados = await self._actualizar()
+                if cambios or eliminados:
+                    self._publicar({'tipo': 'cambios', 'cambios': cambios, 'eliminados': eliminados})
+        finally:
+            if _canales.get(self.evento_id) is self:
+                del _canales[self.evento_id]
+
+    async def suscribir(self):
+        cola = asyncio.Queue(maxsize=TAMANO_COLA)
+        if self.version is None:
+            await self._actualizar()
+        cola.put_nowait(self._instantanea())
+        self.suscriptores.add(cola)
+        if self.tarea is None or self.tarea.done():
+            self.tarea = asyncio.create_task(self._sondear())
+        return cola
+
+    def desuscribir(self, cola):
+        self.suscriptores.discard(cola)
+
+
+def obtener_canal(evento_id):
+    canal = _canales.get(evento_id)
+    if canal is None:
+        canal = _canales[evento_id] = CanalPosiciones(evento_id)
+    return canal
+
+
+def _evento_sse(mensaje):
+    return f"event: {mensaje['tipo']}\ndata: {json.dumps(mensaje)}\n\n"
+
+
+async def flujo_posiciones(evento_id):
+    """Generador asíncrono de eventos SSE: la tabla completa y luego sus cambios"""
+    canal = obtener_canal(evento_id)
+    cola = await canal.suscribir()
+    try:
+        while True:
+            try:
+                mensaje = await asyncio.wait_for(cola.get(), INTERVALO_LATIDO)
+            except asyncio.TimeoutError:
+                # Comentario SSE para que proxies y navegadores no cierren la conexión
+                yield ': latido\n\n'
+                continue
+            yield _evento_sse(mensaje)
+    finally:
+        canal.desuscribir(cola)
@@ -0,0 +1,144 @@
+import random
+import time
+import uuid
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from app_usuarios.models import Usuario
+from app_administradores.models import AdministradorEvento
+from app_eventos.models import Evento
+from app_eventos.contadores import reconciliar_contadores
+from app_participantes.models import Participante, ParticipanteEvento, ProyectoGrupal
+from app_evaluadores.models import Evaluador, EvaluadorEvento, Criterio, Calificacion, CalificacionProyecto
+from app_evaluadores.posiciones import construir_tabla_posiciones
+from app_evaluadores.puntajes import recalcular_notas_evento
+
+
+class Command(BaseCommand):
+    help = ('Mide consultas y tiempo de la tabla de posiciones con un evento sintético. '
+            'Los datos se crean dentro de una transacción que se revierte al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participantes', type=int, default=5000)
+        parser.add_argument('--evaluadores', type=int, default=50)
+        parser.add_argument('--criterios', type=int, default=10)
+        parser.add_argument('--integrantes-por-proyecto', type=int, default=4,
+                            help='Tamaño de los proyectos grupales (20%% de los participantes son grupales)')
+        parser.add_argument('--evaluadores-por-participante', type=int, default=3)
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--max-consultas', type=int, default=10)
+        parser.add_argument('--max-ms', type=float, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            evento = self._crear_evento(options)
+            consultas, tiempos, tabla = self._medir(evento, options['repeticiones'])
+            transaction.set_rollback(True)
+
+        mejor_ms = min(tiempos)
+        self.stdout.write(
+            f"Proyectos: {len(tabla['posiciones_proyectos'])}, "
+            f"individuales: {len(tabla['posiciones_individuales'])}"
+        )
+        self.stdout.write(f'Consultas: {consultas} (máximo {options["max_consultas"]})')
+        self.stdout.write(
+            f'Tiempo: mejor {mejor_ms:.1f} ms, peor {max(tiempos):.1f} ms (máximo {options["max_ms"]:.0f} ms)'
+        )
+
+        if consultas > options['max_consultas'] or mejor_ms > options['max_ms']:
+            raise CommandError('La tabla de posiciones supera los límites definidos')
+        self.stdout.write(self.style.SUCCESS('La tabla de posiciones está dentro de los límites'))
+
+    def _medir(self, evento, repeticiones):
+        tiempos = []
+        for _ in range(max(repeticiones, 1)):
+            with CaptureQueriesContext(connection) as contexto:
+                inicio = time.perf_counter()
+                tabla = construir_tabla_posiciones(evento)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+        return len(contexto.captured_queries), tiempos, tabla
+
+    def _crear_usuarios(self, prefijo, cantidad):
+        Usuario.objects.bulk_create([
+            Usuario(username=f'{prefijo}{i}', email=f'{prefijo}{i}@benchmark.local',
+                    first_name=f'Nombre {i}', last_name='Benchmark', documento=str(i),
+                    password='!')
+            for i in range(cantidad)
+        ], batch_size=1000)
+        # MySQL no devuelve los ids de bulk_create, se consultan de nuevo
+        return list(Usuario.objects.filter(username__startswith=prefijo).order_by('id').values_list('id', flat=True))
+
+    def _crear_evento(self, options):
+        self.stdout.write('Creando datos de prueba...')
+        random.seed(1)
+        token = uuid.uuid4().hex[:8]
+        ahora = timezone.now()
+
+        admin_id = self._crear_usuarios(f'bench-{token}-adm-', 1)[0]
+        administrador = AdministradorEvento.objects.create(usuario_id=admin_id)
+        evento = Evento.objects.create(
+            eve_nombre=f'Benchmark {token}', eve_descripcion='Evento sintético', eve_ciudad='-', eve_lugar='-',
+            eve_fecha_inicio=date.today(), eve_fecha_fin=date.today(), eve_estado='Aprobado',
+            eve_capacidad=options['participantes'], eve_tienecosto='No', eve_administrador_fk=administrador,
+        )
+
+        Criterio.objects.bulk_create([
+            Criterio(cri_descripcion=f'Criterio {i}', cri_peso=random.choice([10, 20, 30]), cri_evento_fk=evento)
+            for i in range(options['criterios'])
+        ])
+        criterios = list(Criterio.objects.filter(cri_evento_fk=evento).values_list('cri_id', flat=True))
+
+        usuarios_eval = self._crear_usuarios(f'bench-{token}-eva-', options['evaluadores'])
+        Evaluador.objects.bulk_create([Evaluador(usuario_id=u) for u in usuarios_eval])
+        evaluadores = list(Evaluador.objects.filter(usuario_id__in=usuarios_eval).values_list('id', flat=True))
+        EvaluadorEvento.objects.bulk_create([
+            EvaluadorEvento(evaluador_id=e, evento=evento, eva_eve_fecha_hora=ahora,
+                            eva_eve_estado='Aprobado', confirmado=True)
+            for e in evaluadores
+        ])
+
+        total = options['participantes']
+        tamano = max(options['integrantes_por_proyecto'], 1)
+        num_proyectos = (total // 5) // tamano
+        ProyectoGrupal.objects.bulk_create([
+            ProyectoGrupal(nombre_proyecto=f'Proyecto {i}', evento=evento, estado='Aprobado')
+            for i in range(num_proyectos)
+        ])
+        proyectos = list(ProyectoGrupal.objects.filter(evento=evento).values_list('id', flat=True))
+
+        usuarios_par = self._crear_usuarios(f'bench-{token}-par-', total)
+        Participante.objects.bulk_create([Participante(usuario_id=u) for u in usuarios_par])
+        participantes = list(Participante.objects.filter(usuario_id__in=usuarios_par).values_list('id', flat=True))
+        grupales = num_proyectos * tamano
+        ParticipanteEvento.objects.bulk_create([
+            ParticipanteEvento(
+                participante_id=p, evento=evento, par_eve_fecha_hora=ahora, par_eve_estado='Aprobado',
+                confirmado=True, es_grupal=i < grupales,
+                proyecto_grupal_id=proyectos[i // tamano] if i < grupales else None,
+                es_lider_proyecto=i < grupales and i % tamano == 0,
+            )
+            for i, p in enumerate(participantes)
+        ], batch_size=1000)
+
+        por_objetivo = min(options['evaluadores_por_participante'], len(evaluadores))
+        Calificacion.objects.bulk_create([
+            Calificacion(evaluador_id=e, criterio_id=c, participante_id=p, cal_valor=random.randint(1, 5))
+            for p in participantes[grupales:]
+            for e in random.sample(evaluadores, por_objetivo)
+            for c in criterios
+        ], batch_size=2000)
+        CalificacionProyecto.objects.bulk_create([
+            CalificacionProyecto(evaluador_id=e, criterio_id=c, proyecto_id=p, cal_valor=random.randint(1, 5))
+            for p in proyectos
+            for e in random.sample(evaluadores, por_objetivo)
+            for c in criterios
+        ], batch_size=2000)
+
+        recalcular_notas_evento(evento)
+        # bulk_create no envía señales: los contadores de inscripción se cuentan al final
+        reconciliar_contadores([evento.pk])
+        return evento
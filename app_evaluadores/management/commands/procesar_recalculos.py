@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from app_evaluadores.recalculos import tomar_siguiente_recalculo, procesar_recalculo, TAMANO_LOTE
+
+
+class Command(BaseCommand):
+    help = 'Procesa los recálculos de notas encolados al cambiar los pesos de los criterios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true',
+                            help='Seguir esperando nuevos trabajos en lugar de terminar al vaciar la cola')
+        parser.add_argument('--intervalo', type=float, default=5,
+                            help='Segundos de espera entre revisiones de la cola en modo continuo')
+        parser.add_argument('--tamano-lote', type=int, default=TAMANO_LOTE)
+
+    def handle(self, *args, **options):
+        while True:
+            recalculo = tomar_siguiente_recalculo()
+            if recalculo is None:
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            procesar_recalculo(recalculo, options['tamano_lote'])
+            if recalculo.estado == 'completado':
+                self.stdout.write(self.style.SUCCESS(
+                    f'Evento "{recalculo.evento.eve_nombre}": {recalculo.total} objetivo(s) recalculados'
+                ))
+            elif recalculo.estado == 'en_proceso':
+                self.stderr.write(f'Evento "{recalculo.evento.eve_nombre}": lo retomó otro procesador, se detuvo este')
+            else:
+                self.stderr.write(f'Evento "{recalculo.evento.eve_nombre}": error - {recalculo.error}')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from app_eventos.models import Evento
+from app_evaluadores.puntajes import recalcular_notas_evento
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula y guarda las notas ponderadas y los acumulados de calificaciones de un evento, '
+        'o de todos los eventos con criterios si no se indica uno'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('eve_id', type=int, nargs='?', help='ID del evento a recalcular (opcional)')
+
+    def handle(self, *args, **options):
+        if options['eve_id'] is None:
+            eventos = Evento.objects.filter(criterios__isnull=False).distinct().order_by('pk')
+        else:
+            eventos = Evento.objects.filter(pk=options['eve_id'])
+            if not eventos.exists():
+                raise CommandError(f"No existe un evento con ID {options['eve_id']}")
+
+        for evento in eventos:
+            notas_individuales, notas_proyectos = recalcular_notas_evento(evento)
+
+            self.stdout.write(self.style.SUCCESS(
+                f'Evento "{evento.eve_nombre}": {len(notas_individuales)} participante(s) individual(es) '
+                f'y {len(notas_proyectos)} proyecto(s) recalculados'
+            ))
@@ -0,0 +1,134 @@
+"""
+Matriz participante × evaluador × criterio de las calificaciones de un evento.
+
+Todas las calificaciones salen de una sola consulta ordenada y se guardan en un
+arreglo compacto por participante (array de bytes, una celda por par
+evaluador/criterio, 0 = sin calificar), así que el número de consultas no
+depende de cuántos participantes o calificaciones tenga el evento.
+"""
+import csv
+from array import array
+
+from .models import Criterio, Calificacion, Evaluador
+from app_administradores.exportaciones import escapar_formula
+from app_participantes.models import ParticipanteEvento
+
+SIN_CALIFICAR = 0
+
+
+class MatrizCalificaciones:
+    """
+    criterios: [{'id', 'descripcion', 'peso'}]
+    evaluadores: [{'id', 'nombre'}]
+    participantes: [{'id', 'nombre', 'first_name', 'last_name', 'email', 'telefono'}]
+    """
+
+    def __init__(self, criterios, evaluadores, participantes):
+        self.criterios = criterios
+        self.evaluadores = evaluadores
+        self.participantes = participantes
+        self._indice_criterio = {c['id']: i for i, c in enumerate(criterios)}
+        self._indice_evaluador = {e['id']: i for i, e in enumerate(evaluadores)}
+        tamano = len(criterios) * len(evaluadores)
+        self._valores = {p['id']: array('B', bytes(tamano)) for p in participantes}
+
+    def _posicion(self, evaluador_id, criterio_id):
+        return self._indice_evaluador[evaluador_id] * len(self.criterios) + self._indice_criterio[criterio_id]
+
+    def asignar(self, participante_id, evaluador_id, criterio_id, valor):
+        fila = self._valores.get(participante_id)
+        if fila is not None:
+            fila[self._posicion(evaluador_id, criterio_id)] = valor
+
+    def valor(self, participante_id, evaluador_id, criterio_id):
+        valor = self._valores[participante_id][self._posicion(evaluador_id, criterio_id)]
+        return None if valor == SIN_CALIFICAR else valor
+
+    def bloques(self, participante_id):
+        """(evaluador, [valor o None por criterio]) de los evaluadores que calificaron al participante"""
+        fila = self._valores[participante_id]
+        n = len(self.criterios)
+        for i, evaluador in enumerate(self.evaluadores):
+            valores = [v if v != SIN_CALIFICAR else None for v in fila[i * n:(i + 1) * n]]
+            if any(v is not None for v in valores):
+                yield evaluador, valores
+
+    def puntaje_ponderado(self, valores):
+        return sum(v * c['peso'] for v, c in zip(valores, self.criterios) if v is not None) / 100
+
+    def resumen(self, participante_id):
+        """Criterios evaluados, detalle de calificaciones y promedio ponderado del participante"""
+        criterios_evaluados = set()
+        detalle = []
+        total = 0
+        num_evaluadores = 0
+        for evaluador, valores in self.bloques(participante_id):
+            num_evaluadores += 1
+            total += self.puntaje_ponderado(valores)
+            for criterio, valor in zip(self.criterios, valores):
+                if valor is not None:
+                    criterios_evaluados.add(criterio['id'])
+                    detalle.append({'evaluador': evaluador['nombre'], 'criterio': criterio['descripcion'], 'valor': valor})
+        return {
+            'evaluados': len(criterios_evaluados),
+            'calificaciones': detalle,
+            'promedio_ponderado': round(total / num_evaluadores, 2) if num_evaluadores else None,
+        }
+
+    def escribir_csv(self, salida):
+        """
+        Una fila por participante y evaluador, una columna por criterio. Los textos
+        que escriben los usuarios se escapan para que Excel no los ejecute como fórmula.
+        """
+        escritor = csv.writer(salida)
+        escritor.writerow(
+            ['Participante', 'Correo', 'Evaluador']
+            + [escapar_formula(f"{c['descripcion']} ({c['peso']}%)") for c in self.criterios]
+            + ['Puntaje ponderado']
+        )
+        for participante in self.participantes:
+            nombre, email = escapar_formula(participante['nombre']), escapar_formula(participante['email'])
+            for evaluador, valores in self.bloques(participante['id']):
+                escritor.writerow(
+                    [nombre, email, escapar_formula(evaluador['nombre'])]
+                    + ['' if v is None else v for v in valores]
+                    + [round(self.puntaje_ponderado(valores), 2)]
+                )
+
+
+def construir_matriz_calificaciones(evento):
+    """Matriz de calificaciones individuales de los participantes aprobados del evento"""
+    criterios = [
+        {'id': cri_id, 'descripcion': descripcion, 'peso': peso}
+        for cri_id, descripcion, peso in Criterio.objects.filter(cri_evento_fk=evento)
+        .values_list('cri_id', 'cri_descripcion', 'cri_peso').order_by('cri_id')
+    ]
+    participantes = [
+        {
+            'id': participante_id,
+            'nombre': f'{nombre} {apellido}'.strip(),
+            'first_name': nombre,
+            'last_name': apellido,
+            'email': email,
+            'telefono': telefono,
+        }
+        for participante_id, nombre, apellido, email, telefono in ParticipanteEvento.objects.filter(
+            evento=evento, par_eve_estado='Aprobado'
+        ).values_list(
+            'participante_id', 'participante__usuario__first_name', 'participante__usuario__last_name',
+            'participante__usuario__email', 'participante__usuario__telefono',
+        ).order_by('id')
+    ]
+    evaluadores = [
+        {'id': evaluador_id, 'nombre': f'{nombre} {apellido}'.strip()}
+        for evaluador_id, nombre, apellido in Evaluador.objects.filter(
+            calificacion__criterio__cri_evento_fk=evento
+        ).values_list('id', 'usuario__first_name', 'usuario__last_name').distinct().order_by('id')
+    ]
+    matriz = MatrizCalificaciones(criterios, evaluadores, participantes)
+    filas = Calificacion.objects.filter(criterio__cri_evento_fk=evento).values_list(
+        'participante_id', 'evaluador_id', 'criterio_id', 'cal_valor'
+    ).order_by('participante_id', 'evaluador_id', 'criterio_id')
+    for participante_id, evaluador_id, criterio_id, valor in filas.iterator(chunk_size=2000):
+        matriz.asignar(participante_id, evaluador_id, criterio_id, valor)
+    return matriz
@@ -16,8 +16,10 @@ class EvaluadorEvento(models.Model):
     evaluador = models.ForeignKey(Evaluador, on_delete=models.CASCADE)
     evento = models.ForeignKey(Evento, on_delete=models.CASCADE)
     eva_eve_documentos = models.FileField(upload_to='evaluadores/documentos/', null=True, blank=True)
-    eva_eve_fecha_hora = models.DateTimeField()
+    eva_eve_fecha_hora = models.DateTimeField(db_index=True)
     eva_eve_estado = models.CharField(max_length=45)
+    # Primera vez que la inscripción pasó a 'Aprobado'; la sellan las señales de app_eventos
+    eva_eve_fecha_aprobacion = models.DateTimeField(null=True, blank=True, db_index=True)
     eva_eve_qr = models.ImageField(upload_to='evaluadores/qr/', null=True, blank=True)
     confirmado = models.BooleanField(default=False)
     
@@ -28,6 +30,13 @@ class EvaluadorEvento(models.Model):
     class Meta:
         unique_together = (('evaluador', 'evento'),)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado almacenado, usado para mover la inscripción entre los contadores del evento
+        instance._contador_original = (instance.__dict__.get('eva_eve_estado'), instance.__dict__.get('confirmado'))
+        return instance
+
     def __str__(self):
         categoria_info = f" - {self.categoria_evaluacion.cat_nombre}" if self.categoria_evaluacion else ""
         return f"{self.evaluador.usuario.first_name} {self.evaluador.usuario.last_name} - {self.evento.eve_nombre}{categoria_info}"
@@ -50,6 +59,13 @@ class Calificacion(models.Model):
     class Meta:
         unique_together = (('evaluador', 'criterio', 'participante'),)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valor almacenado, usado para calcular el delta del acumulado al modificar
+        instance._cal_valor_original = instance.__dict__.get('cal_valor')
+        return instance
+
 
 class CalificacionProyecto(models.Model):
     """Calificación para proyectos grupales - la nota se aplica a todos los integrantes"""
@@ -62,5 +78,72 @@ class CalificacionProyecto(models.Model):
     class Meta:
         unique_together = (('evaluador', 'criterio', 'proyecto'),)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valor almacenado, usado para calcular el delta del acumulado al modificar
+        instance._cal_valor_original = instance.__dict__.get('cal_valor')
+        return instance
+
     def __str__(self):
         return f"{self.proyecto.nombre_proyecto} - {self.criterio.cri_descripcion}: {self.cal_valor}"
+
+
+class AcumuladoCalificacion(models.Model):
+    """Totales acumulados de calificaciones de un participante o proyecto en un evento.
+    Se actualizan con deltas atómicos en cada escritura de Calificacion/CalificacionProyecto."""
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='acumulados_calificacion')
+    participante = models.ForeignKey(Participante, on_delete=models.CASCADE, null=True, blank=True)
+    proyecto = models.ForeignKey(ProyectoGrupal, on_delete=models.CASCADE, null=True, blank=True)
+    suma_ponderada = models.FloatField(default=0)  # sum(cal_valor * cri_peso)
+    num_evaluadores = models.PositiveIntegerField(default=0)
+    num_criterios = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (('evento', 'participante'), ('evento', 'proyecto'))
+
+    def __str__(self):
+        objetivo = self.proyecto or self.participante
+        return f"{objetivo} - {self.suma_ponderada} ({self.num_evaluadores} evaluadores)"
+
+
+class RecalculoPuntajes(models.Model):
+    """
+    Trabajo en segundo plano que recalcula todas las notas guardadas de un evento
+    (p. ej. al cambiar el peso de un criterio). Lo procesa el comando procesar_recalculos.
+    """
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En proceso'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    ]
+
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='recalculos_puntajes')
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    total = models.PositiveIntegerField(default=0)
+    procesados = models.PositiveIntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    # Lo actualiza el procesador tras cada lote; si se detiene, otro retoma el recálculo
+    latido = models.DateTimeField(null=True, blank=True)
+    # Ficha del procesador que tiene el recálculo: al retomarlo otro, el anterior no escribe notas
+    procesador = models.CharField(max_length=32, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+        ]
+
+    def __str__(self):
+        return f"Recálculo {self.evento.eve_nombre} - {self.get_estado_display()}"
+
+    @property
+    def porcentaje(self):
+        if self.estado == 'completado':
+            return 100
+        if not self.total:
+            return 0
+        return int(self.procesados * 100 / self.total)
@@ -0,0 +1,48 @@
+"""
+Paginación por llave (keyset) de la lista de trabajo del evaluador.
+
+Los objetivos se recorren en dos pasadas ordenadas por id: primero los pendientes
+y luego los ya calificados. El cursor de la página siguiente es la llave del
+último elemento mostrado ('<pasada>-<id>'), así cada página es un WHERE id > n
+sobre la clave primaria, y no un OFFSET que recorre todas las filas anteriores
+ni un ORDER BY sobre una expresión calculada que ningún índice sirve.
+"""
+TAMANO_PAGINA = 50
+
+
+def pendientes_primero(queryset, campo, calificados_ids):
+    """Divide el queryset en las pasadas [pendientes, calificados], cada una ordenada por id"""
+    calificados = {f'{campo}__in': calificados_ids}
+    return [queryset.exclude(**calificados).order_by('id'), queryset.filter(**calificados).order_by('id')]
+
+
+def _leer_cursor(cursor):
+    try:
+        pasada, ultimo_id = (int(parte) for parte in cursor.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    return pasada, ultimo_id
+
+
+def pagina_keyset(pasadas, cursor, tamano=TAMANO_PAGINA):
+    """
+    Retorna (elementos, cursor_siguiente) de las pasadas de pendientes_primero.
+    Cada elemento lleva 'calificado' (el número de su pasada). cursor_siguiente es
+    None en la última página; un cursor inválido lleva a la primera.
+    """
+    inicio, ultimo_id = _leer_cursor(cursor) or (0, 0)
+    elementos = []
+    for pasada in range(max(inicio, 0), len(pasadas)):
+        consulta = pasadas[pasada]
+        if pasada == inicio:
+            consulta = consulta.filter(id__gt=ultimo_id)
+        for elemento in consulta[:tamano + 1 - len(elementos)]:
+            elemento.calificado = pasada
+            elementos.append(elemento)
+        if len(elementos) > tamano:
+            break
+    if len(elementos) <= tamano:
+        return elementos, None
+    elementos = elementos[:tamano]
+    ultimo = elementos[-1]
+    return elementos, f'{ultimo.calificado}-{ultimo.id}'
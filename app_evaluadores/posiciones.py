@@ -0,0 +1,227 @@
+"""
+Tabla de posiciones compartida por las vistas del administrador y del evaluador.
+
+Las notas ya están guardadas en ParticipanteEvento.par_eve_valor y
+ProyectoGrupal.nota_proyecto (las mantiene el motor de puntajes), así que la
+tabla completa sale de una sola consulta sin importar cuántos participantes,
+proyectos o evaluadores tenga el evento. No escribe nada en la base de datos.
+
+Las tablas calculadas se guardan en la caché de Django por (evento, categoría)
+bajo un contador de versión del evento; cualquier cambio de notas incrementa el
+contador (ver signals.py), así que las lecturas son aciertos de caché hasta que
+una nota cambia de verdad. Las notas también las escriben otros procesos
+(procesar_recalculos, recalcular_notas, otros workers): con una caché local al
+proceso (locmem, la de desarrollo) cada proceso solo ve sus propias
+invalidaciones, por eso ahí POSICIONES_CACHE_TIMEOUT es corto por defecto.
+
+Benchmark: python manage.py benchmark_tabla_posiciones
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from app_participantes.models import ParticipanteEvento, ProyectoGrupal
+
+
+def asignar_puestos(posiciones):
+    """
+    Ordena por puntaje descendente y asigna el puesto de competencia
+    (1, 2, 2, 4) en la clave 'puesto' de cada elemento.
+    """
+    posiciones.sort(key=lambda x: x['puntaje'], reverse=True)
+    for i, item in enumerate(posiciones):
+        if i > 0 and item['puntaje'] == posiciones[i - 1]['puntaje']:
+            item['puesto'] = posiciones[i - 1]['puesto']
+        else:
+            item['puesto'] = i + 1
+    return posiciones
+
+
+def construir_tabla_posiciones(evento, categoria=None):
+    """
+    Construye la tabla de posiciones del evento con los participantes aprobados:
+    proyectos grupales (con sus integrantes) e individuales, ordenados por puntaje.
+    Con categoria, solo los individuales y proyectos inscritos en ella.
+    Retorna un diccionario listo para el contexto de las plantillas de posiciones.
+    """
+    # values_list evita instanciar cuatro modelos por fila; las plantillas leen
+    # los diccionarios con la misma notación de puntos
+    participaciones = ParticipanteEvento.objects.filter(
+        evento=evento,
+        par_eve_estado='Aprobado'
+    )
+    if categoria is not None:
+        # Subconsultas por relación: un JOIN a ambas many-to-many multiplicaría las filas
+        participaciones = participaciones.filter(
+            Q(proyecto_grupal__isnull=True, id__in=ParticipanteEvento.categorias.through.objects.filter(
+                categoria=categoria).values('participanteevento_id'))
+            | Q(proyecto_grupal_id__in=ProyectoGrupal.categorias.through.objects.filter(
+                categoria=categoria).values('proyectogrupal_id'))
+        )
+    return _armar_tabla(participaciones.values_list(*CAMPOS_FILA).order_by('id'))
+
+
+CAMPOS_FILA = (
+    'id', 'participante_id', 'par_eve_valor', 'es_lider_proyecto',
+    'participante__usuario__first_name', 'participante__usuario__last_name',
+    'participante__usuario__email',
+    'proyecto_grupal_id', 'proyecto_grupal__nombre_proyecto',
+    'proyecto_grupal__descripcion_proyecto', 'proyecto_grupal__nota_proyecto',
+)
+
+
+def _armar_tabla(filas):
+    """Agrupa filas con los CAMPOS_FILA en proyectos (con integrantes) e individuales y asigna puestos"""
+    proyectos_dict = {}
+    posiciones_individuales = []
+    for (pe_id, participante_id, valor, es_lider, nombre, apellido, email,
+         proyecto_id, nombre_proyecto, descripcion_proyecto, nota_proyecto) in filas:
+        participante = {
+            'id': participante_id,
+            'usuario': {'first_name': nombre, 'last_name': apellido, 'email': email},
+        }
+        if proyecto_id:
+            if proyecto_id not in proyectos_dict:
+                proyectos_dict[proyecto_id] = {
+                    'proyecto': {
+                        'id': proyecto_id,
+                        'nombre_proyecto': nombre_proyecto,
+                        'descripcion_proyecto': descripcion_proyecto,
+                        'nota_proyecto': nota_proyecto,
+                    },
+                    'integrantes': [],
+                    'puntaje': nota_proyecto or 0,
+                }
+            proyectos_dict[proyecto_id]['integrantes'].append({
+                'id': pe_id,
+                'participante': participante,
+                'es_lider_proyecto': es_lider,
+            })
+        else:
+            posiciones_individuales.append({
+                'participante': participante,
+                'participante_evento_id': pe_id,
+                'puntaje': valor or 0,
+            })
+
+    posiciones_proyectos = asignar_puestos(list(proyectos_dict.values()))
+    asignar_puestos(posiciones_individuales)
+
+    return {
+        'posiciones_proyectos': posiciones_proyectos,
+        'posiciones_individuales': posiciones_individuales,
+        'tiene_proyectos': len(posiciones_proyectos) > 0,
+        'tiene_individuales': len(posiciones_individuales) > 0,
+    }
+
+
+def participaciones_por_categoria(participaciones, *campos):
+    """
+    Filas (categoria_id, categoria_nombre, *campos) de cada participación por cada
+    categoría en la que compite: las propias si es individual, las del proyecto si
+    es grupal. Cada many-to-many se consulta por separado y se unen con UNION ALL,
+    así el JOIN de una relación no multiplica las filas de la otra. Sin orden.
+    """
+    individuales = participaciones.filter(
+        proyecto_grupal__isnull=True, categorias__isnull=False
+    ).values_list('categorias', 'categorias__cat_nombre', *campos).order_by()
+    grupales = participaciones.filter(
+        proyecto_grupal__categorias__isnull=False
+    ).values_list('proyecto_grupal__categorias', 'proyecto_grupal__categorias__cat_nombre', *campos).order_by()
+    return individuales.union(grupales, all=True)
+
+
+def construir_posiciones_por_categoria(evento):
+    """
+    Tablas de posiciones de cada categoría de un evento multidisciplinario en una
+    sola consulta: cada participación aprobada sale una vez por categoría (ver
+    participaciones_por_categoria) y se agrupa en memoria.
+    Retorna una lista ordenada por nombre de categoría de tablas de posiciones con
+    las claves extra 'categoria' ({'id', 'nombre'}) y 'total'.
+    """
+    filas = sorted(
+        participaciones_por_categoria(
+            ParticipanteEvento.objects.filter(evento=evento, par_eve_estado='Aprobado'), *CAMPOS_FILA
+        ),
+        key=lambda fila: (fila[1], fila[0], fila[2]),
+    )
+
+    agrupadas = {}
+    for categoria_id, categoria_nombre, *fila in filas:
+        agrupadas.setdefault((categoria_id, categoria_nombre), []).append(fila)
+    tablas = []
+    for (categoria_id, categoria_nombre), filas_categoria in agrupadas.items():
+        tabla = _armar_tabla(filas_categoria)
+        tabla['categoria'] = {'id': categoria_id, 'nombre': categoria_nombre}
+        tabla['total'] = len(tabla['posiciones_proyectos']) + len(tabla['posiciones_individuales'])
+        tablas.append(tabla)
+    return tablas
+
+
+# ===============================
+# CACHÉ VERSIONADA
+# ===============================
+
+# Backends cuyo contenido vive en un solo proceso: no ven las invalidaciones de los demás
+CACHES_LOCALES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_compartida():
+    """True si la caché por defecto la comparten todos los procesos (redis, memcached, base de datos...)"""
+    return settings.CACHES['default']['BACKEND'] not in CACHES_LOCALES
+
+
+def _clave_version(evento_id):
+    return f'posiciones:version:{evento_id}'
+
+
+def version_posiciones(evento_id):
+    """
+    Versión actual de las posiciones del evento. Si la clave no existe (o fue
+    desalojada) se inicia con la hora actual para no reutilizar versiones viejas.
+    """
+    return cache.get_or_set(_clave_version(evento_id), time.time_ns(), None)
+
+
+def _incrementar_version(evento_id):
+    try:
+        cache.incr(_clave_version(evento_id))
+    except ValueError:
+        cache.set(_clave_version(evento_id), time.time_ns(), None)
+
+
+def invalidar_posiciones(evento_id):
+    """
+    Incrementa la versión del evento al confirmar la transacción actual: las
+    tablas en caché dejan de usarse y nadie cachea datos sin confirmar como nuevos.
+    """
+    transaction.on_commit(lambda: _incrementar_version(evento_id))
+
+
+def obtener_tabla_posiciones(evento, categoria=None):
+    """construir_tabla_posiciones servida desde la caché mientras la versión no cambie"""
+    evento_id = getattr(evento, 'pk', evento)
+    categoria_id = getattr(categoria, 'pk', categoria)
+    clave = f"posiciones:{evento_id}:{categoria_id or 'todas'}:{version_posiciones(evento_id)}"
+    tabla = cache.get(clave)
+    if tabla is None:
+        tabla = construir_tabla_posiciones(evento, categoria)
+        cache.set(clave, tabla, settings.POSICIONES_CACHE_TIMEOUT)
+    return tabla
+
+
+def obtener_posiciones_por_categoria(evento):
+    """construir_posiciones_por_categoria servida desde la caché mientras la versión no cambie"""
+    evento_id = getattr(evento, 'pk', evento)
+    clave = f"posiciones:{evento_id}:por_categoria:{version_posiciones(evento_id)}"
+    tablas = cache.get(clave)
+    if tablas is None:
+        tablas = construir_posiciones_por_categoria(evento)
+        cache.set(clave, tablas, settings.POSICIONES_CACHE_TIMEOUT)
+    return tablas
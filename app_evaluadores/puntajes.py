@@ -0,0 +1,330 @@
+"""
+Motor de puntajes: calcula las notas ponderadas de un evento completo con
+agregados agrupados en SQL en lugar de recorrer calificaciones en Python.
+
+La nota de un participante (o proyecto) es:
+    sum(cal_valor * cri_peso) / (peso_total_criterios * num_evaluadores)
+
+Además mantiene AcumuladoCalificacion: los totales acumulados por objetivo
+que permiten actualizar la nota en O(1) con cada calificación guardada, y los
+puestos persistidos (ParticipanteEvento.par_eve_puesto y PuestoCategoria).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import Rank
+
+from .models import Criterio, Calificacion, CalificacionProyecto, AcumuladoCalificacion, RecalculoPuntajes
+from .posiciones import invalidar_posiciones, participaciones_por_categoria
+from app_participantes.models import ParticipanteEvento, ProyectoGrupal, PuestoCategoria
+
+
+def obtener_peso_total(evento):
+    """Suma de los pesos de los criterios del evento (1 si no hay criterios)"""
+    peso_total = Criterio.objects.filter(cri_evento_fk=evento).aggregate(
+        total=Sum('cri_peso')
+    )['total']
+    return peso_total or 1
+
+
+def calcular_nota(suma_ponderada, num_evaluadores, peso_total):
+    """Aplica la fórmula de nota ponderada; None si nadie ha calificado"""
+    if not num_evaluadores:
+        return None
+    return round(suma_ponderada / (peso_total * num_evaluadores), 2)
+
+
+def agregados_individuales(evento, participantes_ids=None):
+    """
+    Un único SELECT agrupado por participante con la suma ponderada y el
+    número de evaluadores y criterios distintos.
+    Retorna {participante_id: (suma_ponderada, num_evaluadores, num_criterios)}
+    """
+    calificaciones = Calificacion.objects.filter(criterio__cri_evento_fk=evento)
+    if participantes_ids is not None:
+        calificaciones = calificaciones.filter(participante_id__in=participantes_ids)
+    filas = calificaciones.values('participante_id').annotate(
+        suma=Sum(F('cal_valor') * F('criterio__cri_peso')),
+        evaluadores=Count('evaluador_id', distinct=True),
+        criterios=Count('criterio_id', distinct=True),
+    ).order_by()
+    return {f['participante_id']: (f['suma'] or 0, f['evaluadores'], f['criterios']) for f in filas}
+
+
+def agregados_proyectos(evento, proyectos_ids=None):
+    """
+    Igual que agregados_individuales pero para proyectos grupales.
+    Retorna {proyecto_id: (suma_ponderada, num_evaluadores, num_criterios)}
+    """
+    calificaciones = CalificacionProyecto.objects.filter(criterio__cri_evento_fk=evento)
+    if proyectos_ids is not None:
+        calificaciones = calificaciones.filter(proyecto_id__in=proyectos_ids)
+    filas = calificaciones.values('proyecto_id').annotate(
+        suma=Sum(F('cal_valor') * F('criterio__cri_peso')),
+        evaluadores=Count('evaluador_id', distinct=True),
+        criterios=Count('criterio_id', distinct=True),
+    ).order_by()
+    return {f['proyecto_id']: (f['suma'] or 0, f['evaluadores'], f['criterios']) for f in filas}
+
+
+def calcular_notas_evento(evento, participantes_ids=None, proyectos_ids=None):
+    """
+    Calcula (sin guardar) las notas de todo el evento o de los objetivos indicados.
+    Retorna (notas_individuales, notas_proyectos) como diccionarios id -> nota.
+    """
+    notas_individuales, notas_proyectos, _, _ = _calcular_evento(evento, participantes_ids, proyectos_ids)
+    return notas_individuales, notas_proyectos
+
+
+def _calcular_evento(evento, participantes_ids=None, proyectos_ids=None):
+    peso_total = obtener_peso_total(evento)
+    agregados_ind = agregados_individuales(evento, participantes_ids)
+    agregados_proy = agregados_proyectos(evento, proyectos_ids)
+    notas_individuales = {
+        pid: calcular_nota(suma, evaluadores, peso_total)
+        for pid, (suma, evaluadores, _) in agregados_ind.items()
+    }
+    notas_proyectos = {
+        pid: calcular_nota(suma, evaluadores, peso_total)
+        for pid, (suma, evaluadores, _) in agregados_proy.items()
+    }
+    return notas_individuales, notas_proyectos, agregados_ind, agregados_proy
+
+
+def guardar_notas_evento(evento, notas_individuales, notas_proyectos):
+    """
+    Escribe las notas calculadas en ParticipanteEvento.par_eve_valor y
+    ProyectoGrupal.nota_proyecto con actualizaciones masivas.
+    Los integrantes de un proyecto reciben la nota del proyecto.
+    """
+    with transaction.atomic():
+        proyectos = [
+            ProyectoGrupal(id=pid, nota_proyecto=nota)
+            for pid, nota in notas_proyectos.items()
+        ]
+        ProyectoGrupal.objects.bulk_update(proyectos, ['nota_proyecto'], batch_size=500)
+
+        participaciones = []
+        if notas_individuales:
+            for pe_id, participante_id in ParticipanteEvento.objects.filter(
+                evento=evento, participante_id__in=notas_individuales.keys()
+            ).values_list('id', 'participante_id'):
+                participaciones.append(
+                    ParticipanteEvento(id=pe_id, par_eve_valor=notas_individuales[participante_id])
+                )
+        if notas_proyectos:
+            for pe_id, proyecto_id in ParticipanteEvento.objects.filter(
+                evento=evento, proyecto_grupal_id__in=notas_proyectos.keys()
+            ).values_list('id', 'proyecto_grupal_id'):
+                participaciones.append(
+                    ParticipanteEvento(id=pe_id, par_eve_valor=notas_proyectos[proyecto_id])
+                )
+        ParticipanteEvento.objects.bulk_update(participaciones, ['par_eve_valor'], batch_size=500)
+        invalidar_posiciones(getattr(evento, 'pk', evento))
+    return len(participaciones)
+
+
+def limpiar_notas_sin_calificaciones(evento, notas_individuales, notas_proyectos):
+    """
+    Deja en None la nota de los objetivos del evento que ya no tienen
+    calificaciones (p. ej. tras eliminar un criterio). Solo para recálculos completos.
+    """
+    sin_nota = [
+        pe_id
+        for pe_id, participante_id, proyecto_id in ParticipanteEvento.objects.filter(
+            evento=evento, par_eve_valor__isnull=False
+        ).values_list('id', 'participante_id', 'proyecto_grupal_id')
+        if (proyecto_id not in notas_proyectos if proyecto_id else participante_id not in notas_individuales)
+    ]
+    ParticipanteEvento.objects.filter(id__in=sin_nota).update(par_eve_valor=None)
+    ProyectoGrupal.objects.filter(evento=evento, nota_proyecto__isnull=False).exclude(
+        id__in=list(notas_proyectos.keys())
+    ).update(nota_proyecto=None)
+    invalidar_posiciones(getattr(evento, 'pk', evento))
+
+
+def guardar_acumulados(evento, agregados_ind, agregados_proy, participantes_ids=None, proyectos_ids=None):
+    """
+    Sincroniza las filas de AcumuladoCalificacion con los agregados (de todo el evento
+    o solo de los objetivos indicados): actualiza las existentes, crea las que faltan y
+    borra las de objetivos sin calificaciones. Las filas se actualizan en su lugar, no
+    se borran y reinsertan, para que un delta que espera el bloqueo de la fila se sume
+    después al valor nuevo.
+    """
+    with transaction.atomic():
+        acumulados = AcumuladoCalificacion.objects.filter(evento=evento)
+        if participantes_ids is not None or proyectos_ids is not None:
+            acumulados = acumulados.filter(
+                Q(participante_id__in=participantes_ids or []) | Q(proyecto_id__in=proyectos_ids or [])
+            )
+        pendientes = {('participante', pid): valores for pid, valores in agregados_ind.items()}
+        pendientes.update({('proyecto', pid): valores for pid, valores in agregados_proy.items()})
+
+        actualizar, sobrantes = [], []
+        for acumulado in acumulados.select_for_update():
+            if acumulado.proyecto_id:
+                clave = ('proyecto', acumulado.proyecto_id)
+            else:
+                clave = ('participante', acumulado.participante_id)
+            valores = pendientes.pop(clave, None)
+            if valores is None:
+                sobrantes.append(acumulado.id)
+                continue
+            acumulado.suma_ponderada, acumulado.num_evaluadores, acumulado.num_criterios = valores
+            actualizar.append(acumulado)
+        AcumuladoCalificacion.objects.filter(id__in=sobrantes).delete()
+        AcumuladoCalificacion.objects.bulk_update(
+            actualizar, ['suma_ponderada', 'num_evaluadores', 'num_criterios'], batch_size=500
+        )
+        AcumuladoCalificacion.objects.bulk_create([
+            AcumuladoCalificacion(
+                evento=evento, suma_ponderada=suma, num_evaluadores=evaluadores, num_criterios=criterios,
+                **{f'{tipo}_id': pid},
+            )
+            for (tipo, pid), (suma, evaluadores, criterios) in pendientes.items()
+        ], batch_size=500)
+
+
+def recalcular_notas_evento(evento, participantes_ids=None, proyectos_ids=None):
+    """
+    Recalcula y guarda las notas del evento (o solo de los objetivos indicados)
+    y reconstruye sus acumulados.
+    Retorna (notas_individuales, notas_proyectos).
+    """
+    notas_individuales, notas_proyectos, agregados_ind, agregados_proy = _calcular_evento(
+        evento, participantes_ids, proyectos_ids
+    )
+    with transaction.atomic():
+        guardar_acumulados(evento, agregados_ind, agregados_proy, participantes_ids, proyectos_ids)
+        guardar_notas_evento(evento, notas_individuales, notas_proyectos)
+        if participantes_ids is None and proyectos_ids is None:
+            limpiar_notas_sin_calificaciones(evento, notas_individuales, notas_proyectos)
+        recalcular_puestos_evento(evento)
+    return notas_individuales, notas_proyectos
+
+
+# ===============================
+# PUESTOS
+# ===============================
+
+def _participaciones_clasificadas(evento):
+    return ParticipanteEvento.objects.filter(
+        evento=evento, par_eve_estado='Aprobado', par_eve_valor__isnull=False
+    ).order_by()
+
+
+def recalcular_puestos_evento(evento):
+    """
+    Recalcula los puestos de competencia (1, 2, 2, 4) del evento con RANK() OVER
+    (PARTITION BY ...) y los de cada categoría, y escribe solo los que cambiaron.
+    Las participaciones sin nota o no aprobadas quedan sin puesto.
+    """
+    # El puesto nuevo y el guardado salen en la misma consulta
+    cambios = [
+        ParticipanteEvento(id=pe_id, par_eve_puesto=puesto)
+        for pe_id, puesto, actual in _participaciones_clasificadas(evento).annotate(
+            puesto=Window(Rank(), partition_by=[F('evento_id')], order_by=F('par_eve_valor').desc())
+        ).values_list('id', 'puesto', 'par_eve_puesto')
+        if puesto != actual
+    ]
+
+    # Los integrantes de un proyecto compiten en las categorías del proyecto; el
+    # RANK por categoría se asigna aquí porque las filas vienen de un UNION
+    puestos_categoria = {}
+    anterior = None
+    filas = sorted(
+        participaciones_por_categoria(_participaciones_clasificadas(evento), 'id', 'par_eve_valor'),
+        key=lambda fila: (fila[0], -fila[3]),
+    )
+    for posicion, (categoria_id, _, pe_id, valor) in enumerate(filas):
+        if anterior is None or anterior[0] != categoria_id:
+            inicio = posicion
+            puesto = 1
+        elif anterior[1] != valor:
+            puesto = posicion - inicio + 1
+        puestos_categoria[(pe_id, categoria_id)] = puesto
+        anterior = (categoria_id, valor)
+
+    with transaction.atomic():
+        ParticipanteEvento.objects.bulk_update(cambios, ['par_eve_puesto'], batch_size=500)
+        sin_puesto = ParticipanteEvento.objects.filter(evento=evento, par_eve_puesto__isnull=False).exclude(
+            par_eve_estado='Aprobado', par_eve_valor__isnull=False
+        ).update(par_eve_puesto=None)
+
+        actualizar, sobrantes = [], []
+        for registro_id, pe_id, categoria_id, actual in PuestoCategoria.objects.filter(
+            participante_evento__evento=evento
+        ).values_list('id', 'participante_evento_id', 'categoria_id', 'puesto'):
+            puesto = puestos_categoria.pop((pe_id, categoria_id), None)
+            if puesto is None:
+                sobrantes.append(registro_id)
+            elif puesto != actual:
+                actualizar.append(PuestoCategoria(id=registro_id, puesto=puesto))
+        PuestoCategoria.objects.filter(id__in=sobrantes).delete()
+        PuestoCategoria.objects.bulk_update(actualizar, ['puesto'], batch_size=500)
+        PuestoCategoria.objects.bulk_create([
+            PuestoCategoria(participante_evento_id=pe_id, categoria_id=categoria_id, puesto=puesto)
+            for (pe_id, categoria_id), puesto in puestos_categoria.items()
+        ], batch_size=500)
+    return len(cambios) + sin_puesto
+
+
+# ===============================
+# ACUMULADOS INCREMENTALES
+# ===============================
+
+def aplicar_delta_acumulado(evento_id, participante_id=None, proyecto_id=None,
+                            suma=0, evaluadores=0, criterios=0,
+                            num_evaluadores=None, num_criterios=None):
+    """
+    Suma los deltas al acumulado del objetivo con expresiones F() (un UPDATE atómico).
+    num_evaluadores/num_criterios fijan el conteo en lugar de sumar un delta
+    (se usa al eliminar). Si la fila aún no existe se crea, salvo al eliminar.
+    """
+    acumulado = AcumuladoCalificacion.objects.filter(
+        evento_id=evento_id, participante_id=participante_id, proyecto_id=proyecto_id
+    )
+    cambios = {
+        'suma_ponderada': F('suma_ponderada') + suma,
+        'num_evaluadores': F('num_evaluadores') + evaluadores if num_evaluadores is None else num_evaluadores,
+        'num_criterios': F('num_criterios') + criterios if num_criterios is None else num_criterios,
+    }
+    if acumulado.update(**cambios) or suma < 0 or num_evaluadores is not None:
+        return
+    try:
+        with transaction.atomic():
+            AcumuladoCalificacion.objects.create(
+                evento_id=evento_id, participante_id=participante_id, proyecto_id=proyecto_id,
+                suma_ponderada=suma, num_evaluadores=evaluadores, num_criterios=criterios,
+            )
+    except IntegrityError:
+        # Otra petición creó la fila al mismo tiempo
+        acumulado.update(**cambios)
+
+
+def actualizar_nota_desde_acumulado(evento_id, participante_id=None, proyecto_id=None):
+    """
+    Recalcula la nota del objetivo leyendo solo su fila acumulada y la suma de pesos,
+    sin importar cuántos evaluadores lo hayan calificado.
+
+    Mientras el evento tiene un recálculo pendiente o en proceso el acumulado puede
+    sumar valores con pesos viejos y nuevos: la nota no se toca (retorna None) y la
+    escribe el recálculo, que vuelve a agregar los objetivos calificados entretanto.
+    """
+    if RecalculoPuntajes.objects.filter(evento_id=evento_id, estado__in=['pendiente', 'en_proceso']).exists():
+        return None
+    acumulado = AcumuladoCalificacion.objects.filter(
+        evento_id=evento_id, participante_id=participante_id, proyecto_id=proyecto_id
+    ).values_list('suma_ponderada', 'num_evaluadores').first()
+    suma, evaluadores = acumulado or (0, 0)
+    nota = calcular_nota(suma, evaluadores, obtener_peso_total(evento_id))
+
+    if proyecto_id is not None:
+        ProyectoGrupal.objects.filter(pk=proyecto_id).update(nota_proyecto=nota)
+        ParticipanteEvento.objects.filter(
+            evento_id=evento_id, proyecto_grupal_id=proyecto_id
+        ).update(par_eve_valor=nota)
+    else:
+        ParticipanteEvento.objects.filter(
+            evento_id=evento_id, participante_id=participante_id
+        ).update(par_eve_valor=nota)
+    return nota
@@ -0,0 +1,214 @@
+"""
+Recálculo en segundo plano de las notas guardadas de un evento.
+
+Las vistas solo encolan un RecalculoPuntajes; el comando procesar_recalculos
+calcula los agregados por lotes (actualizando el progreso) y al final escribe
+todas las notas, acumulados y puestos en una sola transacción, de modo que las
+tablas de posiciones nunca mezclan notas con pesos viejos y nuevos. Cada toma
+del recálculo lleva una ficha (procesador) y un latido por lote; un recálculo sin
+latido se considera abandonado y lo retoma otro procesador, y el anterior se
+detiene sin escribir notas.
+"""
+import uuid
+from datetime import timedelta
+
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import RecalculoPuntajes, Calificacion, CalificacionProyecto, AcumuladoCalificacion
+from .puntajes import (
+    obtener_peso_total, calcular_nota, agregados_individuales, agregados_proyectos,
+    guardar_acumulados, guardar_notas_evento, limpiar_notas_sin_calificaciones, recalcular_puestos_evento,
+)
+
+TAMANO_LOTE = 500
+
+# Un recálculo 'en_proceso' sin latido en este tiempo se considera abandonado
+TIEMPO_ABANDONO = timedelta(minutes=10)
+
+
+def encolar_recalculo(evento):
+    """
+    Encola el recálculo del evento. Si ya hay uno pendiente se reutiliza,
+    así varios cambios seguidos de pesos generan un solo trabajo.
+    """
+    recalculo = RecalculoPuntajes.objects.filter(evento=evento, estado='pendiente').first()
+    if recalculo is None:
+        recalculo = RecalculoPuntajes.objects.create(evento=evento)
+    return recalculo
+
+
+def recalculo_activo(evento):
+    """Último recálculo pendiente o en proceso del evento (None si no hay)"""
+    return RecalculoPuntajes.objects.filter(
+        evento=evento, estado__in=['pendiente', 'en_proceso']
+    ).order_by('-fecha_creacion').first()
+
+
+def estado_recalculo(evento):
+    """Resumen serializable del último recálculo del evento, para la barra de progreso"""
+    recalculo = RecalculoPuntajes.objects.filter(evento=evento).order_by('-fecha_creacion').first()
+    if recalculo is None:
+        return {'estado': None}
+    return {
+        'estado': recalculo.estado,
+        'estado_display': recalculo.get_estado_display(),
+        'total': recalculo.total,
+        'procesados': recalculo.procesados,
+        'porcentaje': recalculo.porcentaje,
+        'error': recalculo.error,
+    }
+
+
+def tomar_siguiente_recalculo():
+    """
+    Marca como 'en_proceso' el recálculo pendiente más antiguo (o uno abandonado
+    por un procesador que se detuvo) y lo retorna.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        recalculo = RecalculoPuntajes.objects.select_for_update(skip_locked=True).filter(
+            Q(estado='pendiente') | Q(estado='en_proceso', latido__lt=ahora - TIEMPO_ABANDONO)
+        ).order_by('fecha_creacion').first()
+        if recalculo is None:
+            return None
+        recalculo.estado = 'en_proceso'
+        recalculo.fecha_inicio = recalculo.fecha_inicio or ahora
+        recalculo.latido = ahora
+        recalculo.procesador = uuid.uuid4().hex
+        recalculo.save(update_fields=['estado', 'fecha_inicio', 'latido', 'procesador'])
+    return recalculo
+
+
+def _renovar_latido(recalculo, *campos):
+    """
+    Actualiza el latido (y los campos indicados) si el recálculo sigue en manos de
+    este procesador; False si otro lo retomó.
+    """
+    recalculo.latido = timezone.now()
+    return RecalculoPuntajes.objects.filter(
+        pk=recalculo.pk, estado='en_proceso', procesador=recalculo.procesador
+    ).update(latido=recalculo.latido, **{campo: getattr(recalculo, campo) for campo in campos}) > 0
+
+
+def _marcar_error(recalculo, error):
+    """Deja el recálculo con error, salvo que ya lo tenga otro procesador"""
+    recalculo.estado = 'error'
+    recalculo.error = error
+    recalculo.fecha_fin = timezone.now()
+    RecalculoPuntajes.objects.filter(pk=recalculo.pk, procesador=recalculo.procesador).update(
+        estado=recalculo.estado, error=recalculo.error, fecha_fin=recalculo.fecha_fin
+    )
+
+
+def _lotes(ids, tamano):
+    for inicio in range(0, len(ids), tamano):
+        yield ids[inicio:inicio + tamano]
+
+
+def _acumulados(evento, bloquear=False, **filtros):
+    """Estado de AcumuladoCalificacion por objetivo: {('participante'|'proyecto', id): (suma, evaluadores, criterios)}"""
+    acumulados = AcumuladoCalificacion.objects.filter(evento=evento, **filtros)
+    if bloquear:
+        acumulados = acumulados.select_for_update()
+    return {
+        ('proyecto', proyecto_id) if proyecto_id else ('participante', participante_id): (suma, evaluadores, criterios)
+        for participante_id, proyecto_id, suma, evaluadores, criterios in acumulados.values_list(
+            'participante_id', 'proyecto_id', 'suma_ponderada', 'num_evaluadores', 'num_criterios'
+        )
+    }
+
+
+def procesar_recalculo(recalculo, tamano_lote=TAMANO_LOTE):
+    """
+    Calcula los agregados del evento por lotes de objetivos guardando el progreso
+    y luego escribe todas las notas de una vez.
+
+    Cada lote lee sus agregados junto con los acumulados del mismo momento. Como
+    cada calificación se guarda en la misma transacción que su delta, un acumulado
+    que cambió desde entonces delata un objetivo calificado mientras corría el
+    trabajo: en la transacción final se bloquean los acumulados del evento y esos
+    objetivos se vuelven a agregar antes de escribir.
+
+    Si otro procesador retoma el recálculo, este se detiene sin tocar su estado.
+    """
+    evento = recalculo.evento
+    try:
+        participantes_ids = list(
+            Calificacion.objects.filter(criterio__cri_evento_fk=evento)
+            .values_list('participante_id', flat=True).distinct().order_by('participante_id')
+        )
+        proyectos_ids = list(
+            CalificacionProyecto.objects.filter(criterio__cri_evento_fk=evento)
+            .values_list('proyecto_id', flat=True).distinct().order_by('proyecto_id')
+        )
+        recalculo.total = len(participantes_ids) + len(proyectos_ids)
+        recalculo.procesados = 0
+        if not _renovar_latido(recalculo, 'total', 'procesados'):
+            return recalculo
+
+        agregados_ind, agregados_proy, leidos = {}, {}, {}
+        for lote in _lotes(participantes_ids, tamano_lote):
+            with transaction.atomic():
+                agregados_ind.update(agregados_individuales(evento, lote))
+                leidos.update(_acumulados(evento, participante_id__in=lote))
+            recalculo.procesados += len(lote)
+            if not _renovar_latido(recalculo, 'procesados'):
+                return recalculo
+        for lote in _lotes(proyectos_ids, tamano_lote):
+            with transaction.atomic():
+                agregados_proy.update(agregados_proyectos(evento, lote))
+                leidos.update(_acumulados(evento, proyecto_id__in=lote))
+            recalculo.procesados += len(lote)
+            if not _renovar_latido(recalculo, 'procesados'):
+                return recalculo
+
+        # Todas las notas cambian juntas: nadie ve pesos mezclados
+        with transaction.atomic():
+            # Bloquear el trabajo impide que otro procesador lo retome mientras se escriben las notas
+            if not RecalculoPuntajes.objects.select_for_update().filter(
+                pk=recalculo.pk, estado='en_proceso', procesador=recalculo.procesador
+            ).exists():
+                return recalculo
+            actuales = _acumulados(evento, bloquear=True)
+            cambiados = {clave for clave in actuales.keys() | leidos.keys() if actuales.get(clave) != leidos.get(clave)}
+            cambiados_ind = [pid for tipo, pid in cambiados if tipo == 'participante']
+            cambiados_proy = [pid for tipo, pid in cambiados if tipo == 'proyecto']
+            if cambiados_ind:
+                for pid in cambiados_ind:
+                    agregados_ind.pop(pid, None)
+                agregados_ind.update(agregados_individuales(evento, cambiados_ind))
+            if cambiados_proy:
+                for pid in cambiados_proy:
+                    agregados_proy.pop(pid, None)
+                agregados_proy.update(agregados_proyectos(evento, cambiados_proy))
+
+            peso_total = obtener_peso_total(evento)
+            notas_individuales = {
+                pid: calcular_nota(suma, evaluadores, peso_total)
+                for pid, (suma, evaluadores, _) in agregados_ind.items()
+            }
+            notas_proyectos = {
+                pid: calcular_nota(suma, evaluadores, peso_total)
+                for pid, (suma, evaluadores, _) in agregados_proy.items()
+            }
+            guardar_acumulados(evento, agregados_ind, agregados_proy)
+            guardar_notas_evento(evento, notas_individuales, notas_proyectos)
+            limpiar_notas_sin_calificaciones(evento, notas_individuales, notas_proyectos)
+            recalcular_puestos_evento(evento)
+
+            # Se marca completado junto con las notas: una calificación que esperaba el
+            # bloqueo de su acumulado ya encuentra el trabajo terminado y escribe su nota
+            recalculo.estado = 'completado'
+            recalculo.fecha_fin = timezone.now()
+            recalculo.save(update_fields=['estado', 'fecha_fin'])
+        return recalculo
+    except DatabaseError as e:
+        _marcar_error(recalculo, str(e))
+    except Exception as e:
+        # Un error de programación no debe quedar como un simple estado del trabajo
+        _marcar_error(recalculo, str(e))
+        raise
+    return recalculo
+
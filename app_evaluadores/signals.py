@@ -0,0 +1,149 @@
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Calificacion, CalificacionProyecto, Criterio
+from .puntajes import aplicar_delta_acumulado, actualizar_nota_desde_acumulado, recalcular_puestos_evento
+from .posiciones import invalidar_posiciones
+from app_eventos.models import Evento
+from app_participantes.models import Participante, ParticipanteEvento, ProyectoGrupal
+
+
+def _objetivo(instance):
+    """
+    Retorna (participante_id, proyecto_id, filtro) del objetivo calificado.
+    El filtro se limita al evento del criterio: el mismo participante o evaluador
+    puede tener calificaciones en otros eventos.
+    """
+    evento_id = instance.criterio.cri_evento_fk_id
+    if isinstance(instance, CalificacionProyecto):
+        return None, instance.proyecto_id, {
+            'proyecto_id': instance.proyecto_id, 'criterio__cri_evento_fk_id': evento_id,
+        }
+    return instance.participante_id, None, {
+        'participante_id': instance.participante_id, 'criterio__cri_evento_fk_id': evento_id,
+    }
+
+
+def _otras_calificaciones(instance, filtro):
+    return type(instance).objects.filter(**filtro).exclude(pk=instance.pk)
+
+
+def _recalcular_puestos(evento_id, origin):
+    """
+    Recalcula los puestos del evento. En un borrado en cascada (p. ej. al eliminar un
+    evaluador o un usuario) o masivo llega una señal por calificación: los eventos se
+    reúnen en el objeto que originó el borrado y cada uno se reordena una sola vez al confirmar.
+    """
+    if origin is None or isinstance(origin, (Calificacion, CalificacionProyecto)):
+        recalcular_puestos_evento(evento_id)
+        return
+    pendientes = origin.__dict__.setdefault('_eventos_por_reordenar', set())
+    if evento_id in pendientes:
+        return
+    pendientes.add(evento_id)
+
+    def reordenar():
+        pendientes.discard(evento_id)
+        recalcular_puestos_evento(evento_id)
+    transaction.on_commit(reordenar)
+
+
+@receiver(post_save, sender=Calificacion)
+@receiver(post_save, sender=CalificacionProyecto)
+def acumular_calificacion_guardada(sender, instance, created, **kwargs):
+    """Aplica el delta de la calificación creada o modificada al acumulado y actualiza la nota"""
+    criterio = instance.criterio
+    participante_id, proyecto_id, filtro = _objetivo(instance)
+    original = getattr(instance, '_cal_valor_original', None)
+    instance._cal_valor_original = instance.cal_valor
+
+    if created:
+        otras = _otras_calificaciones(instance, filtro)
+        evaluadores = 0 if otras.filter(evaluador_id=instance.evaluador_id).exists() else 1
+        criterios = 0 if otras.filter(criterio_id=instance.criterio_id).exists() else 1
+        suma = instance.cal_valor * criterio.cri_peso
+    else:
+        if original is None or original == instance.cal_valor:
+            return
+        evaluadores = criterios = 0
+        suma = (instance.cal_valor - original) * criterio.cri_peso
+
+    aplicar_delta_acumulado(
+        criterio.cri_evento_fk_id, participante_id, proyecto_id,
+        suma=suma, evaluadores=evaluadores, criterios=criterios,
+    )
+    actualizar_nota_desde_acumulado(criterio.cri_evento_fk_id, participante_id, proyecto_id)
+
+
+@receiver(post_delete, sender=Calificacion)
+@receiver(post_delete, sender=CalificacionProyecto)
+def descontar_calificacion_eliminada(sender, instance, origin=None, **kwargs):
+    """Resta la calificación eliminada del acumulado y actualiza la nota"""
+    # Si se elimina el evento, el participante o el proyecto, el acumulado se borra en cascada;
+    # si se elimina un criterio, todas las notas cambian y se recalculan en segundo plano
+    if isinstance(origin, (Evento, Participante, ProyectoGrupal, Criterio)):
+        return
+    criterio = instance.criterio
+    participante_id, proyecto_id, filtro = _objetivo(instance)
+    # En un borrado masivo todas las filas ya no existen cuando llegan las señales,
+    # por eso los conteos se toman de las calificaciones que quedan
+    restantes = type(instance).objects.filter(**filtro).aggregate(
+        evaluadores=Count('evaluador_id', distinct=True),
+        criterios=Count('criterio_id', distinct=True),
+    )
+
+    aplicar_delta_acumulado(
+        criterio.cri_evento_fk_id, participante_id, proyecto_id,
+        suma=-(instance.cal_valor * criterio.cri_peso),
+        num_evaluadores=restantes['evaluadores'], num_criterios=restantes['criterios'],
+    )
+    actualizar_nota_desde_acumulado(criterio.cri_evento_fk_id, participante_id, proyecto_id)
+    _recalcular_puestos(criterio.cri_evento_fk_id, origin)
+
+
+# ===============================
+# PUESTOS AL CAMBIAR UNA INSCRIPCIÓN
+# ===============================
+
+@receiver(post_save, sender=ParticipanteEvento)
+def reordenar_por_cambio_de_estado(sender, instance, created, **kwargs):
+    """Aprobar, rechazar o devolver a Pendiente una inscripción cambia quién tiene puesto"""
+    original = getattr(instance, '_par_eve_estado_original', None)
+    instance._par_eve_estado_original = instance.par_eve_estado
+    if created or original is None or original == instance.par_eve_estado:
+        return
+    _recalcular_puestos(instance.evento_id, instance)
+
+
+@receiver(post_delete, sender=ParticipanteEvento)
+def reordenar_por_inscripcion_eliminada(sender, instance, origin=None, **kwargs):
+    """Una inscripción eliminada con puesto deja un hueco en la clasificación del evento"""
+    # Si se elimina el evento sus inscripciones se borran todas
+    if isinstance(origin, Evento) or instance.par_eve_puesto is None:
+        return
+    _recalcular_puestos(instance.evento_id, origin or instance)
+
+
+# ===============================
+# INVALIDACIÓN DE LA CACHÉ DE POSICIONES
+# ===============================
+
+@receiver(post_save, sender=Calificacion)
+@receiver(post_delete, sender=Calificacion)
+@receiver(post_save, sender=CalificacionProyecto)
+@receiver(post_delete, sender=CalificacionProyecto)
+def invalidar_posiciones_calificacion(sender, instance, origin=None, **kwargs):
+    # En borrados en cascada la señal del objeto eliminado ya invalida el evento
+    if isinstance(origin, (Evento, Participante, ProyectoGrupal, Criterio)):
+        return
+    invalidar_posiciones(instance.criterio.cri_evento_fk_id)
+
+
+@receiver(post_save, sender=Criterio)
+@receiver(post_delete, sender=Criterio)
+@receiver(post_save, sender=ParticipanteEvento)
+@receiver(post_delete, sender=ParticipanteEvento)
+def invalidar_posiciones_evento(sender, instance, **kwargs):
+    invalidar_posiciones(instance.cri_evento_fk_id if sender is Criterio else instance.evento_id)
@@ -0,0 +1,152 @@
+"""
+Simulador de pesos de criterios ("¿qué pasaría si...?").
+
+Carga una sola vez las calificaciones del evento en arreglos de NumPy
+(objetivo, criterio, evaluador, valor) y recalcula la tabla completa para
+cualquier vector de pesos con operaciones vectorizadas (bincount), con la misma
+fórmula del motor de puntajes. No escribe nada en la base de datos.
+
+Los arreglos se guardan en la caché bajo la versión de posiciones del evento,
+así que solo se vuelven a leer cuando cambian las calificaciones o los criterios.
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Criterio, Calificacion, CalificacionProyecto
+from .posiciones import version_posiciones
+from app_participantes.models import ParticipanteEvento
+
+TIPO_PARTICIPANTE = 'participante'
+TIPO_PROYECTO = 'proyecto'
+
+
+def puestos_competencia(notas):
+    """Puesto de competencia (1, 2, 2, 4) de cada nota, de mayor a menor"""
+    descendentes = -np.sort(-notas)
+    return np.searchsorted(-descendentes, -notas, side='left') + 1
+
+
+class SimuladorPesos:
+    """
+    criterios: [{'id', 'descripcion', 'peso'}] en el orden de los índices
+    objetivos: [{'tipo', 'id', 'nombre'}] en el orden de los índices
+    objetivo_idx, criterio_idx, evaluador_idx, valores: una posición por calificación
+    """
+
+    def __init__(self, criterios, objetivos, objetivo_idx, criterio_idx, evaluador_idx, valores):
+        self.criterios = criterios
+        self.objetivos = objetivos
+        self.objetivo_idx = objetivo_idx
+        self.criterio_idx = criterio_idx
+        self.valores = valores
+        self.es_proyecto = np.array([o['tipo'] == TIPO_PROYECTO for o in objetivos], dtype=bool)
+        # Evaluadores distintos por objetivo: pares (objetivo, evaluador) únicos
+        num_evaluadores = int(evaluador_idx.max()) + 1 if len(evaluador_idx) else 1
+        pares = np.unique(objetivo_idx.astype(np.int64) * num_evaluadores + evaluador_idx)
+        self.evaluadores_por_objetivo = np.bincount(pares // num_evaluadores, minlength=len(objetivos))
+
+    @property
+    def pesos_actuales(self):
+        return np.array([c['peso'] for c in self.criterios], dtype=float)
+
+    def notas(self, pesos):
+        """Nota de cada objetivo con el vector de pesos dado (NaN si no tiene evaluadores)"""
+        pesos = np.asarray(pesos, dtype=float)
+        peso_total = pesos.sum()
+        suma = np.bincount(
+            self.objetivo_idx, weights=self.valores * pesos[self.criterio_idx], minlength=len(self.objetivos)
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            notas = suma / (peso_total * self.evaluadores_por_objetivo)
+        notas[(self.evaluadores_por_objetivo == 0) | (peso_total <= 0)] = np.nan
+        return np.round(notas, 2)
+
+    def puestos(self, notas):
+        """Puestos por tipo (proyectos e individuales compiten por separado); 0 sin nota"""
+        puestos = np.zeros(len(notas), dtype=int)
+        for mascara in (self.es_proyecto, ~self.es_proyecto):
+            indices = np.flatnonzero(mascara & ~np.isnan(notas))
+            puestos[indices] = puestos_competencia(notas[indices])
+        return puestos
+
+    def simular(self, pesos):
+        """
+        Compara la tabla con los pesos propuestos contra la de los pesos actuales.
+        Retorna {'proyectos': [...], 'individuales': [...]} ordenados por el puesto simulado.
+        """
+        notas_actuales = self.notas(self.pesos_actuales)
+        notas = self.notas(pesos)
+        puestos_actuales = self.puestos(notas_actuales)
+        puestos = self.puestos(notas)
+        resultado = {'proyectos': [], 'individuales': []}
+        for i in np.lexsort((np.arange(len(notas)), puestos)):
+            if puestos[i] == 0:
+                continue
+            objetivo = self.objetivos[i]
+            resultado['proyectos' if self.es_proyecto[i] else 'individuales'].append({
+                **objetivo,
+                'nota': float(notas[i]),
+                'nota_actual': None if np.isnan(notas_actuales[i]) else float(notas_actuales[i]),
+                'puesto': int(puestos[i]),
+                'puesto_actual': int(puestos_actuales[i]) or None,
+                'cambio': int(puestos_actuales[i] - puestos[i]) if puestos_actuales[i] else None,
+            })
+        return resultado
+
+
+def _indices(ids, catalogo):
+    """Posición de cada id en el catálogo ordenado"""
+    return np.searchsorted(catalogo, np.asarray(ids, dtype=np.int64)).astype(np.intp)
+
+
+def cargar_simulador(evento):
+    """Lee las calificaciones de los participantes y proyectos aprobados del evento"""
+    criterios = [
+        {'id': cri_id, 'descripcion': descripcion, 'peso': peso}
+        for cri_id, descripcion, peso in Criterio.objects.filter(cri_evento_fk=evento)
+        .values_list('cri_id', 'cri_descripcion', 'cri_peso').order_by('cri_id')
+    ]
+    aprobadas = ParticipanteEvento.objects.filter(evento=evento, par_eve_estado='Aprobado')
+    individuales = {
+        participante_id: f'{nombre} {apellido}'.strip()
+        for participante_id, nombre, apellido in aprobadas.filter(proyecto_grupal__isnull=True).values_list(
+            'participante_id', 'participante__usuario__first_name', 'participante__usuario__last_name'
+        )
+    }
+    proyectos = dict(
+        aprobadas.filter(proyecto_grupal__isnull=False).values_list(
+            'proyecto_grupal_id', 'proyecto_grupal__nombre_proyecto'
+        ).distinct()
+    )
+    filas_individuales = np.array(list(Calificacion.objects.filter(
+        criterio__cri_evento_fk=evento, participante_id__in=list(individuales)
+    ).values_list('participante_id', 'criterio_id', 'evaluador_id', 'cal_valor')), dtype=np.int64).reshape(-1, 4)
+    filas_proyectos = np.array(list(CalificacionProyecto.objects.filter(
+        criterio__cri_evento_fk=evento, proyecto_id__in=list(proyectos)
+    ).values_list('proyecto_id', 'criterio_id', 'evaluador_id', 'cal_valor')), dtype=np.int64).reshape(-1, 4)
+
+    ids_individuales = np.array(sorted(individuales), dtype=np.int64)
+    ids_proyectos = np.array(sorted(proyectos), dtype=np.int64)
+    objetivos = (
+        [{'tipo': TIPO_PARTICIPANTE, 'id': int(i), 'nombre': individuales[i]} for i in ids_individuales]
+        + [{'tipo': TIPO_PROYECTO, 'id': int(i), 'nombre': proyectos[i]} for i in ids_proyectos]
+    )
+    objetivo_idx = np.concatenate([
+        _indices(filas_individuales[:, 0], ids_individuales),
+        _indices(filas_proyectos[:, 0], ids_proyectos) + len(ids_individuales),
+    ])
+    filas = np.concatenate([filas_individuales, filas_proyectos])
+    criterio_idx = _indices(filas[:, 1], np.array([c['id'] for c in criterios], dtype=np.int64))
+    _, evaluador_idx = np.unique(filas[:, 2], return_inverse=True)
+    return SimuladorPesos(criterios, objetivos, objetivo_idx, criterio_idx, evaluador_idx, filas[:, 3].astype(float))
+
+
+def obtener_simulador(evento):
+    """cargar_simulador servido desde la caché mientras la versión de posiciones no cambie"""
+    clave = f'simulador:{evento.pk}:{version_posiciones(evento.pk)}'
+    simulador = cache.get(clave)
+    if simulador is None:
+        simulador = cargar_simulador(evento)
+        cache.set(clave, simulador, settings.POSICIONES_CACHE_TIMEOUT)
+    return simulador
@@ -1,3 +1,414 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+import io
+import json
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from app_administradores.models import AdministradorEvento
+from app_areas.models import Area, Categoria
+from app_evaluadores.calificaciones import guardar_calificaciones
+from app_evaluadores.clasificacion import congelar_clasificacion, escribir_clasificacion_csv
+from app_evaluadores.en_vivo import flujo_posiciones, obtener_canal
+from app_evaluadores.models import (
+    AcumuladoCalificacion, Calificacion, CalificacionProyecto, Criterio, Evaluador, EvaluadorEvento,
+    RecalculoPuntajes,
+)
+from app_evaluadores.posiciones import construir_posiciones_por_categoria, obtener_tabla_posiciones
+from app_evaluadores.puntajes import recalcular_notas_evento
+from app_evaluadores.recalculos import (
+    _renovar_latido, encolar_recalculo, procesar_recalculo, tomar_siguiente_recalculo,
+)
+from app_eventos.models import Evento
+from app_participantes.models import (
+    ClasificacionFinal, Participante, ParticipanteEvento, ProyectoGrupal, PuestoCategoria,
+)
+from app_usuarios.models import Usuario
+
+
+class PuntajesTestMixin:
+    """Eventos con dos criterios (pesos 20 y 30), evaluadores y participantes aprobados"""
+
+    def setUp(self):
+        self.administrador = AdministradorEvento.objects.create(usuario=Usuario.objects.create_user(
+            username='admin_evento', email='admin@eventsoft.com', password='clave', documento='100'
+        ))
+        self.siguiente = 0
+        self.evento = self.crear_evento()
+        self.evaluadores = [self.crear_evaluador(self.evento) for _ in range(2)]
+
+    def crear_evento(self):
+        self.siguiente += 1
+        evento = Evento.objects.create(
+            eve_nombre=f'Evento {self.siguiente}', eve_descripcion='Descripción', eve_ciudad='Manizales',
+            eve_lugar='Auditorio', eve_fecha_inicio=date(2099, 1, 1), eve_fecha_fin=date(2099, 1, 2),
+            eve_estado='Aprobado', eve_capacidad=50, eve_tienecosto='No', eve_administrador_fk=self.administrador,
+            eve_es_multidisciplinario='Si',
+        )
+        Criterio.objects.create(cri_descripcion='Innovación', cri_peso=20, cri_evento_fk=evento)
+        Criterio.objects.create(cri_descripcion='Impacto', cri_peso=30, cri_evento_fk=evento)
+        return evento
+
+    def crear_usuario(self, prefijo):
+        self.siguiente += 1
+        n = self.siguiente
+        return Usuario.objects.create_user(
+            username=f'{prefijo}{n}', email=f'{prefijo}{n}@eventsoft.com', password='clave', documento=f'{prefijo}{n}'
+        )
+
+    def crear_evaluador(self, evento):
+        evaluador = Evaluador.objects.create(usuario=self.crear_usuario('evaluador'))
+        self.inscribir_evaluador(evaluador, evento)
+        return evaluador
+
+    def inscribir_evaluador(self, evaluador, evento):
+        EvaluadorEvento.objects.create(
+            evaluador=evaluador, evento=evento, eva_eve_fecha_hora=timezone.now(),
+            eva_eve_estado='Aprobado', confirmado=True,
+        )
+
+    def inscribir(self, evento, participante=None, proyecto=None):
+        participante = participante or Participante.objects.create(usuario=self.crear_usuario('participante'))
+        ParticipanteEvento.objects.create(
+            participante=participante, evento=evento, par_eve_fecha_hora=timezone.now(),
+            par_eve_estado='Aprobado', confirmado=True, es_grupal=proyecto is not None, proyecto_grupal=proyecto,
+        )
+        return participante
+
+    def criterios(self, evento):
+        return list(Criterio.objects.filter(cri_evento_fk=evento).order_by('cri_peso').values_list('cri_id', flat=True))
+
+    def calificar(self, evento, evaluador, participante, valores):
+        innovacion, impacto = self.criterios(evento)
+        guardar_calificaciones(evento, evaluador, {participante.pk: {innovacion: valores[0], impacto: valores[1]}})
+
+    def nota(self, evento, participante):
+        return ParticipanteEvento.objects.get(evento=evento, participante=participante).par_eve_valor
+
+    def acumulados(self, evento):
+        return sorted(
+            (participante_id or 0, proyecto_id or 0, round(suma, 6), evaluadores, criterios)
+            for participante_id, proyecto_id, suma, evaluadores, criterios
+            # Una fila en cero (sin calificaciones) equivale a no tener fila
+            in AcumuladoCalificacion.objects.filter(evento=evento, num_evaluadores__gt=0).values_list(
+                'participante_id', 'proyecto_id', 'suma_ponderada', 'num_evaluadores', 'num_criterios'
+            )
+        )
+
+    def assertAcumuladosCoinciden(self, evento):
+        """Los acumulados mantenidos con deltas son los mismos que da una reconstrucción completa"""
+        mantenidos = self.acumulados(evento)
+        notas = list(ParticipanteEvento.objects.filter(evento=evento).values_list(
+            'id', 'par_eve_valor', 'par_eve_puesto'
+        ).order_by('id'))
+        recalcular_notas_evento(evento)
+        self.assertEqual(mantenidos, self.acumulados(evento))
+        self.assertEqual(notas, list(ParticipanteEvento.objects.filter(evento=evento).values_list(
+            'id', 'par_eve_valor', 'par_eve_puesto'
+        ).order_by('id')))
+
+
+class AcumuladosCalificacionTests(PuntajesTestMixin, TestCase):
+    """Las notas se mantienen con deltas sobre AcumuladoCalificacion"""
+
+    def test_guardar_calificaciones_aplica_deltas(self):
+        ana, beto = self.inscribir(self.evento), self.inscribir(self.evento)
+        self.calificar(self.evento, self.evaluadores[0], ana, (5, 4))
+        self.calificar(self.evento, self.evaluadores[1], ana, (3, 2))
+        self.calificar(self.evento, self.evaluadores[0], beto, (4, 4))
+        # Sobrescribir una calificación aplica solo la diferencia
+        self.calificar(self.evento, self.evaluadores[0], ana, (1, 5))
+
+        self.assertEqual(self.nota(self.evento, ana), round((1 * 20 + 5 * 30 + 3 * 20 + 2 * 30) / (50 * 2), 2))
+        self.assertEqual(self.nota(self.evento, beto), 4.0)
+        self.assertAcumuladosCoinciden(self.evento)
+
+    def test_calificacion_en_otro_evento_no_se_mezcla(self):
+        otro_evento = self.crear_evento()
+        evaluador = self.evaluadores[0]
+        self.inscribir_evaluador(evaluador, otro_evento)
+        ana = self.inscribir(self.evento)
+        self.inscribir(otro_evento, participante=ana)
+
+        self.calificar(self.evento, evaluador, ana, (5, 5))
+        self.calificar(otro_evento, evaluador, ana, (1, 1))
+        Calificacion.objects.filter(criterio__cri_evento_fk=otro_evento).first().delete()
+
+        acumulado = AcumuladoCalificacion.objects.get(evento=self.evento, participante=ana)
+        self.assertEqual((acumulado.suma_ponderada, acumulado.num_evaluadores, acumulado.num_criterios), (250, 1, 2))
+        self.assertEqual(self.nota(self.evento, ana), 5.0)
+        self.assertAcumuladosCoinciden(self.evento)
+        self.assertAcumuladosCoinciden(otro_evento)
+
+    def test_eliminar_evaluador_descuenta_sus_calificaciones(self):
+        ana, beto = self.inscribir(self.evento), self.inscribir(self.evento)
+        self.calificar(self.evento, self.evaluadores[0], ana, (5, 5))
+        self.calificar(self.evento, self.evaluadores[1], ana, (1, 1))
+        self.calificar(self.evento, self.evaluadores[1], beto, (3, 3))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evaluadores[1].delete()
+
+        self.assertEqual(self.nota(self.evento, ana), 5.0)
+        self.assertIsNone(self.nota(self.evento, beto))
+        self.assertAcumuladosCoinciden(self.evento)
+
+
+class PuestosEventoTests(PuntajesTestMixin, TestCase):
+    """Los puestos guardados siguen a los cambios de estado y borrados de inscripciones"""
+
+    def puestos(self):
+        return dict(ParticipanteEvento.objects.filter(evento=self.evento).values_list('participante_id', 'par_eve_puesto'))
+
+    def cambiar_estado(self, participante, estado):
+        inscripcion = ParticipanteEvento.objects.get(evento=self.evento, participante=participante)
+        inscripcion.par_eve_estado = estado
+        with self.captureOnCommitCallbacks(execute=True):
+            inscripcion.save()
+
+    def test_aprobar_rechazar_y_eliminar_recalculan_puestos(self):
+        ana, beto, caro = self.inscribir(self.evento), self.inscribir(self.evento), self.inscribir(self.evento)
+        self.calificar(self.evento, self.evaluadores[0], ana, (5, 5))
+        self.calificar(self.evento, self.evaluadores[0], beto, (3, 3))
+        self.calificar(self.evento, self.evaluadores[0], caro, (1, 1))
+        self.assertEqual(self.puestos(), {ana.pk: 1, beto.pk: 2, caro.pk: 3})
+
+        self.cambiar_estado(ana, 'Rechazado')
+        self.assertEqual(self.puestos(), {ana.pk: None, beto.pk: 1, caro.pk: 2})
+
+        self.cambiar_estado(ana, 'Aprobado')
+        self.assertEqual(self.puestos(), {ana.pk: 1, beto.pk: 2, caro.pk: 3})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ParticipanteEvento.objects.get(evento=self.evento, participante=beto).delete()
+        self.assertEqual(self.puestos(), {ana.pk: 1, caro.pk: 2})
+
+
+class RecalculoPuntajesTests(PuntajesTestMixin, TestCase):
+    """procesar_recalculo aplica los pesos nuevos sin perder calificaciones concurrentes"""
+
+    def test_recalculo_aplica_los_pesos_nuevos(self):
+        ana = self.inscribir(self.evento)
+        self.calificar(self.evento, self.evaluadores[0], ana, (5, 1))
+        Criterio.objects.filter(cri_evento_fk=self.evento, cri_peso=30).update(cri_peso=70)
+
+        encolar_recalculo(self.evento)
+        recalculo = procesar_recalculo(tomar_siguiente_recalculo())
+
+        self.assertEqual(recalculo.estado, 'completado')
+        self.assertEqual(self.nota(self.evento, ana), round((5 * 20 + 1 * 70) / 90, 2))
+
+    def test_calificacion_guardada_durante_el_recalculo_no_se_pierde(self):
+        participantes = [self.inscribir(self.evento) for _ in range(4)]
+        for participante in participantes:
+            self.calificar(self.evento, self.evaluadores[0], participante, (3, 3))
+        encolar_recalculo(self.evento)
+        recalculo = tomar_siguiente_recalculo()
+
+        # Al guardar el progreso del primer lote, otro evaluador califica a un participante ya leído
+        calificados = []
+
+        def renovar_latido(recalculo, *campos):
+            vigente = _renovar_latido(recalculo, *campos)
+            if campos == ('procesados',) and not calificados:
+                calificados.append(participantes[0])
+                self.calificar(self.evento, self.evaluadores[1], participantes[0], (5, 5))
+            return vigente
+
+        with mock.patch('app_evaluadores.recalculos._renovar_latido', renovar_latido):
+            procesar_recalculo(recalculo, tamano_lote=2)
+
+        self.assertEqual(recalculo.estado, 'completado')
+        self.assertEqual(self.nota(self.evento, participantes[0]), 4.0)
+        self.assertAcumuladosCoinciden(self.evento)
+
+    def test_recalculo_abandonado_lo_retoma_otro_procesador(self):
+        ana = self.inscribir(self.evento)
+        self.calificar(self.evento, self.evaluadores[0], ana, (5, 1))
+        Criterio.objects.filter(cri_evento_fk=self.evento, cri_peso=30).update(cri_peso=70)
+        encolar_recalculo(self.evento)
+
+        detenido = tomar_siguiente_recalculo()
+        self.assertIsNone(tomar_siguiente_recalculo())
+        RecalculoPuntajes.objects.filter(pk=detenido.pk).update(latido=timezone.now() - timedelta(hours=1))
+        retomado = tomar_siguiente_recalculo()
+        self.assertEqual(retomado.pk, detenido.pk)
+
+        # El procesador que perdió la ficha se detiene sin escribir notas
+        procesar_recalculo(detenido)
+        self.assertEqual(detenido.estado, 'en_proceso')
+        self.assertEqual(self.nota(self.evento, ana), 2.6)
+
+        self.assertEqual(procesar_recalculo(retomado).estado, 'completado')
+        self.assertEqual(self.nota(self.evento, ana), round((5 * 20 + 1 * 70) / 90, 2))
+
+    def test_calificar_con_recalculo_pendiente_no_mezcla_pesos(self):
+        ana = self.inscribir(self.evento)
+        self.calificar(self.evento, self.evaluadores[0], ana, (5, 1))
+        nota_anterior = self.nota(self.evento, ana)
+        Criterio.objects.filter(cri_evento_fk=self.evento, cri_peso=30).update(cri_peso=70)
+        encolar_recalculo(self.evento)
+
+        # El acumulado aún tiene los pesos viejos: la nota la escribe el recálculo
+        self.calificar(self.evento, self.evaluadores[1], ana, (1, 5))
+        self.assertEqual(self.nota(self.evento, ana), nota_anterior)
+
+        procesar_recalculo(tomar_siguiente_recalculo())
+        self.assertEqual(self.nota(self.evento, ana), round((5 * 20 + 1 * 70 + 1 * 20 + 5 * 70) / (90 * 2), 2))
+        self.assertAcumuladosCoinciden(self.evento)
+
+
+class PuestosPorCategoriaTests(PuntajesTestMixin, TestCase):
+    """Cada participación sale una vez por categoría aunque haya categorías propias y del proyecto"""
+
+    def test_integrantes_compiten_en_las_categorias_del_proyecto(self):
+        area = Area.objects.create(are_nombre='Ingeniería', are_descripcion='Área')
+        robotica, software = (
+            Categoria.objects.create(cat_nombre=nombre, cat_descripcion='Categoría', cat_area_fk=area)
+            for nombre in ['Robótica', 'Software']
+        )
+        proyecto = ProyectoGrupal.objects.create(nombre_proyecto='Brazo', evento=self.evento, estado='Aprobado')
+        proyecto.categorias.set([robotica, software])
+        integrantes = [self.inscribir(self.evento, proyecto=proyecto) for _ in range(2)]
+        individual = self.inscribir(self.evento)
+        for participante in integrantes + [individual]:
+            # Las categorías propias de un integrante no cuentan: compite en las del proyecto
+            ParticipanteEvento.objects.get(evento=self.evento, participante=participante).categorias.set(
+                [robotica, software]
+            )
+        for criterio_id in self.criterios(self.evento):
+            CalificacionProyecto.objects.create(
+                evaluador=self.evaluadores[0], criterio_id=criterio_id, proyecto=proyecto, cal_valor=5
+            )
+            Calificacion.objects.create(
+                evaluador=self.evaluadores[0], criterio_id=criterio_id, participante=individual, cal_valor=4
+            )
+        recalcular_notas_evento(self.evento)
+
+        puestos = sorted(PuestoCategoria.objects.values_list('participante_evento__participante_id', 'categoria_id', 'puesto'))
+        self.assertEqual(len(puestos), 6)
+        self.assertEqual(len({(participante, categoria) for participante, categoria, _ in puestos}), 6)
+        self.assertEqual(
+            sorted(puesto for participante, _, puesto in puestos if participante == individual.pk), [3, 3]
+        )
+        for tabla in construir_posiciones_por_categoria(self.evento):
+            self.assertEqual(tabla['total'], 2)
+            self.assertEqual(len(tabla['posiciones_proyectos'][0]['integrantes']), 2)
+
+
+class CachePosicionesTests(PuntajesTestMixin, TestCase):
+    """Las tablas se cachean bajo la versión del evento y se invalidan al calificar"""
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'posiciones-tests',
+    }})
+    def test_cache_local_se_invalida_en_el_mismo_proceso(self):
+        ana = self.inscribir(self.evento)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.calificar(self.evento, self.evaluadores[0], ana, (2, 2))
+        self.assertEqual(obtener_tabla_posiciones(self.evento)['posiciones_individuales'][0]['puntaje'], 2.0)
+
+        # Una nota que escribe otro proceso no invalida esta copia: se ve al vencer el timeout
+        ParticipanteEvento.objects.filter(participante=ana).update(par_eve_valor=4.5)
+        self.assertEqual(obtener_tabla_posiciones(self.evento)['posiciones_individuales'][0]['puntaje'], 2.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.calificar(self.evento, self.evaluadores[1], ana, (4, 4))
+        self.assertEqual(obtener_tabla_posiciones(self.evento)['posiciones_individuales'][0]['puntaje'], 3.0)
+
+    def test_cache_compartida_se_invalida_al_calificar(self):
+        ana = self.inscribir(self.evento)
+        with tempfile.TemporaryDirectory() as directorio, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directorio,
+        }}):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.calificar(self.evento, self.evaluadores[0], ana, (2, 2))
+            self.assertEqual(obtener_tabla_posiciones(self.evento)['posiciones_individuales'][0]['puntaje'], 2.0)
+
+            ParticipanteEvento.objects.filter(participante=ana).update(par_eve_valor=4.5)
+            self.assertEqual(obtener_tabla_posiciones(self.evento)['posiciones_individuales'][0]['puntaje'], 2.0)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.calificar(self.evento, self.evaluadores[1], ana, (4, 4))
+            self.assertEqual(obtener_tabla_posiciones(self.evento)['posiciones_individuales'][0]['puntaje'], 3.0)
+
+
+class PosicionesEnVivoTests(PuntajesTestMixin, TestCase):
+    """El flujo SSE entrega primero la tabla completa, también con la caché local"""
+
+    def primer_mensaje(self):
+        async def leer():
+            flujo = flujo_posiciones(self.evento.pk)
+            mensaje = await flujo.__anext__()
+            await flujo.aclose()
+            tarea = obtener_canal(self.evento.pk).tarea
+            tarea.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await tarea
+            return mensaje
+        return async_to_sync(leer)()
+
+    def test_primer_mensaje_es_la_tabla(self):
+        ana, beto = self.inscribir(self.evento), self.inscribir(self.evento)
+        self.calificar(self.evento, self.evaluadores[0], ana, (5, 5))
+        self.calificar(self.evento, self.evaluadores[0], beto, (2, 2))
+
+        evento, datos = self.primer_mensaje().strip().split('\n')
+        self.assertEqual(evento, 'event: tabla')
+        filas = {fila['clave']: (fila['puesto'], fila['puntaje']) for fila in json.loads(datos[len('data: '):])['filas']}
+        self.assertEqual(filas, {f'participante-{ana.pk}': (1, 5.0), f'participante-{beto.pk}': (2, 2.0)})
+
+
+class ClasificacionFinalTests(PuntajesTestMixin, TestCase):
+    """Al finalizar el evento el ranking se congela una sola vez"""
+
+    def finalizar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evento.eve_estado = 'Finalizado'
+            self.evento.save()
+
+    def test_finalizar_congela_el_ranking(self):
+        ana, beto = self.inscribir(self.evento), self.inscribir(self.evento)
+        self.calificar(self.evento, self.evaluadores[0], ana, (5, 5))
+        self.calificar(self.evento, self.evaluadores[0], beto, (2, 2))
+        self.finalizar()
+
+        clasificacion = list(ClasificacionFinal.objects.filter(evento=self.evento).order_by('puesto').values_list(
+            'participante_evento__participante_id', 'puesto', 'puntaje'
+        ))
+        self.assertEqual(clasificacion, [(ana.pk, 1, 5.0), (beto.pk, 2, 2.0)])
+
+        # Cambios posteriores de notas no alteran la clasificación congelada
+        self.calificar(self.evento, self.evaluadores[1], beto, (5, 5))
+        self.assertEqual(congelar_clasificacion(self.evento), 0)
+        self.assertEqual(
+            ClasificacionFinal.objects.get(evento=self.evento, puesto=1).participante_evento.participante_id, ana.pk
+        )
+
+    def test_eliminar_una_inscripcion_no_altera_la_clasificacion(self):
+        ana, beto = self.inscribir(self.evento), self.inscribir(self.evento)
+        self.calificar(self.evento, self.evaluadores[0], ana, (5, 5))
+        self.calificar(self.evento, self.evaluadores[0], beto, (2, 2))
+        self.finalizar()
+        antes = list(ClasificacionFinal.objects.filter(evento=self.evento).order_by('puesto').values_list(
+            'puesto', 'nombre', 'puntaje'
+        ))
+
+        ParticipanteEvento.objects.get(evento=self.evento, participante=ana).delete()
+
+        filas = ClasificacionFinal.objects.filter(evento=self.evento).order_by('puesto')
+        self.assertEqual(list(filas.values_list('puesto', 'nombre', 'puntaje')), antes)
+        self.assertIsNone(filas[0].participante_evento_id)
+        salida = io.StringIO()
+        escribir_clasificacion_csv(self.evento, salida)
+        self.assertIn(antes[0][1], salida.getvalue())
+
+    def test_sin_puestos_no_congela(self):
+        self.inscribir(self.evento)
+        self.finalizar()
+        self.assertFalse(ClasificacionFinal.objects.filter(evento=self.evento).exists())
@@ -10,6 +10,7 @@ urlpatterns = [
     path('lista-participantes-evaluador/<int:eve_id>/', views.lista_participantes, name='lista_participantes_evaluador'),
     path('calificar-participante/<int:eve_id>/<int:participante_id>/', views.calificar_participante, name='calificar_participante_evaluador'),
     path('calificar-proyecto/<int:eve_id>/<int:proyecto_id>/', views.calificar_proyecto, name='calificar_proyecto_evaluador'),
+    path('calificacion-masiva/<int:eve_id>/', views.calificacion_masiva, name='calificacion_masiva_evaluador'),
     path('tabla-posiciones/<int:eve_id>/', views.ver_tabla_posiciones, name='tabla_posiciones_evaluador'),
     path('informacion-detallada/<int:eve_id>/', views.informacion_detallada, name='informacion_detallada_evaluador'),
     path('evento-cancelar-evaluador/<int:evento_id>/', views.cancelar_inscripcion_evaluador, name='cancelar_inscripcion_evaluador'),
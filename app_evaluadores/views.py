@@ -1,139 +1,41 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from app_usuarios.permisos import es_evaluador
+from app_usuarios.inscripciones import inscripciones_usuario
 from django.contrib import messages
 from django.http import HttpResponse, FileResponse
+from django.db.models import Prefetch
 from .models import Evaluador, Criterio, Calificacion, EvaluadorEvento, CalificacionProyecto
 from app_eventos.models import Evento
 from app_participantes.models import ParticipanteEvento, Participante, ProyectoGrupal
 from app_usuarios.models import Usuario
+from .calificaciones import leer_hoja, guardar_calificaciones, objetivos_asignados, LectorCalificaciones
+from .posiciones import obtener_tabla_posiciones, obtener_posiciones_por_categoria
+from .recalculos import encolar_recalculo, estado_recalculo
+from .paginacion import pendientes_primero, pagina_keyset
+import csv
 import os
 
 
-def calcular_y_guardar_nota_general(participante, evento):
-    """
-    Calcula la nota general ponderada de un participante en un evento
-    y la guarda en el campo par_eve_valor de ParticipanteEvento
-    """
-    criterios = Criterio.objects.filter(cri_evento_fk=evento)
-    peso_total = sum(c.cri_peso for c in criterios) or 1
-    
-    # Obtener todas las calificaciones del participante en este evento
-    calificaciones = Calificacion.objects.filter(
-        participante=participante,
-        criterio__cri_evento_fk=evento
-    ).select_related('criterio')
-    
-    # Agrupar por evaluador para calcular el promedio de cada uno
-    evaluadores_ids = set(c.evaluador_id for c in calificaciones)
-    num_evaluadores = len(evaluadores_ids)
-    
-    if num_evaluadores > 0:
-        # Calcular puntaje ponderado promedio
-        puntaje_ponderado = sum(
-            c.cal_valor * c.criterio.cri_peso for c in calificaciones
-        ) / (peso_total * num_evaluadores)
-        
-        # Guardar en ParticipanteEvento
-        participante_evento = ParticipanteEvento.objects.get(
-            participante=participante,
-            evento=evento
-        )
-        participante_evento.par_eve_valor = round(puntaje_ponderado, 2)
-        participante_evento.save()
-        
-        return puntaje_ponderado
-    
-    return 0
-
-
-def calcular_y_guardar_nota_proyecto(proyecto):
-    """
-    Calcula la nota general ponderada de un proyecto grupal y la guarda.
-    También actualiza la nota de todos los integrantes del proyecto.
-    """
-    evento = proyecto.evento
-    criterios = Criterio.objects.filter(cri_evento_fk=evento)
-    peso_total = sum(c.cri_peso for c in criterios) or 1
-    
-    # Obtener todas las calificaciones del proyecto en este evento
-    calificaciones = CalificacionProyecto.objects.filter(
-        proyecto=proyecto,
-        criterio__cri_evento_fk=evento
-    ).select_related('criterio')
-    
-    # Agrupar por evaluador para calcular el promedio de cada uno
-    evaluadores_ids = set(c.evaluador_id for c in calificaciones)
-    num_evaluadores = len(evaluadores_ids)
-    
-    if num_evaluadores > 0:
-        # Calcular puntaje ponderado promedio
-        puntaje_ponderado = sum(
-            c.cal_valor * c.criterio.cri_peso for c in calificaciones
-        ) / (peso_total * num_evaluadores)
-        
-        nota_final = round(puntaje_ponderado, 2)
-        
-        # Guardar en ProyectoGrupal
-        proyecto.nota_proyecto = nota_final
-        proyecto.save()
-        
-        # Actualizar la nota de todos los integrantes del proyecto
-        ParticipanteEvento.objects.filter(
-            proyecto_grupal=proyecto,
-            evento=evento
-        ).update(par_eve_valor=nota_final)
-        
-        return nota_final
-    
-    return 0
-
-
 def obtener_puesto_participante(participante, evento):
     """
     Obtiene el puesto de un participante en un evento basado en su nota
     """
-    # Obtener todas las participaciones del evento ordenadas por nota
-    participaciones = ParticipanteEvento.objects.filter(
-        evento=evento,
-        par_eve_estado='Aprobado',
-        par_eve_valor__isnull=False
-    ).order_by('-par_eve_valor')
-    
-    # Encontrar el puesto del participante
-    for i, pe in enumerate(participaciones, 1):
-        if pe.participante == participante:
-            return i
-    
-    return None  # No encontrado o sin calificación
-
-
+    return ParticipanteEvento.objects.filter(
+        evento=evento, participante=participante
+    ).values_list('par_eve_puesto', flat=True).first()  # None si no tiene calificación
 
 
 @login_required
 @user_passes_test(es_evaluador, login_url='login')
 def dashboard_evaluador(request):
     evaluador = request.user.evaluador
-    inscripciones = EvaluadorEvento.objects.select_related('evento', 'categoria_evaluacion').filter(evaluador=evaluador)
-
-    # Agregar información sobre archivos disponibles y categoría a cada inscripción
-    inscripciones_con_archivos = []
-    for inscripcion in inscripciones:
-        inscripcion_data = {
-            'inscripcion': inscripcion,
-            'evento': inscripcion.evento,
-            'estado': inscripcion.eva_eve_estado,
-            'tiene_memorias': bool(inscripcion.evento.eve_memorias),
-            'tiene_info_tecnica': bool(inscripcion.evento.eve_informacion_tecnica),
-            'es_multidisciplinario': inscripcion.evento.eve_es_multidisciplinario == 'Si',
-            'categoria_evaluacion': inscripcion.categoria_evaluacion,
-        }
-        inscripciones_con_archivos.append(inscripcion_data)
+    inscripciones = inscripciones_usuario(request.user)['evaluador']['inscripciones']
 
     return render(request, 'app_evaluadores/dashboard_evaluador.html', {
         'evaluador': evaluador,
         'inscripciones': inscripciones,
-        'inscripciones_con_archivos': inscripciones_con_archivos
+        'inscripciones_con_archivos': inscripciones
     })
 
 
@@ -155,7 +57,8 @@ def gestionar_items(request, eve_id):
     return render(request, 'gestion_items_evaluador.html', {
         'evento': evento,
         'criterios': criterios,
-        'peso_total_actual': peso_total_actual
+        'peso_total_actual': peso_total_actual,
+        'recalculo': estado_recalculo(evento),
     })
 
 
@@ -175,7 +78,8 @@ def agregar_item(request, eve_id):
             cri_peso=peso,
             cri_evento_fk=evento
         )
-        messages.success(request, 'Ítem agregado correctamente.')
+        encolar_recalculo(evento)
+        messages.success(request, 'Ítem agregado correctamente. Las notas se recalcularán en segundo plano.')
         return redirect('gestionar_items_evaluador', eve_id=eve_id)
     peso_total_actual = sum(c.cri_peso for c in Criterio.objects.filter(cri_evento_fk=eve_id))
     peso_restante = 100 - peso_total_actual
@@ -200,9 +104,14 @@ def editar_item(request, criterio_id):
             messages.error(request, 'El peso total no puede exceder el 100%.')
             return redirect('gestionar_items_evaluador', eve_id=criterio.cri_evento_fk.pk)
         criterio.cri_descripcion = descripcion
+        peso_cambio = criterio.cri_peso != peso
         criterio.cri_peso = peso
         criterio.save()
-        messages.success(request, 'Ítem editado correctamente.')
+        if peso_cambio:
+            encolar_recalculo(criterio.cri_evento_fk)
+            messages.success(request, 'Ítem editado correctamente. Las notas se recalcularán en segundo plano.')
+        else:
+            messages.success(request, 'Ítem editado correctamente.')
         return redirect('gestionar_items_evaluador', eve_id=criterio.cri_evento_fk.pk)
     return render(request, 'editar_item_evaluador.html', {
         'criterio': criterio,
@@ -214,10 +123,11 @@ def editar_item(request, criterio_id):
 @user_passes_test(es_evaluador, login_url='login')
 def eliminar_item(request, criterio_id):
     criterio = get_object_or_404(Criterio, pk=criterio_id)
-    evento_id = criterio.cri_evento_fk.pk
+    evento = criterio.cri_evento_fk
     criterio.delete()
-    messages.success(request, 'Ítem eliminado correctamente.')
-    return redirect('gestionar_items_evaluador', eve_id=evento_id)
+    encolar_recalculo(evento)
+    messages.success(request, 'Ítem eliminado correctamente. Las notas se recalcularán en segundo plano.')
+    return redirect('gestionar_items_evaluador', eve_id=evento.pk)
 
 
 @login_required
@@ -238,59 +148,67 @@ def lista_participantes(request, eve_id):
         messages.warning(request, "Este evento aún no tiene criterios definidos.")
         return redirect('gestionar_items_evaluador', eve_id=eve_id)
     
-    # Obtener todos los participantes aprobados
-    participantes_evento = ParticipanteEvento.objects.filter(
+    # Ids ya calificados por este evaluador: deciden el orden (pendientes primero) y el estado
+    calificados_individuales = set(Calificacion.objects.filter(
+        evaluador=evaluador,
+        criterio__cri_evento_fk=evento
+    ).values_list('participante_id', flat=True).distinct())
+    proyectos_calificados = set(CalificacionProyecto.objects.filter(
+        evaluador=evaluador,
+        criterio__cri_evento_fk=evento
+    ).values_list('proyecto_id', flat=True).distinct())
+
+    participantes_individuales = ParticipanteEvento.objects.filter(
         evento=evento,
-        par_eve_estado='Aprobado'
-    ).select_related('participante__usuario', 'proyecto_grupal')
-    
-    # Separar individuales y grupales
-    participantes_individuales = participantes_evento.filter(es_grupal=False)
-    
-    # Obtener proyectos grupales únicos con sus integrantes
-    proyectos_grupales_ids = participantes_evento.filter(es_grupal=True).values_list('proyecto_grupal_id', flat=True).distinct()
-    proyectos_grupales = ProyectoGrupal.objects.filter(id__in=proyectos_grupales_ids, estado='Aprobado')
-    
+        par_eve_estado='Aprobado',
+        es_grupal=False
+    ).select_related('participante__usuario').prefetch_related('categorias')
+    proyectos_grupales = ProyectoGrupal.objects.filter(
+        evento=evento,
+        estado='Aprobado',
+        participanteevento__par_eve_estado='Aprobado',
+        participanteevento__es_grupal=True
+    ).distinct().prefetch_related(
+        Prefetch(
+            'participanteevento_set',
+            queryset=ParticipanteEvento.objects.filter(par_eve_estado='Aprobado').select_related('participante__usuario'),
+            to_attr='integrantes_aprobados'
+        ),
+        'categorias',
+    )
+
     # Para eventos multidisciplinarios, filtrar por categoría del evaluador si aplica
     categoria_evaluador = inscripcion.categoria_evaluacion
     if evento.eve_es_multidisciplinario == 'Si' and categoria_evaluador:
-        # Filtrar participantes individuales por categoría
         participantes_individuales = participantes_individuales.filter(categorias=categoria_evaluador)
-        # Filtrar proyectos por categoría
         proyectos_grupales = proyectos_grupales.filter(categorias=categoria_evaluador)
-    
-    # Calificaciones de participantes individuales
-    calificaciones_individuales = Calificacion.objects.filter(
-        evaluador=evaluador,
-        criterio__cri_evento_fk=evento
-    ).values_list('participante_id', flat=True).distinct()
-    calificados_individuales = set(calificaciones_individuales)
-    
-    # Calificaciones de proyectos grupales
-    calificaciones_proyectos = CalificacionProyecto.objects.filter(
-        evaluador=evaluador,
-        criterio__cri_evento_fk=evento
-    ).values_list('proyecto_id', flat=True).distinct()
-    proyectos_calificados = set(calificaciones_proyectos)
-    
-    # Preparar proyectos con información de integrantes
-    proyectos_con_integrantes = []
-    for proyecto in proyectos_grupales:
-        integrantes = participantes_evento.filter(proyecto_grupal=proyecto)
-        proyectos_con_integrantes.append({
+
+    participantes_individuales = pendientes_primero(participantes_individuales, 'participante_id', calificados_individuales)
+    proyectos_grupales = pendientes_primero(proyectos_grupales, 'id', proyectos_calificados)
+    participantes_pagina, siguiente_individuales = pagina_keyset(participantes_individuales, request.GET.get('individuales'))
+    proyectos_pagina, siguiente_proyectos = pagina_keyset(proyectos_grupales, request.GET.get('proyectos'))
+
+    proyectos_con_integrantes = [
+        {
             'proyecto': proyecto,
-            'integrantes': integrantes,
-            'calificado': proyecto.id in proyectos_calificados
-        })
-    
+            'integrantes': proyecto.integrantes_aprobados,
+            'calificado': bool(proyecto.calificado),
+        }
+        for proyecto in proyectos_pagina
+    ]
+
     context = {
-        'participantes_individuales': participantes_individuales,
+        'participantes_individuales': participantes_pagina,
         'proyectos_con_integrantes': proyectos_con_integrantes,
         'evento': evento,
         'calificados_individuales': calificados_individuales,
         'proyectos_calificados': proyectos_calificados,
         'categoria_evaluador': categoria_evaluador,
         'es_multidisciplinario': evento.eve_es_multidisciplinario == 'Si',
+        'cursor_individuales': request.GET.get('individuales', ''),
+        'cursor_proyectos': request.GET.get('proyectos', ''),
+        'siguiente_individuales': siguiente_individuales,
+        'siguiente_proyectos': siguiente_proyectos,
     }
     return render(request, 'lista_participantes_evaluador.html', context)
 
@@ -320,31 +238,14 @@ def calificar_participante(request, eve_id, participante_id):
     criterios = Criterio.objects.filter(cri_evento_fk=evento)
     evaluador = request.user.evaluador
     if request.method == 'POST':
-        for criterio in criterios:
-            valor = request.POST.get(f'criterio_{criterio.cri_id}')
-            if valor:
-                try:
-                    valor_int = int(valor)
-                    if 1 <= valor_int <= 5:
-                        calificacion, created = Calificacion.objects.get_or_create(
-                            evaluador=evaluador,
-                            criterio=criterio,
-                            participante=participante,
-                            defaults={'cal_valor': valor_int}
-                        )
-                        if not created:
-                            calificacion.cal_valor = valor_int
-                            calificacion.save()
-                    else:
-                        messages.error(request, f"El valor de '{criterio.cri_descripcion}' debe estar entre 1 y 5.")
-                        return redirect(request.path)
-                except ValueError:
-                    messages.error(request, f"Valor inválido para '{criterio.cri_descripcion}'.")
-                    return redirect(request.path)
-        
-        # Calcular y guardar la nota general del participante
-        calcular_y_guardar_nota_general(participante, evento)
-        
+        # Se valida la hoja completa antes de escribir para no dejarla a medias
+        valores, errores = leer_hoja(request.POST, criterios)
+        if errores:
+            messages.error(request, errores[0])
+            return redirect(request.path)
+
+        # Un solo upsert y un único recálculo de la nota y los puestos
+        guardar_calificaciones(evento, evaluador, individuales={participante.pk: valores})
         messages.success(request, "Calificaciones guardadas exitosamente.")
         return redirect('lista_participantes_evaluador', eve_id=eve_id)
 
@@ -386,31 +287,14 @@ def calificar_proyecto(request, eve_id, proyecto_id):
     criterios = Criterio.objects.filter(cri_evento_fk=evento)
     
     if request.method == 'POST':
-        for criterio in criterios:
-            valor = request.POST.get(f'criterio_{criterio.cri_id}')
-            if valor:
-                try:
-                    valor_int = int(valor)
-                    if 1 <= valor_int <= 5:
-                        calificacion, created = CalificacionProyecto.objects.get_or_create(
-                            evaluador=evaluador,
-                            criterio=criterio,
-                            proyecto=proyecto,
-                            defaults={'cal_valor': valor_int}
-                        )
-                        if not created:
-                            calificacion.cal_valor = valor_int
-                            calificacion.save()
-                    else:
-                        messages.error(request, f"El valor de '{criterio.cri_descripcion}' debe estar entre 1 y 5.")
-                        return redirect(request.path)
-                except ValueError:
-                    messages.error(request, f"Valor inválido para '{criterio.cri_descripcion}'.")
-                    return redirect(request.path)
-        
-        # Calcular y guardar la nota del proyecto (se aplica a todos los integrantes)
-        calcular_y_guardar_nota_proyecto(proyecto)
-        
+        # Se valida la hoja completa antes de escribir para no dejarla a medias
+        valores, errores = leer_hoja(request.POST, criterios)
+        if errores:
+            messages.error(request, errores[0])
+            return redirect(request.path)
+
+        # Un solo upsert; la nota del proyecto se aplica a todos los integrantes
+        guardar_calificaciones(evento, evaluador, proyectos={proyecto.pk: valores})
         messages.success(request, f"Calificaciones guardadas para el proyecto '{proyecto.nombre_proyecto}' y aplicadas a todos los integrantes.")
         return redirect('lista_participantes_evaluador', eve_id=eve_id)
 
@@ -422,6 +306,104 @@ def calificar_proyecto(request, eve_id, proyecto_id):
     })
 
 
+@login_required
+@user_passes_test(es_evaluador, login_url='login')
+def calificacion_masiva(request, eve_id):
+    """
+    Calificación de todos los participantes y proyectos asignados en una sola
+    petición: grilla objetivos x criterios o carga de un archivo CSV/JSON.
+    """
+    evento = get_object_or_404(Evento, pk=eve_id)
+    try:
+        evaluador = request.user.evaluador
+        inscripcion = EvaluadorEvento.objects.select_related('categoria_evaluacion').get(evaluador=evaluador, evento=evento)
+        if inscripcion.eva_eve_estado != 'Aprobado':
+            messages.warning(request, "Tu inscripción como evaluador aún no ha sido aprobada para este evento.")
+            return redirect('dashboard_evaluador')
+    except (EvaluadorEvento.DoesNotExist, Evaluador.DoesNotExist):
+        messages.error(request, "No estás inscrito como evaluador en este evento.")
+        return redirect('dashboard_evaluador')
+
+    criterios = list(Criterio.objects.filter(cri_evento_fk=evento).order_by('cri_id'))
+    if not criterios:
+        messages.warning(request, "Este evento aún no tiene criterios definidos.")
+        return redirect('gestionar_items_evaluador', eve_id=eve_id)
+    participantes, proyectos = objetivos_asignados(evento, inscripcion)
+
+    if request.method == 'POST':
+        lector = LectorCalificaciones(
+            criterios, [p['id'] for p in participantes], [p['id'] for p in proyectos]
+        )
+        archivo = request.FILES.get('archivo')
+        if archivo:
+            lector.leer_archivo(archivo)
+        else:
+            lector.leer_grilla(request.POST)
+
+        # Nada se guarda si alguna calificación es inválida
+        if lector.errores:
+            for error in lector.errores[:10]:
+                messages.error(request, error)
+            if len(lector.errores) > 10:
+                messages.error(request, f"... y {len(lector.errores) - 10} error(es) más.")
+            return redirect('calificacion_masiva_evaluador', eve_id=eve_id)
+
+        guardadas = guardar_calificaciones(evento, evaluador, lector.individuales, lector.proyectos)
+        messages.success(
+            request,
+            f"Se guardaron {guardadas} calificaciones de {len(lector.individuales)} participante(s) "
+            f"y {len(lector.proyectos)} proyecto(s)."
+        )
+        return redirect('calificacion_masiva_evaluador', eve_id=eve_id)
+
+    # Valores ya registrados por el evaluador para precargar la grilla y la plantilla
+    actuales = {}
+    for participante_id, criterio_id, valor in Calificacion.objects.filter(
+        evaluador=evaluador, criterio__cri_evento_fk=evento
+    ).values_list('participante_id', 'criterio_id', 'cal_valor'):
+        actuales[('participante', participante_id, criterio_id)] = valor
+    for proyecto_id, criterio_id, valor in CalificacionProyecto.objects.filter(
+        evaluador=evaluador, criterio__cri_evento_fk=evento
+    ).values_list('proyecto_id', 'criterio_id', 'cal_valor'):
+        actuales[('proyecto', proyecto_id, criterio_id)] = valor
+
+    filas = [
+        {
+            'tipo': tipo,
+            'id': objetivo['id'],
+            'nombre': objetivo['nombre'],
+            'celdas': [
+                {
+                    'campo': f"{tipo}_{objetivo['id']}_{c.cri_id}",
+                    'valor': actuales.get((tipo, objetivo['id'], c.cri_id)),
+                }
+                for c in criterios
+            ],
+        }
+        for tipo, objetivos in (('proyecto', proyectos), ('participante', participantes))
+        for objetivo in objetivos
+    ]
+
+    if request.GET.get('formato') == 'csv':
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="calificaciones_evento_{evento.eve_id}.csv"'
+        writer = csv.writer(response)
+        writer.writerow(['tipo', 'id', 'nombre'] + [f'criterio_{c.cri_id}' for c in criterios])
+        for fila in filas:
+            writer.writerow(
+                [fila['tipo'], fila['id'], fila['nombre']]
+                + ['' if celda['valor'] is None else celda['valor'] for celda in fila['celdas']]
+            )
+        return response
+
+    return render(request, 'calificacion_masiva.html', {
+        'evento': evento,
+        'criterios': criterios,
+        'filas': filas,
+        'categoria_evaluador': inscripcion.categoria_evaluacion,
+    })
+
+
 @login_required
 @user_passes_test(es_evaluador, login_url='login')
 def ver_tabla_posiciones(request, eve_id):
@@ -436,92 +418,12 @@ def ver_tabla_posiciones(request, eve_id):
         messages.error(request, "No estás inscrito en este evento.")
         return redirect('dashboard_evaluador')
     
-    criterios = Criterio.objects.filter(cri_evento_fk=evento)
-    peso_total = sum(c.cri_peso for c in criterios) or 1
-    
-    # Obtener todos los participantes aprobados
-    participantes_evento = ParticipanteEvento.objects.filter(
-        evento=evento,
-        par_eve_estado='Aprobado'
-    ).select_related('participante__usuario', 'proyecto_grupal')
-    
-    # Separar individuales y grupales
-    participantes_individuales = participantes_evento.filter(es_grupal=False)
-    
-    # Proyectos grupales con sus integrantes
-    proyectos_ids = participantes_evento.filter(es_grupal=True).values_list('proyecto_grupal_id', flat=True).distinct()
-    proyectos = ProyectoGrupal.objects.filter(id__in=proyectos_ids)
-    
-    # Posiciones de proyectos grupales
-    posiciones_proyectos = []
-    for proyecto in proyectos:
-        integrantes = participantes_evento.filter(proyecto_grupal=proyecto)
-        
-        if proyecto.nota_proyecto is not None:
-            puntaje = proyecto.nota_proyecto
-        else:
-            # Calcular si no está guardada
-            calificaciones = CalificacionProyecto.objects.filter(
-                proyecto=proyecto,
-                criterio__cri_evento_fk=evento
-            ).select_related('criterio')
-            evaluadores_ids = set(c.evaluador_id for c in calificaciones)
-            num_evaluadores = len(evaluadores_ids)
-            if num_evaluadores > 0:
-                puntaje = sum(
-                    c.cal_valor * c.criterio.cri_peso for c in calificaciones
-                ) / (peso_total * num_evaluadores)
-                puntaje = round(puntaje, 2)
-                proyecto.nota_proyecto = puntaje
-                proyecto.save()
-            else:
-                puntaje = 0
-        
-        posiciones_proyectos.append({
-            'proyecto': proyecto,
-            'integrantes': list(integrantes),
-            'puntaje': puntaje
-        })
-    
-    posiciones_proyectos.sort(key=lambda x: x['puntaje'], reverse=True)
-    
-    # Posiciones de participantes individuales
-    posiciones_individuales = []
-    for pe in participantes_individuales:
-        participante = pe.participante
-        
-        if pe.par_eve_valor is not None:
-            puntaje = pe.par_eve_valor
-        else:
-            calificaciones = Calificacion.objects.filter(
-                participante=participante,
-                criterio__cri_evento_fk=evento
-            ).select_related('criterio')
-            evaluadores_ids = set(c.evaluador_id for c in calificaciones)
-            num_evaluadores = len(evaluadores_ids)
-            if num_evaluadores > 0:
-                puntaje = sum(
-                    c.cal_valor * c.criterio.cri_peso for c in calificaciones
-                ) / (peso_total * num_evaluadores)
-                puntaje = round(puntaje, 2)
-                pe.par_eve_valor = puntaje
-                pe.save()
-            else:
-                puntaje = 0
-        
-        posiciones_individuales.append({
-            'participante': participante,
-            'puntaje': puntaje
-        })
-    
-    posiciones_individuales.sort(key=lambda x: x['puntaje'], reverse=True)
-    
     return render(request, 'tabla_posiciones_evaluador.html', {
         'evento': evento,
-        'posiciones_proyectos': posiciones_proyectos,
-        'posiciones_individuales': posiciones_individuales,
-        'tiene_proyectos': len(posiciones_proyectos) > 0,
-        'tiene_individuales': len(posiciones_individuales) > 0,
+        **obtener_tabla_posiciones(evento),
+        'posiciones_por_categoria': (
+            obtener_posiciones_por_categoria(evento) if evento.eve_es_multidisciplinario == 'Si' else []
+        ),
     })
 
 
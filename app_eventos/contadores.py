@@ -0,0 +1,97 @@
+"""
+Contadores desnormalizados de inscripciones por evento, rol, estado y confirmación.
+
+Cada alta, cambio de estado o baja de un AsistenteEvento, ParticipanteEvento o
+EvaluadorEvento suma o resta uno a la fila de su grupo con un UPDATE F() atómico
+(ver signals.py), así los paneles leen unas pocas filas por evento sin importar
+cuántos inscritos tenga. reconciliar_contadores reconstruye las filas desde las
+inscripciones si alguna escritura se saltó las señales (bulk_create, update()).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import EventoContadores
+from app_asistentes.models import AsistenteEvento
+from app_evaluadores.models import EvaluadorEvento
+from app_participantes.models import ParticipanteEvento
+
+# Modelo de inscripción -> (rol del contador, campo de estado)
+ROLES = {
+    AsistenteEvento: ('asistente', 'asi_eve_estado'),
+    ParticipanteEvento: ('participante', 'par_eve_estado'),
+    EvaluadorEvento: ('evaluador', 'eva_eve_estado'),
+}
+
+
+def ajustar_contador(evento_id, rol, estado, confirmado, delta):
+    """
+    Suma delta a la fila del grupo con una expresión F() (un UPDATE atómico).
+    Si la fila aún no existe se crea, salvo al restar.
+    """
+    contador = EventoContadores.objects.filter(evento_id=evento_id, rol=rol, estado=estado, confirmado=confirmado)
+    if contador.update(cantidad=F('cantidad') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            EventoContadores.objects.create(
+                evento_id=evento_id, rol=rol, estado=estado, confirmado=confirmado, cantidad=delta
+            )
+    except IntegrityError:
+        # Otra petición creó la fila al mismo tiempo
+        contador.update(cantidad=F('cantidad') + delta)
+
+
+def reconciliar_contadores(eventos_ids=None):
+    """
+    Reconstruye los contadores contando las inscripciones (una consulta agrupada por rol).
+    eventos_ids limita la reconstrucción a esos eventos; None los reconstruye todos.
+    Retorna el número de filas escritas.
+    """
+    contadores = []
+    for modelo, (rol, campo_estado) in ROLES.items():
+        inscripciones = modelo.objects.all()
+        if eventos_ids is not None:
+            inscripciones = inscripciones.filter(evento_id__in=eventos_ids)
+        grupos = inscripciones.values_list('evento_id', campo_estado, 'confirmado').annotate(
+            cantidad=Count('id')
+        ).order_by()
+        contadores.extend(
+            EventoContadores(evento_id=evento_id, rol=rol, estado=estado, confirmado=confirmado, cantidad=cantidad)
+            for evento_id, estado, confirmado, cantidad in grupos
+        )
+
+    with transaction.atomic():
+        existentes = EventoContadores.objects.all()
+        if eventos_ids is not None:
+            existentes = existentes.filter(evento_id__in=eventos_ids)
+        existentes.delete()
+        EventoContadores.objects.bulk_create(contadores, batch_size=500)
+    return len(contadores)
+
+
+def resumir_grupos(grupos):
+    """
+    Totales de un rol a partir de sus grupos (estado, confirmado, cantidad):
+    total, aprobados, pendientes, confirmados y por_estado.
+    """
+    resumen = {'total': 0, 'aprobados': 0, 'pendientes': 0, 'confirmados': 0, 'por_estado': {}}
+    for estado, confirmado, cantidad in grupos:
+        if not cantidad:
+            continue
+        resumen['total'] += cantidad
+        resumen['por_estado'][estado] = resumen['por_estado'].get(estado, 0) + cantidad
+        if confirmado:
+            resumen['confirmados'] += cantidad
+    resumen['aprobados'] = resumen['por_estado'].get('Aprobado', 0)
+    resumen['pendientes'] = resumen['por_estado'].get('Pendiente', 0)
+    return resumen
+
+
+def contadores_evento(evento):
+    """Resumen de inscripciones del evento por rol leído de sus contadores (una consulta)"""
+    grupos = {rol: [] for rol, _ in EventoContadores.ROL_CHOICES}
+    for rol, estado, confirmado, cantidad in EventoContadores.objects.filter(evento=evento).values_list(
+        'rol', 'estado', 'confirmado', 'cantidad'
+    ):
+        grupos[rol].append((estado, confirmado, cantidad))
+    return {rol: resumir_grupos(filas) for rol, filas in grupos.items()}
@@ -0,0 +1,31 @@
+"""
+Estadísticas de inscripción y evaluación de un evento.
+
+Los conteos por rol se leen de EventoContadores (unas pocas filas por evento);
+solo los participantes calificados y los totales de evaluación se consultan en
+las tablas de origen. En total son tres consultas por evento.
+"""
+from django.db.models import Count
+
+from .contadores import contadores_evento
+from app_evaluadores.models import Criterio
+from app_participantes.models import ParticipanteEvento
+
+
+def estadisticas_evento(evento):
+    """Conteos de asistentes, participantes, evaluadores y evaluación del evento"""
+    contadores = contadores_evento(evento)
+    evaluacion = Criterio.objects.filter(cri_evento_fk=evento).aggregate(
+        criterios=Count('cri_id', distinct=True),
+        calificaciones=Count('calificacion'),
+    )
+    participantes = contadores['participante']
+    participantes['calificados'] = ParticipanteEvento.objects.filter(
+        evento=evento, par_eve_valor__isnull=False
+    ).count()
+    return {
+        'asistentes': contadores['asistente'],
+        'participantes': participantes,
+        'evaluadores': contadores['evaluador'],
+        'evaluacion': evaluacion,
+    }
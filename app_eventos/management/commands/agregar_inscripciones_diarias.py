@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from app_eventos.series import agregar_inscripciones
+
+
+class Command(BaseCommand):
+    help = 'Agrega a la serie diaria por evento las inscripciones y aprobaciones nuevas desde la última ejecución'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reiniciar', action='store_true',
+                            help='Borra la serie y la reconstruye desde todas las inscripciones')
+
+    def handle(self, *args, **options):
+        resultado = agregar_inscripciones(reiniciar=options['reiniciar'])
+        for rol, (inscritos, aprobados) in resultado.items():
+            self.stdout.write(f'{rol}: {inscritos} inscripción(es), {aprobados} aprobación(es)')
+        self.stdout.write(self.style.SUCCESS('Serie diaria de inscripciones actualizada'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from app_eventos.models import Evento
+from app_eventos.contadores import reconciliar_contadores
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los contadores de inscripciones por evento a partir de las inscripciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('eve_id', type=int, nargs='?', help='ID del evento (por defecto, todos los eventos)')
+
+    def handle(self, *args, **options):
+        eve_id = options['eve_id']
+        if eve_id is not None and not Evento.objects.filter(pk=eve_id).exists():
+            raise CommandError(f'No existe un evento con ID {eve_id}')
+
+        filas = reconciliar_contadores(None if eve_id is None else [eve_id])
+
+        alcance = f'del evento {eve_id}' if eve_id is not None else 'de todos los eventos'
+        self.stdout.write(self.style.SUCCESS(f'Contadores {alcance} reconstruidos: {filas} fila(s)'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db.models import DateTimeField, F
+from django.db.models.functions import Cast
+from django.utils import timezone
+from app_eventos.models import Evento
+
+
+class Command(BaseCommand):
+    help = 'Completa la fecha de estado de los eventos creados antes de que existiera el campo'
+
+    def handle(self, *args, **options):
+        ahora = timezone.now()
+        sin_fecha = Evento.objects.filter(eve_fecha_estado__isnull=True)
+        # La fecha de inicio es la mejor aproximación disponible; si aún no llega se usa la actual
+        pasados = sin_fecha.filter(eve_fecha_inicio__lte=ahora.date()).update(
+            eve_fecha_estado=Cast(F('eve_fecha_inicio'), DateTimeField())
+        )
+        futuros = sin_fecha.update(eve_fecha_estado=ahora)
+        self.stdout.write(self.style.SUCCESS(f'Fecha de estado completada en {pasados + futuros} evento(s)'))
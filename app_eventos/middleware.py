@@ -1,6 +1,8 @@
 from datetime import date
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 from app_eventos.models import Evento
+from app_evaluadores.clasificacion import congelar_clasificacion
 
 class ActualizarEventosFinalizadosMiddleware(MiddlewareMixin):
     def process_request(self, request):
@@ -11,7 +13,11 @@ class ActualizarEventosFinalizadosMiddleware(MiddlewareMixin):
                 eve_estado__in=['Aprobado', 'Inscripciones Cerradas', 'Pendiente']
             )
 
-            if eventos.exists():
-                eventos.update(eve_estado='Finalizado')
+            finalizados = list(eventos.values_list('eve_id', flat=True))
+            if finalizados:
+                Evento.objects.filter(eve_id__in=finalizados).update(eve_estado='Finalizado', eve_fecha_estado=timezone.now())
+                # update() no dispara señales: el ranking se congela aquí
+                for evento in Evento.objects.filter(eve_id__in=finalizados):
+                    congelar_clasificacion(evento)
 
             request._eventos_actualizados = True
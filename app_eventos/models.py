@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from app_administradores.models import AdministradorEvento
 from app_areas.models import Categoria
 
@@ -22,6 +23,22 @@ class Evento(models.Model):
     eve_programacion = models.FileField(upload_to='eventos/programaciones/', null=True, blank=True)
     eve_memorias = models.FileField(upload_to='eventos/memorias/', null=True, blank=True)
     eve_informacion_tecnica = models.FileField(upload_to='eventos/informacion_tecnica/', null=True, blank=True)
+    # Momento en que el evento pasó a su estado actual; lo usan las marcas de "nuevos" del superadmin
+    eve_fecha_estado = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._eve_estado_original = instance.__dict__.get('eve_estado')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or self.eve_estado != getattr(self, '_eve_estado_original', self.eve_estado):
+            self.eve_fecha_estado = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'eve_fecha_estado'}
+        super().save(*args, **kwargs)
+        self._eve_estado_original = self.eve_estado
 
 class EventoCategoria(models.Model):
     evento = models.ForeignKey(Evento, on_delete=models.CASCADE)
@@ -59,3 +76,59 @@ class ConfiguracionCertificado(models.Model):
 
     def __str__(self):
         return f"{self.evento.eve_nombre} - {self.get_tipo_display()}"
+
+
+class EventoContadores(models.Model):
+    """
+    Conteo desnormalizado de inscripciones de un evento por rol, estado y confirmación.
+    Lo mantienen las señales de AsistenteEvento, ParticipanteEvento y EvaluadorEvento con
+    actualizaciones F() atómicas; el comando reconciliar_contadores lo reconstruye.
+    """
+    ROL_CHOICES = [
+        ('asistente', 'Asistente'),
+        ('participante', 'Participante'),
+        ('evaluador', 'Evaluador'),
+    ]
+
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='contadores')
+    rol = models.CharField(max_length=20, choices=ROL_CHOICES)
+    estado = models.CharField(max_length=45)
+    confirmado = models.BooleanField(default=False)
+    cantidad = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = (('evento', 'rol', 'estado', 'confirmado'),)
+
+    def __str__(self):
+        confirmacion = 'confirmado' if self.confirmado else 'sin confirmar'
+        return f"{self.evento_id} - {self.rol} {self.estado} ({confirmacion}): {self.cantidad}"
+
+
+class InscripcionesDiarias(models.Model):
+    """
+    Serie diaria de inscripciones y aprobaciones de un evento por rol.
+    La llena de forma incremental el comando agregar_inscripciones_diarias; las
+    gráficas de estadísticas leen solo esta tabla.
+    """
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='inscripciones_diarias')
+    rol = models.CharField(max_length=20, choices=EventoContadores.ROL_CHOICES)
+    fecha = models.DateField()
+    inscritos = models.PositiveIntegerField(default=0)
+    aprobados = models.PositiveIntegerField(default=0)
+    # Suma de (aprobación - inscripción) de los aprobados del día, en segundos
+    segundos_aprobacion = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = (('evento', 'rol', 'fecha'),)
+
+    def __str__(self):
+        return f"{self.evento_id} - {self.rol} {self.fecha}: {self.inscritos} inscritos, {self.aprobados} aprobados"
+
+
+class MarcaInscripcionesDiarias(models.Model):
+    """Hasta qué momento se agregaron las inscripciones y aprobaciones de un rol"""
+    rol = models.CharField(max_length=20, choices=EventoContadores.ROL_CHOICES, unique=True)
+    procesado_hasta = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.rol}: {self.procesado_hasta}"
@@ -0,0 +1,155 @@
+"""
+Serie diaria de inscripciones por evento y rol (InscripcionesDiarias).
+
+agregar_inscripciones procesa solo las inscripciones y aprobaciones posteriores
+a la marca de cada rol, hasta un corte unos minutos antes del momento actual
+para no saltarse transacciones que aún no confirman. Las inscripciones que se
+eliminan después (rechazos, limpieza de no confirmados) siguen contando el día
+en que llegaron: la serie describe el flujo de inscripciones, no el estado
+actual, que está en EventoContadores.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import InscripcionesDiarias, MarcaInscripcionesDiarias
+from app_asistentes.models import AsistenteEvento
+from app_evaluadores.models import EvaluadorEvento
+from app_participantes.models import ParticipanteEvento
+
+# Modelo de inscripción -> (rol, campo de inscripción, campo de aprobación)
+CAMPOS_SERIE = {
+    AsistenteEvento: ('asistente', 'asi_eve_fecha_hora', 'asi_eve_fecha_aprobacion'),
+    ParticipanteEvento: ('participante', 'par_eve_fecha_hora', 'par_eve_fecha_aprobacion'),
+    EvaluadorEvento: ('evaluador', 'eva_eve_fecha_hora', 'eva_eve_fecha_aprobacion'),
+}
+
+MARGEN_CORTE = timedelta(minutes=5)
+
+
+def _en_rango(campo, desde, hasta):
+    filtro = {f'{campo}__lte': hasta}
+    if desde is not None:
+        filtro[f'{campo}__gt'] = desde
+    return filtro
+
+
+def _agregar_rol(modelo, rol, campo_inscripcion, campo_aprobacion, corte):
+    """Suma a la serie las novedades de un rol entre su marca y el corte; retorna (inscritos, aprobados)"""
+    marca = MarcaInscripcionesDiarias.objects.select_for_update().filter(rol=rol).first()
+    desde = marca.procesado_hasta if marca else None
+    if desde is not None and desde >= corte:
+        return 0, 0
+
+    # (evento_id, fecha) -> [inscritos, aprobados, segundos_aprobacion]
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    inscripciones = modelo.objects.filter(**_en_rango(campo_inscripcion, desde, corte)).annotate(
+        dia=TruncDate(campo_inscripcion)
+    ).values_list('evento_id', 'dia').annotate(cantidad=Count('id')).order_by()
+    for evento_id, dia, cantidad in inscripciones:
+        deltas[(evento_id, dia)][0] += cantidad
+
+    aprobaciones = modelo.objects.filter(**_en_rango(campo_aprobacion, desde, corte)).values_list(
+        'evento_id', campo_inscripcion, campo_aprobacion
+    )
+    for evento_id, inscrito, aprobado in aprobaciones.iterator(chunk_size=2000):
+        delta = deltas[(evento_id, timezone.localdate(aprobado))]
+        delta[1] += 1
+        delta[2] += max((aprobado - inscrito).total_seconds(), 0)
+
+    if deltas:
+        eventos = {evento_id for evento_id, _ in deltas}
+        fechas = {fecha for _, fecha in deltas}
+        existentes = {
+            (fila.evento_id, fila.fecha): fila
+            for fila in InscripcionesDiarias.objects.filter(rol=rol, evento_id__in=eventos, fecha__in=fechas)
+        }
+        nuevas = []
+        for (evento_id, fecha), (inscritos, aprobados, segundos) in deltas.items():
+            fila = existentes.get((evento_id, fecha))
+            if fila is None:
+                nuevas.append(InscripcionesDiarias(
+                    evento_id=evento_id, rol=rol, fecha=fecha,
+                    inscritos=inscritos, aprobados=aprobados, segundos_aprobacion=segundos,
+                ))
+                continue
+            fila.inscritos += inscritos
+            fila.aprobados += aprobados
+            fila.segundos_aprobacion += segundos
+        InscripcionesDiarias.objects.bulk_update(
+            existentes.values(), ['inscritos', 'aprobados', 'segundos_aprobacion'], batch_size=500
+        )
+        InscripcionesDiarias.objects.bulk_create(nuevas, batch_size=500)
+
+    if marca is None:
+        MarcaInscripcionesDiarias.objects.create(rol=rol, procesado_hasta=corte)
+    else:
+        marca.procesado_hasta = corte
+        marca.save(update_fields=['procesado_hasta'])
+    return (
+        sum(inscritos for inscritos, _, _ in deltas.values()),
+        sum(aprobados for _, aprobados, _ in deltas.values()),
+    )
+
+
+def agregar_inscripciones(reiniciar=False):
+    """
+    Agrega a la serie diaria lo ocurrido desde la última ejecución.
+    Con reiniciar=True borra la serie y las marcas y la reconstruye completa.
+    Retorna {rol: (inscritos, aprobados)} procesados en esta ejecución.
+    """
+    corte = timezone.now() - MARGEN_CORTE
+    resultado = {}
+    if reiniciar:
+        with transaction.atomic():
+            MarcaInscripcionesDiarias.objects.all().delete()
+            InscripcionesDiarias.objects.all().delete()
+    for modelo, (rol, campo_inscripcion, campo_aprobacion) in CAMPOS_SERIE.items():
+        # La marca bloqueada evita que dos ejecuciones simultáneas sumen lo mismo dos veces
+        with transaction.atomic():
+            resultado[rol] = _agregar_rol(modelo, rol, campo_inscripcion, campo_aprobacion, corte)
+    return resultado
+
+
+def serie_evento(evento):
+    """
+    Series del evento listas para las gráficas, leídas solo de InscripcionesDiarias:
+    fechas, inscritos por día y acumulados por rol, aprobados por día y latencia media en horas.
+    """
+    filas = list(
+        InscripcionesDiarias.objects.filter(evento=evento).values_list(
+            'rol', 'fecha', 'inscritos', 'aprobados', 'segundos_aprobacion'
+        ).order_by('fecha')
+    )
+    fechas = sorted({fecha for _, fecha, _, _, _ in filas})
+    posicion = {fecha: i for i, fecha in enumerate(fechas)}
+    roles = [rol for rol, _, _ in CAMPOS_SERIE.values()]
+    inscritos = {rol: [0] * len(fechas) for rol in roles}
+    aprobados = {rol: [0] * len(fechas) for rol in roles}
+    totales = {rol: [0, 0.0] for rol in roles}
+    for rol, fecha, dia_inscritos, dia_aprobados, segundos in filas:
+        inscritos[rol][posicion[fecha]] = dia_inscritos
+        aprobados[rol][posicion[fecha]] = dia_aprobados
+        totales[rol][0] += dia_aprobados
+        totales[rol][1] += segundos
+
+    acumulados = {}
+    for rol, serie in inscritos.items():
+        suma, acumulados[rol] = 0, []
+        for cantidad in serie:
+            suma += cantidad
+            acumulados[rol].append(suma)
+    return {
+        'fechas': [fecha.isoformat() for fecha in fechas],
+        'inscritos': inscritos,
+        'acumulados': acumulados,
+        'aprobados': aprobados,
+        'latencia_horas': {
+            rol: round(segundos / cantidad / 3600, 1) if cantidad else None
+            for rol, (cantidad, segundos) in totales.items()
+        },
+    }
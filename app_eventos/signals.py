@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .contadores import ROLES, ajustar_contador
+from .models import Evento
+from .series import CAMPOS_SERIE
+from app_asistentes.models import AsistenteEvento
+from app_evaluadores.clasificacion import congelar_clasificacion
+from app_evaluadores.models import EvaluadorEvento
+from app_participantes.models import ParticipanteEvento
+
+
+# ===============================
+# CONTADORES DE INSCRIPCIONES
+# ===============================
+
+def _grupo_original(instance):
+    """(estado, confirmado) con que se leyó la inscripción, o None si no se conoce"""
+    original = getattr(instance, '_contador_original', None)
+    if original is None or None in original:
+        return None
+    return original
+
+
+@receiver(post_save, sender=AsistenteEvento)
+@receiver(post_save, sender=ParticipanteEvento)
+@receiver(post_save, sender=EvaluadorEvento)
+def contar_inscripcion_guardada(sender, instance, created, **kwargs):
+    """Suma la inscripción nueva a su grupo o la mueve de grupo si cambió estado o confirmación"""
+    rol, campo_estado = ROLES[sender]
+    actual = (getattr(instance, campo_estado), instance.confirmado)
+    original = _grupo_original(instance)
+    instance._contador_original = actual
+
+    if created:
+        ajustar_contador(instance.evento_id, rol, *actual, 1)
+    elif original is not None and original != actual:
+        ajustar_contador(instance.evento_id, rol, *original, -1)
+        ajustar_contador(instance.evento_id, rol, *actual, 1)
+
+
+@receiver(post_delete, sender=AsistenteEvento)
+@receiver(post_delete, sender=ParticipanteEvento)
+@receiver(post_delete, sender=EvaluadorEvento)
+def descontar_inscripcion_eliminada(sender, instance, origin=None, **kwargs):
+    """Resta la inscripción eliminada de su grupo"""
+    # Si se elimina el evento sus contadores se borran en cascada
+    if isinstance(origin, Evento):
+        return
+    rol, campo_estado = ROLES[sender]
+    estado, confirmado = _grupo_original(instance) or (getattr(instance, campo_estado), instance.confirmado)
+    ajustar_contador(instance.evento_id, rol, estado, confirmado, -1)
+
+
+# ===============================
+# FECHA DE APROBACIÓN
+# ===============================
+
+@receiver(pre_save, sender=AsistenteEvento)
+@receiver(pre_save, sender=ParticipanteEvento)
+@receiver(pre_save, sender=EvaluadorEvento)
+def sellar_aprobacion(sender, instance, **kwargs):
+    """Guarda cuándo pasó la inscripción a 'Aprobado' por primera vez"""
+    _, campo_estado = ROLES[sender]
+    _, _, campo_aprobacion = CAMPOS_SERIE[sender]
+    if getattr(instance, campo_estado) != 'Aprobado' or getattr(instance, campo_aprobacion) is not None:
+        return
+    original = _grupo_original(instance)
+    # Sin estado original conocido solo se sellan las altas, no las aprobaciones antiguas
+    if instance._state.adding or (original is not None and original[0] != 'Aprobado'):
+        setattr(instance, campo_aprobacion, timezone.now())
+
+
+# ===============================
+# CLASIFICACIÓN FINAL
+# ===============================
+
+@receiver(post_save, sender=Evento)
+def congelar_clasificacion_evento(sender, instance, **kwargs):
+    """Congela el ranking cuando el evento pasa a 'Finalizado'"""
+    if instance.eve_estado == 'Finalizado':
+        transaction.on_commit(lambda: congelar_clasificacion(instance))
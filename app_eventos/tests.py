@@ -0,0 +1,118 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from app_administradores.models import AdministradorEvento
+from app_eventos.contadores import reconciliar_contadores
+from app_eventos.models import Evento, EventoContadores, InscripcionesDiarias
+from app_eventos.series import agregar_inscripciones
+from app_participantes.models import Participante, ParticipanteEvento
+from app_usuarios.models import Usuario
+
+
+class InscripcionesTestMixin:
+    """Un evento y un generador de participantes inscritos"""
+
+    def setUp(self):
+        administrador = AdministradorEvento.objects.create(usuario=Usuario.objects.create_user(
+            username='admin_evento', email='admin@eventsoft.com', password='clave', documento='100'
+        ))
+        self.evento = Evento.objects.create(
+            eve_nombre='Evento', eve_descripcion='Descripción', eve_ciudad='Manizales',
+            eve_lugar='Auditorio', eve_fecha_inicio=date(2099, 1, 1), eve_fecha_fin=date(2099, 1, 2),
+            eve_estado='Aprobado', eve_capacidad=50, eve_tienecosto='No', eve_administrador_fk=administrador,
+        )
+        self.siguiente = 0
+
+    def inscribir(self, estado='Pendiente', confirmado=False, fecha_hora=None):
+        self.siguiente += 1
+        n = self.siguiente
+        participante = Participante.objects.create(usuario=Usuario.objects.create_user(
+            username=f'participante{n}', email=f'participante{n}@eventsoft.com', password='clave', documento=f'p{n}'
+        ))
+        return ParticipanteEvento.objects.create(
+            participante=participante, evento=self.evento, par_eve_fecha_hora=fecha_hora or timezone.now(),
+            par_eve_estado=estado, confirmado=confirmado,
+        )
+
+
+class ContadoresInscripcionesTests(InscripcionesTestMixin, TestCase):
+    """Las señales mantienen EventoContadores igual a contar las inscripciones"""
+
+    def contadores(self):
+        return {
+            (rol, estado, confirmado): cantidad
+            for rol, estado, confirmado, cantidad in EventoContadores.objects.filter(
+                evento=self.evento, cantidad__gt=0
+            ).values_list('rol', 'estado', 'confirmado', 'cantidad')
+        }
+
+    def test_alta_cambio_de_estado_y_baja(self):
+        inscripcion = self.inscribir()
+        self.inscribir()
+        self.assertEqual(self.contadores(), {('participante', 'Pendiente', False): 2})
+
+        inscripcion = ParticipanteEvento.objects.get(pk=inscripcion.pk)
+        inscripcion.par_eve_estado = 'Aprobado'
+        inscripcion.confirmado = True
+        inscripcion.save()
+        self.assertEqual(self.contadores(), {
+            ('participante', 'Pendiente', False): 1,
+            ('participante', 'Aprobado', True): 1,
+        })
+
+        inscripcion.delete()
+        self.assertEqual(self.contadores(), {('participante', 'Pendiente', False): 1})
+
+    def test_guardar_sin_cambios_no_duplica(self):
+        inscripcion = ParticipanteEvento.objects.get(pk=self.inscribir('Aprobado').pk)
+        inscripcion.save()
+        inscripcion.save()
+        self.assertEqual(self.contadores(), {('participante', 'Aprobado', False): 1})
+
+    def test_reconciliar_coincide_con_las_senales(self):
+        for estado in ['Pendiente', 'Aprobado', 'Aprobado', 'Rechazado']:
+            self.inscribir(estado)
+        mantenidos = self.contadores()
+        EventoContadores.objects.all().delete()
+        reconciliar_contadores([self.evento.pk])
+        self.assertEqual(self.contadores(), mantenidos)
+
+
+class SerieDiariaTests(InscripcionesTestMixin, TestCase):
+    """agregar_inscripciones suma cada inscripción una sola vez gracias a su marca"""
+
+    def inscritos(self):
+        return sum(InscripcionesDiarias.objects.filter(
+            evento=self.evento, rol='participante'
+        ).values_list('inscritos', flat=True))
+
+    def test_ejecuciones_repetidas_no_duplican(self):
+        hace_dos_dias = timezone.now() - timedelta(days=2)
+        self.inscribir(fecha_hora=hace_dos_dias)
+        self.inscribir(fecha_hora=hace_dos_dias)
+        self.assertEqual(agregar_inscripciones()['participante'], (2, 0))
+        self.assertEqual(agregar_inscripciones()['participante'], (0, 0))
+        self.assertEqual(self.inscritos(), 2)
+
+        # Una inscripción posterior a la marca entra en la ejecución siguiente
+        self.inscribir(fecha_hora=timezone.now())
+        despues = timezone.now() + timedelta(minutes=10)
+        with mock.patch('app_eventos.series.timezone.now', return_value=despues):
+            self.assertEqual(agregar_inscripciones()['participante'], (1, 0))
+        self.assertEqual(self.inscritos(), 3)
+
+    def test_no_procesa_inscripciones_posteriores_al_corte(self):
+        # Puede haber transacciones de este momento sin confirmar: se dejan para la siguiente ejecución
+        self.inscribir(fecha_hora=timezone.now())
+        agregar_inscripciones()
+        self.assertEqual(self.inscritos(), 0)
+
+    def test_reiniciar_reconstruye_la_serie(self):
+        self.inscribir(fecha_hora=timezone.now() - timedelta(days=1))
+        agregar_inscripciones()
+        InscripcionesDiarias.objects.update(inscritos=99)
+        agregar_inscripciones(reiniciar=True)
+        self.assertEqual(self.inscritos(), 1)
@@ -38,11 +38,15 @@ class ParticipanteEvento(models.Model):
     """Relación entre Participante y Evento - puede ser individual o grupal"""
     participante = models.ForeignKey(Participante, on_delete=models.CASCADE)
     evento = models.ForeignKey(Evento, on_delete=models.CASCADE)
-    par_eve_fecha_hora = models.DateTimeField()
+    par_eve_fecha_hora = models.DateTimeField(db_index=True)
     par_eve_documentos = models.FileField(upload_to='participantes/documentos/', null=True, blank=True)
     par_eve_estado = models.CharField(max_length=45)
+    # Primera vez que la inscripción pasó a 'Aprobado'; la sellan las señales de app_eventos
+    par_eve_fecha_aprobacion = models.DateTimeField(null=True, blank=True, db_index=True)
     par_eve_qr = models.ImageField(upload_to='participantes/qr/', null=True, blank=True)
     par_eve_valor = models.FloatField(null=True, blank=True)
+    # Puesto de competencia (1, 2, 2, 4) entre los aprobados con nota; lo mantiene el motor de puntajes
+    par_eve_puesto = models.PositiveIntegerField(null=True, blank=True)
     confirmado = models.BooleanField(default=False)
     
     # Campos para proyectos grupales
@@ -56,3 +60,66 @@ class ParticipanteEvento(models.Model):
 
     class Meta:
         unique_together = (('participante', 'evento'),)
+        indexes = [
+            models.Index(fields=['evento', 'par_eve_puesto']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado almacenado, usado para mover la inscripción entre los contadores del evento
+        instance._contador_original = (instance.__dict__.get('par_eve_estado'), instance.__dict__.get('confirmado'))
+        # Estado almacenado, usado para saber si hay que recalcular los puestos del evento
+        instance._par_eve_estado_original = instance.__dict__.get('par_eve_estado')
+        return instance
+
+
+class PuestoCategoria(models.Model):
+    """Puesto de una participación dentro de una categoría del evento"""
+    participante_evento = models.ForeignKey(ParticipanteEvento, on_delete=models.CASCADE,
+                                            related_name='puestos_categoria')
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE)
+    puesto = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = (('participante_evento', 'categoria'),)
+        indexes = [
+            models.Index(fields=['categoria', 'puesto']),
+        ]
+
+    def __str__(self):
+        return f"{self.participante_evento} - {self.categoria.cat_nombre}: {self.puesto}"
+
+
+class ClasificacionFinal(models.Model):
+    """
+    Fotografía inmutable del ranking de un evento, escrita una sola vez al
+    finalizarlo. Certificados de premiación, paneles y exportaciones leen estas
+    filas, así que cambios posteriores de notas no alteran quién ganó.
+    """
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='clasificacion_final')
+    # Si después se elimina la inscripción o el proyecto, la fila queda con el nombre y documento copiados
+    participante_evento = models.ForeignKey(ParticipanteEvento, on_delete=models.SET_NULL, null=True, blank=True,
+                                            related_name='clasificacion_final')
+    proyecto_grupal = models.ForeignKey(ProyectoGrupal, on_delete=models.SET_NULL, null=True, blank=True)
+    # Puesto de competencia (1, 2, 2, 4) y grupo de empate denso (1, 2, 2, 3)
+    puesto = models.PositiveIntegerField()
+    grupo_empate = models.PositiveIntegerField()
+    puntaje = models.FloatField()
+    nombre = models.CharField(max_length=300)
+    documento = models.CharField(max_length=50, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = (('evento', 'participante_evento'),)
+        indexes = [
+            models.Index(fields=['evento', 'puesto']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("La clasificación final de un evento no se puede modificar.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.evento.eve_nombre} - {self.puesto}°: {self.nombre}"
@@ -6,6 +6,7 @@ from app_evaluadores.models import Criterio, Calificacion
 from django.views.decorators.http import require_http_methods, require_POST
 from django.contrib.auth.decorators import login_required, user_passes_test
 from app_usuarios.permisos import es_participante
+from app_usuarios.inscripciones import inscripciones_usuario
 from django.urls import reverse
 from django.http import Http404, HttpResponse
 import os
@@ -16,42 +17,22 @@ import os
 @login_required
 @user_passes_test(es_participante, login_url='login')
 def dashboard_participante_general(request):
-    participante = request.user.participante
-    inscripciones = ParticipanteEvento.objects.filter(participante=participante)
-
-    if not inscripciones.exists():
+    participaciones = inscripciones_usuario(request.user)['participante']
+    if not participaciones['inscripciones']:
         messages.warning(request, "No tienes inscripciones registradas.")
         return redirect('ingreso_participante')
 
-    eventos = []
-    estadisticas = {
-        'total': 0,
-        'pendientes': 0,
-        'aprobados': 0,
-        'rechazados': 0,
-        'cancelados': 0
-    }
-
-    for inscripcion in inscripciones:
-        evento_data = {
-            'eve_id': inscripcion.evento.eve_id,
-            'eve_nombre': inscripcion.evento.eve_nombre,
-            'eve_fecha_inicio': inscripcion.evento.eve_fecha_inicio,
-            'eve_fecha_fin': inscripcion.evento.eve_fecha_fin,
-            'par_eve_estado': inscripcion.par_eve_estado,
+    eventos = [
+        {
+            'eve_id': inscripcion['evento'].eve_id,
+            'eve_nombre': inscripcion['evento'].eve_nombre,
+            'eve_fecha_inicio': inscripcion['evento'].eve_fecha_inicio,
+            'eve_fecha_fin': inscripcion['evento'].eve_fecha_fin,
+            'par_eve_estado': inscripcion['estado'],
         }
-        eventos.append(evento_data)
-        
-        # Contar estadísticas
-        estadisticas['total'] += 1
-        if inscripcion.par_eve_estado == 'Pendiente':
-            estadisticas['pendientes'] += 1
-        elif inscripcion.par_eve_estado == 'Aprobado':
-            estadisticas['aprobados'] += 1
-        elif inscripcion.par_eve_estado == 'Rechazado':
-            estadisticas['rechazados'] += 1
-        elif inscripcion.par_eve_estado == 'Cancelado':
-            estadisticas['cancelados'] += 1
+        for inscripcion in participaciones['inscripciones']
+    ]
+    estadisticas = participaciones['estadisticas']
 
     return render(request, 'app_participantes/dashboard_participante_general.html', {
         'eventos': eventos,
@@ -68,6 +49,11 @@ def dashboard_participante_evento(request, evento_id):
         ParticipanteEvento, participante=participante, evento__pk=evento_id
     )
 
+    # En eventos finalizados el puesto sale de la clasificación congelada
+    puesto = inscripcion.par_eve_puesto
+    if inscripcion.evento.eve_estado == 'Finalizado':
+        puesto = inscripcion.clasificacion_final.values_list('puesto', flat=True).first()
+
     # Información básica
     datos = {
         'par_nombre': participante.usuario.first_name,
@@ -78,6 +64,7 @@ def dashboard_participante_evento(request, evento_id):
         'eve_informacion_tecnica': inscripcion.evento.eve_informacion_tecnica,
         'eve_memorias': inscripcion.evento.eve_memorias,
         'par_eve_estado': inscripcion.par_eve_estado,
+        'par_eve_puesto': puesto,
         'par_id': participante.id,
         'eve_id': inscripcion.evento.eve_id,
         'es_grupal': inscripcion.es_grupal,
@@ -0,0 +1,87 @@
+"""
+Inscripciones de un usuario en los tres roles (asistente, participante y evaluador).
+
+Una sola consulta (UNION ALL de las tres relaciones, cada una unida a su evento)
+trae todas las inscripciones del usuario con los campos del evento que usan los
+paneles; los conteos por estado se suman en memoria sobre esas mismas filas.
+"""
+from django.db.models import CharField, F, Value
+
+from app_asistentes.models import AsistenteEvento
+from app_evaluadores.models import EvaluadorEvento
+from app_eventos.models import Evento
+from app_participantes.models import ParticipanteEvento
+
+ROLES = ['asistente', 'participante', 'evaluador']
+
+CAMPOS_EVENTO = [
+    'eve_id', 'eve_nombre', 'eve_descripcion', 'eve_ciudad', 'eve_fecha_inicio', 'eve_fecha_fin',
+    'eve_estado', 'eve_imagen', 'eve_memorias', 'eve_informacion_tecnica', 'eve_es_multidisciplinario',
+]
+
+
+def _columnas(rol, prefijo, categoria=None):
+    """
+    Columnas comunes de la unión, con los mismos nombres y en el mismo orden para los tres roles.
+    Los alias llevan el prefijo ins_ porque no pueden coincidir con campos de los modelos.
+    """
+    return {
+        'ins_rol': Value(rol, output_field=CharField()),
+        'ins_estado': F(f'{prefijo}_estado'),
+        'ins_confirmado': F('confirmado'),
+        'ins_qr': F(f'{prefijo}_qr'),
+        'ins_categoria': F(categoria) if categoria else Value(None, output_field=CharField()),
+        **{campo: F(f'evento__{campo}') for campo in CAMPOS_EVENTO},
+    }
+
+
+def _estadisticas(inscripciones):
+    estadisticas = {
+        'total': len(inscripciones), 'pendientes': 0, 'aprobados': 0, 'rechazados': 0, 'cancelados': 0,
+        'confirmados': 0, 'con_qr': 0,
+    }
+    claves = {'Pendiente': 'pendientes', 'Aprobado': 'aprobados', 'Rechazado': 'rechazados', 'Cancelado': 'cancelados'}
+    for inscripcion in inscripciones:
+        if inscripcion['estado'] in claves:
+            estadisticas[claves[inscripcion['estado']]] += 1
+        estadisticas['confirmados'] += bool(inscripcion['confirmado'])
+        estadisticas['con_qr'] += inscripcion['tiene_qr']
+    return estadisticas
+
+
+def inscripciones_usuario(usuario):
+    """
+    Retorna {rol: {'inscripciones': [...], 'estadisticas': {...}}} para los tres roles.
+    Cada inscripción trae el evento (instancia sin guardar con los campos de CAMPOS_EVENTO),
+    estado, confirmado, tiene_qr, categoria_evaluacion, tiene_memorias, tiene_info_tecnica
+    y es_multidisciplinario.
+    """
+    asistencias = AsistenteEvento.objects.filter(asistente__usuario=usuario).values(
+        **_columnas('asistente', 'asi_eve')
+    )
+    participaciones = ParticipanteEvento.objects.filter(participante__usuario=usuario).values(
+        **_columnas('participante', 'par_eve')
+    )
+    evaluaciones = EvaluadorEvento.objects.filter(evaluador__usuario=usuario).values(
+        **_columnas('evaluador', 'eva_eve', categoria='categoria_evaluacion__cat_nombre')
+    )
+    filas = asistencias.union(participaciones, evaluaciones, all=True).order_by('-eve_fecha_inicio', 'eve_id')
+
+    por_rol = {rol: [] for rol in ROLES}
+    for fila in filas:
+        evento = Evento(**{campo: fila[campo] for campo in CAMPOS_EVENTO})
+        categoria = fila['ins_categoria']
+        por_rol[fila['ins_rol']].append({
+            'evento': evento,
+            'estado': fila['ins_estado'],
+            'confirmado': fila['ins_confirmado'],
+            'tiene_qr': bool(fila['ins_qr']),
+            'categoria_evaluacion': {'cat_nombre': categoria} if categoria else None,
+            'tiene_memorias': bool(evento.eve_memorias),
+            'tiene_info_tecnica': bool(evento.eve_informacion_tecnica),
+            'es_multidisciplinario': evento.eve_es_multidisciplinario == 'Si',
+        })
+    return {
+        rol: {'inscripciones': inscripciones, 'estadisticas': _estadisticas(inscripciones)}
+        for rol, inscripciones in por_rol.items()
+    }
@@ -4,9 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.hashers import check_password
 from django.contrib import messages
-from app_participantes.models import ParticipanteEvento
-from app_asistentes.models import AsistenteEvento
-from app_evaluadores.models import EvaluadorEvento
+from .inscripciones import ROLES, inscripciones_usuario
 
 
 def login_view(request):
@@ -21,26 +19,12 @@ def login_view(request):
                 messages.error(request, f"No tienes asignado el rol seleccionado.")
                 return redirect('login')
             # Validar confirmación según el rol
-            if rol == 'asistente':
-                if not hasattr(user, 'asistente'):
-                    messages.error(request, "Tu cuenta no está registrada como asistente.")
-                    return redirect('login')
-                if not AsistenteEvento.objects.filter(asistente=user.asistente, confirmado=True).exists():
-                    messages.error(request, "Aún no has confirmado tu inscripción como asistente.")
-                    return redirect('login')
-            elif rol == 'participante':
-                if not hasattr(user, 'participante'):
-                    messages.error(request, "Tu cuenta no está registrada como participante.")
-                    return redirect('login')
-                if not ParticipanteEvento.objects.filter(participante=user.participante, confirmado=True).exists():
-                    messages.error(request, "Aún no has confirmado tu inscripción como participante.")
-                    return redirect('login')
-            elif rol == 'evaluador':
-                if not hasattr(user, 'evaluador'):
-                    messages.error(request, "Tu cuenta no está registrada como evaluador.")
+            if rol in ROLES:
+                if not hasattr(user, rol):
+                    messages.error(request, f"Tu cuenta no está registrada como {rol}.")
                     return redirect('login')
-                if not EvaluadorEvento.objects.filter(evaluador=user.evaluador, confirmado=True).exists():
-                    messages.error(request, "Aún no has confirmado tu inscripción como evaluador.")
+                if not inscripciones_usuario(user)[rol]['estadisticas']['confirmados']:
+                    messages.error(request, f"Aún no has confirmado tu inscripción como {rol}.")
                     return redirect('login')
             # Guardar el rol elegido en la sesión
             request.session['rol_sesion'] = rol
@@ -90,6 +90,32 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# locmem por defecto, solo para desarrollo: es local a cada proceso y no recibe las
+# invalidaciones de los demás, así que con ella las tablas de posiciones se cachean poco tiempo.
+# En producción usa una caché compartida (memcached o redis), por ejemplo:
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        "LOCATION": os.getenv('CACHE_LOCATION', 'eventsoft'),
+    }
+}
+
+# Segundos que se conserva una tabla de posiciones en caché (se invalida al cambiar una nota).
+# Con locmem una nota escrita por otro proceso tarda hasta este tiempo en verse: por eso es corto
+POSICIONES_CACHE_TIMEOUT = int(os.getenv(
+    'POSICIONES_CACHE_TIMEOUT', '30' if CACHES['default']['BACKEND'].endswith('LocMemCache') else '3600'
+))
+
+# Procesos que generan los PDFs de certificados en paralelo (0 = uno por núcleo)
+# y certificados que recibe cada proceso por bloque
+CERTIFICADOS_PROCESOS = int(os.getenv('CERTIFICADOS_PROCESOS', '0'))
+CERTIFICADOS_POR_BLOQUE = int(os.getenv('CERTIFICADOS_POR_BLOQUE', '8'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 